@@ -9,24 +9,81 @@ DEV_MODE = os.getenv("DEV_MODE", "false").lower() == "true"
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./moli_door.db")
 
+# SQLite connection profile (applied on every new connection; empty value skips a pragma)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE = os.getenv("SQLITE_CACHE_SIZE", "-16000")  # negative = KiB
+SQLITE_MMAP_SIZE = os.getenv("SQLITE_MMAP_SIZE", "67108864")
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+SQLITE_BUSY_TIMEOUT_MS = os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")
+# INCREMENTAL lets the archiver hand freed pages back to the SD card; only takes effect on new
+# database files (existing ones are converted by a one-time full VACUUM, see POST /admin/archive/run)
+SQLITE_AUTO_VACUUM = os.getenv("SQLITE_AUTO_VACUUM", "INCREMENTAL")
+# Periodic WAL checkpoint interval in seconds (0 disables)
+SQLITE_WAL_CHECKPOINT_INTERVAL = int(os.getenv("SQLITE_WAL_CHECKPOINT_INTERVAL", "300"))
+
+# Archival: access logs / door events older than the retention horizon move to monthly
+# gzip NDJSON segments under ARCHIVE_DIR (retention 0 disables; interval 0 = manual runs only)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./data/archive")
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "365"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "86400"))
+
+# Offline authorization: a memory-mapped snapshot of the card index lets the door keep deciding
+# when SQLite is unavailable; decisions made meanwhile go to the journal and are replayed later
+OFFLINE_SNAPSHOT_PATH = os.getenv("OFFLINE_SNAPSHOT_PATH", "./data/auth_snapshot.bin")
+OFFLINE_JOURNAL_PATH = os.getenv("OFFLINE_JOURNAL_PATH", "./data/offline_journal.ndjson")
+# How often to rewrite a changed snapshot / retry reconciliation, in seconds (0 disables)
+OFFLINE_SNAPSHOT_INTERVAL_SECONDS = int(os.getenv("OFFLINE_SNAPSHOT_INTERVAL_SECONDS", "30"))
+
 # Telegram
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 TG_CHAT_ID = os.getenv("TG_CHAT_ID")
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+TELEGRAM_QUEUE_SIZE = int(os.getenv("TELEGRAM_QUEUE_SIZE", "100"))
+TELEGRAM_COALESCE_WINDOW_MS = int(os.getenv("TELEGRAM_COALESCE_WINDOW_MS", "2000"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
 
 # RFID Device
 RFID_DEVICE_PATH = os.getenv(
     "RFID_DEVICE_PATH",
     "/dev/input/by-id/usb-Sycreader_RFID_Technology_Co.__Ltd_SYC_ID_IC_USB_Reader_08FF20140315-event-kbd"
 )
+# Readers to watch (comma-separated), defaults to RFID_DEVICE_PATH
+RFID_DEVICE_PATHS = [
+    path.strip()
+    for path in os.getenv("RFID_DEVICE_PATHS", RFID_DEVICE_PATH).split(",")
+    if path.strip()
+]
+RFID_RECONNECT_INTERVAL = float(os.getenv("RFID_RECONNECT_INTERVAL", "2"))
 
 # GPIO
 LOCK_PIN = int(os.getenv("LOCK_PIN", "16"))
 LOCK_ACTIVE_LEVEL = int(os.getenv("LOCK_ACTIVE_LEVEL", "1"))
 LOCK_DURATION = int(os.getenv("LOCK_DURATION", "3"))
 
+# Doors: the primary door uses RFID_DEVICE_PATHS / LOCK_PIN above; DOORS_CONFIG adds more
+# entrances served by the same process (a JSON array, or the path to a .json file holding one)
+DOOR_NAME = os.getenv("DOOR_NAME", "主門")
+DOORS_CONFIG = os.getenv("DOORS_CONFIG", "")
+
+# Repeated scans of the same card inside this window are collapsed (0 disables)
+SCAN_DEBOUNCE_SECONDS = float(os.getenv("SCAN_DEBOUNCE_SECONDS", "3"))
+
+# Door scheduler: upper bound on how long it sleeps between transitions (safety net)
+DOOR_SCHEDULER_MAX_SLEEP_SECONDS = int(os.getenv("DOOR_SCHEDULER_MAX_SLEEP_SECONDS", "3600"))
+
+# Write-behind event writer (AccessLog / DoorEvent batching)
+EVENT_WRITER_FLUSH_INTERVAL_MS = int(os.getenv("EVENT_WRITER_FLUSH_INTERVAL_MS", "500"))
+EVENT_WRITER_BATCH_SIZE = int(os.getenv("EVENT_WRITER_BATCH_SIZE", "50"))
+EVENT_WRITER_QUEUE_SIZE = int(os.getenv("EVENT_WRITER_QUEUE_SIZE", "1000"))
+
 # Registration
 REGISTER_TIMEOUT = int(os.getenv("REGISTER_TIMEOUT", "90"))
 
+# Server-Sent Events: per-subscriber queue size and keep-alive comment interval (seconds)
+EVENT_STREAM_QUEUE_SIZE = int(os.getenv("EVENT_STREAM_QUEUE_SIZE", "32"))
+EVENT_STREAM_KEEPALIVE_SECONDS = float(os.getenv("EVENT_STREAM_KEEPALIVE_SECONDS", "15"))
+
 # Cookies
 COOKIE_SECURE = os.getenv("COOKIE_SECURE", "false").lower() == "true"
 
@@ -62,6 +119,14 @@ if len(JWT_SECRET_KEY) < 32 and not DEV_MODE:
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "480"))
 
+# bcrypt 雜湊 / 驗證的專用執行緒數與排隊逾時（秒），避免卡住事件迴圈
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "1"))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+
+# 已驗證 token → 管理員身分的快取（秒數為 0 時停用）
+ADMIN_CACHE_TTL_SECONDS = float(os.getenv("ADMIN_CACHE_TTL_SECONDS", "30"))
+ADMIN_CACHE_MAX_ENTRIES = int(os.getenv("ADMIN_CACHE_MAX_ENTRIES", "256"))
+
 # ==================== 速率限制 ====================
 RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
 RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "5"))
@@ -1,23 +1,85 @@
 from sqlalchemy import (
     create_engine,
+    event,
     Column,
     String,
+    BigInteger,
     TIMESTAMP,
     func,
     Integer,
     ForeignKey,
     Boolean,
+    Index,
     inspect,
     text,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session, relationship
 import json
+import re
 import uuid
 
-from app.config import DATABASE_URL
+from app.config import (
+    DATABASE_URL,
+    SQLITE_AUTO_VACUUM,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_TEMP_STORE,
+)
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+# Applied in this order on every new connection; busy_timeout goes first so the
+# journal_mode switch itself waits instead of failing on a locked database.
+SQLITE_PRAGMAS = [
+    ("busy_timeout", SQLITE_BUSY_TIMEOUT_MS),
+    # Must precede table creation to apply to a new file; a no-op on existing ones until VACUUM.
+    ("auto_vacuum", SQLITE_AUTO_VACUUM),
+    ("journal_mode", SQLITE_JOURNAL_MODE),
+    ("synchronous", SQLITE_SYNCHRONOUS),
+    ("cache_size", SQLITE_CACHE_SIZE),
+    ("mmap_size", SQLITE_MMAP_SIZE),
+    ("temp_store", SQLITE_TEMP_STORE),
+]
+SQLITE_PRAGMA_VALUE_PATTERN = re.compile(r"-?\w+")
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas=None):
+    """Apply the configured SQLite profile to a raw DB-API connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas if pragmas is not None else SQLITE_PRAGMAS:
+            value = "" if value is None else str(value).strip()
+            if not value:
+                continue
+            if not SQLITE_PRAGMA_VALUE_PATTERN.fullmatch(value):
+                raise RuntimeError(f"Invalid SQLite pragma value: {name}={value!r}")
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _on_sqlite_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
+
+
+def checkpoint_wal(mode: str = "PASSIVE"):
+    """Run a WAL checkpoint; returns (busy, wal_frames, checkpointed_frames) or None outside WAL mode."""
+    if engine.dialect.name != "sqlite":
+        return None
+    with engine.connect() as connection:
+        journal_mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+        if str(journal_mode).lower() != "wal":
+            return None
+        row = connection.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    return tuple(row) if row else None
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -38,6 +100,10 @@ DEFAULT_WEEKDAY_MODE_OVERRIDES_JSON = json.dumps(
     separators=(",", ":"),
 )
 
+# The door wired to LOCK_PIN / RFID_DEVICE_PATHS; rows written before multi-door support
+# (door_id NULL) belong to it.
+PRIMARY_DOOR_ID = "main"
+
 class User(Base):
     __tablename__ = "users"
 
@@ -57,7 +123,10 @@ class Card(Base):
 
     id = Column(String(36), primary_key=True, default=generate_uuid)
     rfid_uid = Column(String(50), unique=True, nullable=False, index=True)
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    # Canonical integer form of rfid_uid (see card_uid.canonicalize_card_uid); NULL for
+    # non-decimal UIDs and for rows the startup backfill has not reached yet.
+    uid_int = Column(BigInteger, nullable=True)
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
     nickname = Column(String(50), nullable=True)  # Optional: 卡片暱稱（例如：學生證、備用卡）
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -65,6 +134,12 @@ class Card(Base):
     # Relationship
     user = relationship("User", back_populates="cards")
 
+    __table_args__ = (
+        # Keyset pagination order for the card listing
+        Index("ix_cards_created_at_id", "created_at", "id"),
+        Index("ux_cards_uid_int", "uid_int", unique=True),
+    )
+
 class AccessLog(Base):
     __tablename__ = "access_logs"
 
@@ -73,8 +148,17 @@ class AccessLog(Base):
     card_id = Column(String(36), ForeignKey("cards.id"), nullable=True)  # 記錄使用哪張卡
     rfid_uid = Column(String(50))
     action = Column(String(10))
+    door_id = Column(String(50), nullable=True)  # 刷卡的門（NULL = 主門）
     timestamp = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Newest-first keyset paging, and per-user history / activity counts
+        Index("ix_access_logs_timestamp_id", "timestamp", "id"),
+        Index("ix_access_logs_user_id_timestamp", "user_id", "timestamp"),
+        # Never reuse ids of deleted (archived) rows
+        {"sqlite_autoincrement": True},
+    )
+
 class DoorEvent(Base):
     __tablename__ = "door_events"
 
@@ -85,12 +169,38 @@ class DoorEvent(Base):
     source = Column(String(50), nullable=False)
     result = Column(String(20), nullable=False)
     description = Column(String(255), nullable=True)
+    door_id = Column(String(50), nullable=True)  # 事件所屬的門（NULL = 主門）
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_door_events_created_at_id", "created_at", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+class AccessDailyStat(Base):
+    """Per-day access rollup (local Asia/Taipei day), maintained as access logs are written."""
+    __tablename__ = "access_daily_stats"
+
+    day = Column(String(10), primary_key=True)  # YYYY-MM-DD
+    access_count = Column(Integer, nullable=False, default=0)
+    unique_users = Column(Integer, nullable=False, default=0)
+
+class UserDailyPresence(Base):
+    """One row per user per local day with at least one access log."""
+    __tablename__ = "user_daily_presence"
+
+    day = Column(String(10), primary_key=True)
+    user_id = Column(String(36), primary_key=True)
+    access_count = Column(Integer, nullable=False, default=0)
+    first_seen_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    last_seen_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
 class DoorControlSettings(Base):
     __tablename__ = "door_control_settings"
 
     id = Column(Integer, primary_key=True, default=1)
+    # One row per door; the primary door keeps id=1
+    door_id = Column(String(50), nullable=True)
     access_mode = Column(String(20), nullable=False, default="normal")
     pending_access_mode = Column(String(20), nullable=True)
     weekday_mode_overrides = Column(String, nullable=True, default=DEFAULT_WEEKDAY_MODE_OVERRIDES_JSON)
@@ -101,6 +211,10 @@ class DoorControlSettings(Base):
     schedule_hold_started_at = Column(TIMESTAMP(timezone=True), nullable=True)
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ux_door_control_settings_door_id", "door_id", unique=True),
+    )
+
 class RegistrationSession(Base):
     __tablename__ = "registration_sessions"
 
@@ -135,6 +249,14 @@ def get_db():
 def init_db():
     Base.metadata.create_all(bind=engine)
     _ensure_runtime_columns()
+    _ensure_indexes()
+
+
+def _ensure_indexes():
+    """Create indexes declared on the models that predate an existing database file."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
 def _ensure_runtime_columns():
@@ -142,6 +264,21 @@ def _ensure_runtime_columns():
     inspector = inspect(engine)
     table_names = set(inspector.get_table_names())
 
+    if "cards" in table_names:
+        column_names = {column["name"] for column in inspector.get_columns("cards")}
+        if "uid_int" not in column_names:
+            # Filled in chunks after startup by db_maintenance.backfill_card_uid_ints
+            with engine.begin() as connection:
+                connection.execute(text("ALTER TABLE cards ADD COLUMN uid_int BIGINT"))
+
+    for table_name in ("access_logs", "door_events"):
+        if table_name in table_names:
+            column_names = {column["name"] for column in inspector.get_columns(table_name)}
+            if "door_id" not in column_names:
+                # Existing rows stay NULL, which reads as the primary door
+                with engine.begin() as connection:
+                    connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN door_id VARCHAR(50)"))
+
     if "registration_sessions" in table_names:
         column_names = {column["name"] for column in inspector.get_columns("registration_sessions")}
         if "last_status" not in column_names:
@@ -170,3 +307,12 @@ def _ensure_runtime_columns():
                 connection.execute(
                     text("ALTER TABLE door_control_settings ADD COLUMN pending_weekday_mode_overrides TEXT")
                 )
+            column_names.add("pending_weekday_mode_overrides")
+        if "door_id" not in column_names:
+            # The single settings row that predates multi-door support is the primary door's
+            with engine.begin() as connection:
+                connection.execute(text("ALTER TABLE door_control_settings ADD COLUMN door_id VARCHAR(50)"))
+                connection.execute(
+                    text("UPDATE door_control_settings SET door_id = :door_id WHERE id = 1"),
+                    {"door_id": PRIMARY_DOOR_ID},
+                )
@@ -9,6 +9,7 @@ from fastapi import FastAPI, Depends, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -17,35 +18,56 @@ from slowapi.errors import RateLimitExceeded
 from app.routers import api, web, admin
 from app.routers.dependencies import get_current_admin
 
+from app.config import (
+    ARCHIVE_INTERVAL_SECONDS,
+    ARCHIVE_RETENTION_DAYS,
+    OFFLINE_SNAPSHOT_INTERVAL_SECONDS,
+    SQLITE_WAL_CHECKPOINT_INTERVAL,
+)
 from app.database import init_db, get_db, SessionLocal, User, Card, AccessLog, DoorEvent
 from app.versioning import get_app_version, get_build_info
 
-from app.services.rfid_reader import rfid_reader
-from app.services.gpio_control import open_lock, deny_access
+from app.services.card_index import CardAuthorization, card_index, card_uid_clause
+from app.services.card_uid import canonicalize_card_uid, card_uid_key
+from app.services.db_maintenance import archive_loop, run_card_uid_backfill, wal_checkpoint_loop
+from app.services.door_registry import Door, door_registry
+from app.services.door_scheduler import door_scheduler
+from app.services.door_status import attach_door_status_publishers, remote_unlock_counter
+from app.services.event_writer import event_writer
+from app.services.offline_snapshot import offline_authorizer
+from app.services.password_pool import password_pool
+from app.services.scan_debouncer import scan_debouncer
+from app.services.stats_rollup import ensure_access_rollups
+from app.services.gpio_control import deny_access, extend_unlock, open_lock
 from app.services.door_mode import (
     ACCESS_DECISION_ACTIVATE_HOLD,
     ACCESS_DECISION_DENY,
     ACCESS_DECISION_HELD_OPEN,
+    ACCESS_DECISION_TIMED_UNLOCK,
     MODE_ALWAYS_LOCKED,
     MODE_FIRST_SCAN_HOLD,
     SCHEDULE_PHASE_OUTSIDE_SCHEDULE,
     SCHEDULE_PHASE_HELD_OPEN,
     activate_schedule_hold,
+    evaluate_schedule,
     get_access_mode_label,
+    get_cached_door_settings_snapshot,
     get_card_access_decision,
     get_weekday_label,
     is_schedule_access_mode,
     sync_door_hardware_state,
 )
 from app.services.registration import (
+    count_user_cards,
     get_active_registration_sessions,
     REGISTRATION_STATUS_CARD_MISMATCH_RESET,
     REGISTRATION_STATUS_COMPLETED,
     REGISTRATION_STATUS_WAITING_FOR_FIRST_SCAN,
     REGISTRATION_STATUS_WAITING_FOR_SECOND_SCAN,
+    publish_registration_status,
     start_registration_session,
 )
-from app.services.telegram import send_telegram
+from app.services.telegram import COALESCE_ENTRY, telegram_dispatcher
 
 # Logging setup
 logging.basicConfig(
@@ -56,119 +78,217 @@ logging.basicConfig(
 log = logging.getLogger(__name__)
 
 
-async def door_mode_heartbeat():
-    """Continuously enforce persisted door-control settings such as daily auto-lock."""
-    while True:
+async def enforce_door_mode():
+    """Enforce every door's persisted settings such as daily auto-lock; run by the door scheduler."""
+    for door in door_registry:
         try:
-            with SessionLocal() as db:
-                settings, evaluation, sync_result = sync_door_hardware_state(db)
-                hardware_action = sync_result.get("hardware_action")
-                applied_pending_mode = sync_result.get("applied_pending_mode")
-                cleared_schedule_hold = bool(sync_result.get("cleared_schedule_hold"))
-                previous_access_mode = sync_result.get("previous_access_mode")
-
-                if applied_pending_mode:
-                    source_label = (
-                        f"{get_weekday_label(evaluation.weekday_key)}規則"
-                        if evaluation.active_mode_source == "weekday_override"
-                        else "預設模式"
-                    )
-                    db.add(DoorEvent(
-                        admin_id=None,
-                        admin_name="系統自動化",
-                        action="door_settings_applied",
-                        source="door_scheduler",
-                        result="accepted",
-                        description=(
-                            f"已到每日上鎖時間，今日門禁已切換為 "
-                            f"{source_label} 的 {get_access_mode_label(applied_pending_mode)}。"
-                        ),
-                    ))
-                    db.commit()
-                elif cleared_schedule_hold and is_schedule_access_mode(previous_access_mode):
-                    db.add(DoorEvent(
-                        admin_id=None,
-                        admin_name="系統自動化",
-                        action="schedule_auto_lock",
-                        source="door_scheduler",
-                        result="accepted",
-                        description=f"已到每日上鎖時間，門禁恢復上鎖（{settings.daily_lock_time}）。",
-                    ))
-                    db.commit()
-
-                if hardware_action == "force_lock" and not applied_pending_mode:
-                    if evaluation.effective_access_mode == MODE_ALWAYS_LOCKED:
-                        db.add(DoorEvent(
-                            admin_id=None,
-                            admin_name="系統自動化",
-                            action="always_locked_enforced",
-                            source="door_scheduler",
-                            result="accepted",
-                            description="門禁維持在永久上鎖模式。",
-                        ))
-                        db.commit()
-        except asyncio.CancelledError:
-            raise
+            await enforce_door_settings(door)
         except Exception as exc:
-            log.error(f"❌ Door mode heartbeat failed: {exc}", exc_info=True)
+            # One door's failure must not keep the others from locking on time.
+            log.error(f"❌ Door mode enforcement failed for {door.door_id}: {exc}", exc_info=True)
+
+
+async def enforce_door_settings(door: Door):
+    """Apply one door's mode and schedule to its relay and record what changed."""
+    with SessionLocal() as db:
+        settings, evaluation, sync_result = sync_door_hardware_state(
+            db,
+            door_id=door.door_id,
+            actuator=door.actuator,
+        )
+    hardware_action = sync_result.get("hardware_action")
+    applied_pending_mode = sync_result.get("applied_pending_mode")
+    cleared_schedule_hold = bool(sync_result.get("cleared_schedule_hold"))
+    previous_access_mode = sync_result.get("previous_access_mode")
+
+    if applied_pending_mode:
+        source_label = (
+            f"{get_weekday_label(evaluation.weekday_key)}規則"
+            if evaluation.active_mode_source == "weekday_override"
+            else "預設模式"
+        )
+        await event_writer.submit(
+            DoorEvent,
+            admin_id=None,
+            admin_name="系統自動化",
+            action="door_settings_applied",
+            source="door_scheduler",
+            result="accepted",
+            description=(
+                f"已到每日上鎖時間，{door_registry.label(door)}今日門禁已切換為 "
+                f"{source_label} 的 {get_access_mode_label(applied_pending_mode)}。"
+            ),
+            door_id=door.door_id,
+        )
+    elif cleared_schedule_hold and is_schedule_access_mode(previous_access_mode):
+        await event_writer.submit(
+            DoorEvent,
+            admin_id=None,
+            admin_name="系統自動化",
+            action="schedule_auto_lock",
+            source="door_scheduler",
+            result="accepted",
+            description=f"已到每日上鎖時間，{door_registry.label(door)}門禁恢復上鎖（{settings.daily_lock_time}）。",
+            door_id=door.door_id,
+        )
 
-        await asyncio.sleep(15)
+    if hardware_action == "force_lock" and not applied_pending_mode:
+        if evaluation.effective_access_mode == MODE_ALWAYS_LOCKED:
+            await event_writer.submit(
+                DoorEvent,
+                admin_id=None,
+                admin_name="系統自動化",
+                action="always_locked_enforced",
+                source="door_scheduler",
+                result="accepted",
+                description=f"{door_registry.label(door)}門禁維持在永久上鎖模式。",
+                door_id=door.door_id,
+            )
+
+async def record_access_log(
+    user_id: str,
+    card_id: str,
+    card_uid: str,
+    action: str = "entry",
+    door_id: Optional[str] = None,
+):
+    """Queue an access log entry on the write-behind writer."""
+    try:
+        await event_writer.submit(
+            AccessLog,
+            user_id=user_id,
+            card_id=card_id,
+            rfid_uid=card_uid,
+            action=action,
+            door_id=door_id,
+        )
+    except Exception as exc:
+        log.error(f"Failed to log access: {exc}")
 
-async def handle_rfid_scan(card_uid: str):
-    """Handle an RFID scan without allowing active binding flows to hijack normal access."""
+async def handle_rfid_scan(card_uid: str, door: Optional[Door] = None):
+    """Handle an RFID scan at `door` (the primary door by default) without letting binding flows hijack access."""
+    door = door or door_registry.primary
     try:
-        log.info(f"📇 Card scanned: {card_uid}")
+        log.info(f"📇 Card scanned at {door.door_id}: {card_uid}")
+
+        # The database never came up: the memory-mapped snapshot stands in for the index.
+        offline = not card_index.loaded
+        authorization = offline_authorizer.lookup(card_uid) if offline else card_index.get(card_uid)
+        if authorization:
+            if not scan_debouncer.should_process(card_uid, door.door_id):
+                handle_repeat_scan(card_uid, authorization, door)
+                return
+
+            if offline:
+                handle_offline_scan(card_uid, authorization, door)
+                return
+            try:
+                with SessionLocal() as db:
+                    await handle_normal_mode(card_uid, db, authorization, door)
+            except SQLAlchemyError as exc:
+                log.error(f"❌ Database unavailable, deciding offline: {exc}")
+                handle_offline_scan(card_uid, authorization, door)
+            return
+
+        if offline:
+            handle_offline_scan(card_uid, None, door)
+            return
 
         db = next(get_db())
         try:
             active_sessions = get_active_registration_sessions(db)
-            existing_card = db.query(Card).filter(Card.rfid_uid == card_uid).first()
 
             if len(active_sessions) > 1:
                 session_ids = ", ".join(session.user_id for session in active_sessions)
                 log.error(f"❌ Multiple active registration sessions detected: {session_ids}")
-                deny_access()
-            elif existing_card:
-                await handle_normal_mode(card_uid, db, existing_card)
+                deny_access(door.actuator)
             elif active_sessions:
-                await handle_register_mode(card_uid, db, active_sessions[0])
+                await handle_register_mode(card_uid, db, active_sessions[0], door)
             else:
                 log.warning(f"⚠️ Unknown card: {card_uid}")
-                deny_access()
+                deny_access(door.actuator)
+        except SQLAlchemyError as exc:
+            log.error(f"❌ Database unavailable, deciding offline: {exc}")
+            handle_offline_scan(card_uid, None, door)
         finally:
             db.close()
 
     except Exception as e:
         log.error(f"❌ Error handling RFID scan: {e}", exc_info=True)
 
-async def handle_normal_mode(card_uid: str, db: Session, card: Optional[Card] = None):
+def get_repeat_scan_decision(authorization: CardAuthorization, door: Door) -> Optional[str]:
+    """Decide a repeat scan from the cached door settings; None when they are not cached yet."""
+    if not authorization.is_authorized:
+        return ACCESS_DECISION_DENY
+    snapshot = get_cached_door_settings_snapshot(door.door_id)
+    if snapshot is None:
+        return None
+    evaluation = evaluate_schedule(snapshot)
+    return get_card_access_decision(evaluation.effective_access_mode, evaluation.phase)
+
+def handle_repeat_scan(card_uid: str, authorization: CardAuthorization, door: Door):
+    """Same card again within the debounce window: extend a timed unlock, never start a new cycle."""
+    decision = get_repeat_scan_decision(authorization, door)
+    if decision == ACCESS_DECISION_DENY:
+        log.warning(f"⚠️ Repeat scan denied: {authorization.name} ({authorization.student_id})")
+        deny_access(door.actuator)
+    elif decision == ACCESS_DECISION_TIMED_UNLOCK and extend_unlock(actuator=door.actuator):
+        log.info(f"🔁 Repeat scan extended unlock: {card_uid}")
+    else:
+        log.info(f"🔁 Repeat scan suppressed: {card_uid}")
+
+def handle_offline_scan(card_uid: str, authorization: Optional[CardAuthorization], door: Optional[Door] = None):
+    """Decide a scan from the offline snapshot; the decision is journaled and replayed once SQLite is back."""
+    door = door or door_registry.primary
+    decision = offline_authorizer.decide(card_uid, authorization, door_id=door.door_id)
+    if decision.entered_degraded:
+        log.warning("⚠️ Entering offline authorization mode")
+        telegram_dispatcher.notify("⚠️ 資料庫無法使用，門禁改以離線快照判斷刷卡，恢復後會補寫存取紀錄")
+
+    if decision.access_decision == ACCESS_DECISION_DENY:
+        log.warning(f"⚠️ Offline access denied ({decision.reason}): {card_uid}")
+        deny_access(door.actuator)
+    elif decision.access_decision == ACCESS_DECISION_HELD_OPEN:
+        log.info(f"✅ Offline access granted, door already held open: {decision.authorization.name}")
+    else:
+        log.info(f"✅ Offline access granted: {decision.authorization.name} ({decision.authorization.student_id})")
+        open_lock(door.actuator)
+
+async def handle_normal_mode(
+    card_uid: str,
+    db: Session,
+    authorization: Optional[CardAuthorization] = None,
+    door: Optional[Door] = None,
+):
     """Handle card scan in normal access control mode (支援一人多卡)."""
-    card = card or db.query(Card).filter(Card.rfid_uid == card_uid).first()
-    if not card or not card.user:
+    door = door or door_registry.primary
+    authorization = authorization or card_index.get(card_uid)
+    if not authorization:
         log.warning(f"⚠️ Unknown card: {card_uid}")
-        deny_access()
+        deny_access(door.actuator)
         return
 
-    user = card.user
-
-    if not user.is_active:
-        log.warning(f"⚠️ Access denied (user disabled): {user.name} ({user.student_id})")
-        deny_access()
+    if not authorization.user_active:
+        log.warning(f"⚠️ Access denied (user disabled): {authorization.name} ({authorization.student_id})")
+        deny_access(door.actuator)
         return
 
-    if not card.is_active:
-        log.warning(f"⚠️ Access denied (card disabled): {user.name} ({user.student_id}) - Card {card.rfid_uid}")
-        deny_access()
+    if not authorization.card_active:
+        log.warning(
+            f"⚠️ Access denied (card disabled): {authorization.name} ({authorization.student_id}) "
+            f"- Card {authorization.rfid_uid}"
+        )
+        deny_access(door.actuator)
         return
 
-    user_id = user.id
-    user_name = user.name
-    student_id = user.student_id
-    card_id = card.id
-    card_info = f" ({card.nickname})" if card.nickname else ""
+    user_id = authorization.user_id
+    user_name = authorization.name
+    student_id = authorization.student_id
+    card_id = authorization.card_id
+    card_info = f" ({authorization.nickname})" if authorization.nickname else ""
     log.info(f"✅ Access granted: {user_name} ({student_id}){card_info}")
 
-    settings, schedule_evaluation, _ = sync_door_hardware_state(db)
+    settings, schedule_evaluation, _ = sync_door_hardware_state(db, door_id=door.door_id, actuator=door.actuator)
     effective_access_mode = schedule_evaluation.effective_access_mode
     access_note = ""
 
@@ -181,48 +301,39 @@ async def handle_normal_mode(card_uid: str, db: Session, card: Optional[Card] =
             log.warning(f"⚠️ Access denied outside schedule window: {user_name} ({student_id})")
         else:
             log.warning(f"⚠️ Access denied by access mode policy: {user_name} ({student_id})")
-        deny_access()
+        deny_access(door.actuator)
         return
 
     if access_decision == ACCESS_DECISION_ACTIVATE_HOLD:
-        activate_schedule_hold(db, settings)
+        activate_schedule_hold(db, door_id=door.door_id, actuator=door.actuator)
         access_note = f"，已切換為今日常開，預計 {settings.daily_lock_time} 自動上鎖"
-        db.add(DoorEvent(
+        await event_writer.submit(
+            DoorEvent,
             admin_id=None,
             admin_name=user_name,
             action="schedule_hold_open",
             source="rfid_access",
             result="accepted",
-            description=f"{user_name} 首次刷卡後，門禁維持解鎖直到 {settings.daily_lock_time}。",
-        ))
-        db.commit()
+            description=f"{user_name} 首次刷卡後，{door_registry.label(door)}門禁維持解鎖直到 {settings.daily_lock_time}。",
+            door_id=door.door_id,
+        )
     elif access_decision == ACCESS_DECISION_HELD_OPEN:
         access_note = f"，目前維持常開至 {settings.daily_lock_time}"
     else:
-        asyncio.create_task(asyncio.to_thread(open_lock))
+        open_lock(door.actuator)
 
     async def background_tasks():
-        with SessionLocal() as background_db:
-            try:
-                background_db.add(AccessLog(
-                    user_id=user_id,
-                    card_id=card_id,
-                    rfid_uid=card_uid,
-                    action="entry"
-                ))
-                background_db.commit()
-            except Exception as exc:
-                background_db.rollback()
-                log.error(f"Failed to log access: {exc}")
-
-        message = f"歡迎！{user_name} ({student_id}) 通過門禁{card_info}{access_note}"
-        await asyncio.to_thread(send_telegram, message)
+        await record_access_log(user_id, card_id, card_uid, door_id=door.door_id)
+
+        message = f"歡迎！{user_name} ({student_id}) 通過{door_registry.label(door)}門禁{card_info}{access_note}"
+        telegram_dispatcher.notify(message, coalesce_key=COALESCE_ENTRY)
 
     asyncio.create_task(background_tasks())
 
 
-async def handle_register_mode(card_uid: str, db: Session, session):
-    """Handle a registration scan for an active binding session."""
+async def handle_register_mode(card_uid: str, db: Session, session, door: Optional[Door] = None):
+    """Handle a registration scan for an active binding session (at whichever door it is scanned)."""
+    door = door or door_registry.primary
     log.info(f"📝 [Registration] Card scanned: {card_uid}")
     if not session:
         log.error("❌ No active registration session found")
@@ -236,10 +347,15 @@ async def handle_register_mode(card_uid: str, db: Session, session):
         db.commit()
         return
 
-    existing_card = db.query(Card).filter(Card.rfid_uid == card_uid).first()
+    existing_card = db.query(Card).filter(card_uid_clause(card_uid)).first()
     if existing_card:
+        # The index missed a card that exists in the database; resync it before deciding.
         log.warning(f"⚠️ Known card scanned during binding: {existing_card.rfid_uid}")
-        await handle_normal_mode(card_uid, db, existing_card)
+        authorization = (
+            card_index.upsert_card(existing_card, existing_card.user)
+            if existing_card.user else None
+        )
+        await handle_normal_mode(card_uid, db, authorization, door)
         return
 
     if session.step == 0:
@@ -247,15 +363,17 @@ async def handle_register_mode(card_uid: str, db: Session, session):
         session.step = 1
         session.last_status = REGISTRATION_STATUS_WAITING_FOR_SECOND_SCAN
         db.commit()
+        publish_registration_status(session, count_user_cards(db, user.id))
         log.info("📝 First scan OK, please scan again to confirm")
         return
 
-    if session.step == 1 and session.first_uid == card_uid:
+    if session.step == 1 and session.first_uid and card_uid_key(session.first_uid) == card_uid_key(card_uid):
         from app.database import generate_uuid
 
         new_card = Card(
             id=generate_uuid(),
             rfid_uid=card_uid,
+            uid_int=canonicalize_card_uid(card_uid),
             user_id=user.id,
             nickname=session.nickname,
         )
@@ -263,21 +381,20 @@ async def handle_register_mode(card_uid: str, db: Session, session):
         session.completed = True
         session.last_status = REGISTRATION_STATUS_COMPLETED
         db.commit()
+        card_index.upsert_card(new_card, user)
 
-        card_count = db.query(Card).filter(Card.user_id == user.id).count()
+        card_count = count_user_cards(db, user.id)
+        publish_registration_status(session, card_count)
         log.info(f"🎉 Card bound: {user.student_id} -> {card_uid} (總共 {card_count} 張卡片)")
 
-        settings, schedule_evaluation, _ = sync_door_hardware_state(db)
+        settings, schedule_evaluation, _ = sync_door_hardware_state(db, door_id=door.door_id, actuator=door.actuator)
         access_decision = get_card_access_decision(
             schedule_evaluation.effective_access_mode,
             schedule_evaluation.phase,
         )
         if access_decision not in {ACCESS_DECISION_DENY, ACCESS_DECISION_HELD_OPEN}:
-            asyncio.create_task(asyncio.to_thread(open_lock))
-        asyncio.create_task(asyncio.to_thread(
-            send_telegram,
-            f"綁定成功：{user.name} ({user.student_id})\n現在有 {card_count} 張卡片"
-        ))
+            open_lock(door.actuator)
+        telegram_dispatcher.notify(f"綁定成功：{user.name} ({user.student_id})\n現在有 {card_count} 張卡片")
         return
 
     log.warning("❌ Unknown card mismatch during confirmation, resetting session")
@@ -285,6 +402,7 @@ async def handle_register_mode(card_uid: str, db: Session, session):
     session.step = 0
     session.last_status = REGISTRATION_STATUS_CARD_MISMATCH_RESET
     db.commit()
+    publish_registration_status(session, count_user_cards(db, user.id))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -292,16 +410,46 @@ async def lifespan(app: FastAPI):
     # Startup
     log.info("🚀 Makers' Open Lab for Innovation Door System starting up...")
 
+    # Map the last offline snapshot first, so cards can still be decided if the database is unusable.
+    offline_authorizer.open()
+
     # Initialize database
-    init_db()
-    log.info("✅ Database initialized")
+    try:
+        init_db()
+        ensure_access_rollups()
+        log.info("✅ Database initialized")
+
+        with SessionLocal() as db:
+            card_index.load(db)
+            remote_unlock_counter.load(db)
+    except SQLAlchemyError as exc:
+        log.error(f"❌ Database unavailable at startup, deciding scans from the offline snapshot: {exc}")
+    else:
+        try:
+            # Replay decisions journaled during an earlier outage and rewrite the snapshot.
+            await asyncio.to_thread(offline_authorizer.recover)
+        except Exception as exc:
+            log.error(f"❌ Offline snapshot maintenance failed: {exc}")
+    attach_door_status_publishers()
+
+    await event_writer.start()
+    await telegram_dispatcher.start()
+
+    door_mode_task = asyncio.create_task(door_scheduler.run(enforce_door_mode))
+    log.info("✅ Door mode scheduler started")
 
-    door_mode_task = asyncio.create_task(door_mode_heartbeat())
-    log.info("✅ Door mode heartbeat started")
+    # Canonical integer UIDs for cards stored before the uid_int column existed
+    service_tasks = [door_mode_task, asyncio.create_task(run_card_uid_backfill())]
+    if SQLITE_WAL_CHECKPOINT_INTERVAL > 0:
+        service_tasks.append(asyncio.create_task(wal_checkpoint_loop()))
+    if ARCHIVE_INTERVAL_SECONDS > 0 and ARCHIVE_RETENTION_DAYS > 0:
+        service_tasks.append(asyncio.create_task(archive_loop()))
+    if OFFLINE_SNAPSHOT_INTERVAL_SECONDS > 0:
+        service_tasks.append(asyncio.create_task(offline_authorizer.run(OFFLINE_SNAPSHOT_INTERVAL_SECONDS)))
 
-    # Start RFID reader in background
-    asyncio.create_task(rfid_reader.read_loop(handle_rfid_scan))
-    log.info("✅ RFID reader started")
+    # Start every door's RFID readers in background; each scan is routed to the door it came from
+    asyncio.create_task(door_registry.run(handle_rfid_scan))
+    log.info("✅ RFID readers started")
 
     log.info("✅ System ready!")
 
@@ -309,11 +457,18 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     log.info("Shutting down...")
-    door_mode_task.cancel()
-    try:
-        await door_mode_task
-    except asyncio.CancelledError:
-        pass
+    for task in service_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    await event_writer.stop()
+    await telegram_dispatcher.stop()
+    password_pool.close()
+    offline_authorizer.close()
+    door_registry.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -1,35 +1,111 @@
-import asyncio
-
-from fastapi import APIRouter, Depends, HTTPException, Cookie, BackgroundTasks, Form
+from fastapi import APIRouter, Depends, HTTPException, Cookie, File, Form, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_
 from typing import Optional, List
+import asyncio
+from itertools import islice
 import logging
-from datetime import timedelta
+from datetime import date, timedelta
 
 from app.database import get_db, User, Card, Admin, AccessLog, DoorEvent, generate_uuid
 from app.routers.dependencies import get_current_admin
-from app.services.card_uid import CardUIDNormalizationError, normalize_card_uid_input
+from app.services.access_log_query import (
+    ACCESS_LOG_KEYS,
+    AccessLogFilters,
+    build_access_log_query,
+    parse_log_time,
+    serialize_access_log_row,
+    serialize_archived_access_logs,
+)
+from app.services.admin_cache import admin_identity_cache
+from app.services.archive import ArchiveBusyError, archive_store, run_archive
+from app.services.bulk_import import (
+    BulkImportError,
+    detect_import_format,
+    parse_import_payload,
+    run_bulk_import,
+)
+from app.services.bulk_mutations import (
+    BulkMutationResult,
+    delete_cards,
+    delete_users,
+    reassign_cards,
+    set_cards_active,
+    set_users_active,
+)
+from app.services.card_index import card_index, card_uid_clause
+from app.services.card_uid import (
+    CardUIDNormalizationError,
+    canonicalize_card_uid,
+    normalize_card_uid_input,
+)
 from app.services.door_mode import (
     MODE_NORMAL,
     can_defer_mode_switch,
     get_access_mode_label,
+    get_or_create_door_settings,
     get_weekday_label,
     normalize_access_mode,
     normalize_weekday_mode_overrides,
+    refresh_door_settings_cache,
     resolve_effective_access_mode,
     serialize_door_settings,
     serialize_weekday_mode_overrides,
     sync_door_hardware_state,
     validate_schedule_config,
 )
+from app.services.door_registry import Door, door_registry
+from app.services.door_scheduler import door_scheduler
+from app.services.door_status import (
+    DOOR_STATUS_EVENT,
+    door_status_topic,
+    publish_door_status,
+    remote_unlock_counter,
+)
+from app.services.event_stream import (
+    SSE_HEADERS,
+    SSE_KEEPALIVE,
+    door_status_events,
+    format_sse,
+    registration_events,
+)
+from app.services.exporter import (
+    ACCESS_LOG_EXPORT_COLUMNS,
+    DOOR_EVENT_EXPORT_COLUMNS,
+    EXPORT_MEDIA_TYPES,
+    DoorEventFilters,
+    build_export_filename,
+    iter_access_log_rows,
+    iter_door_event_rows,
+    serialize_archived_door_event,
+    serialize_door_event_row,
+    stream_export,
+)
+from app.services.event_writer import event_writer
+from app.services.offline_snapshot import offline_authorizer
+from app.services.pagination import (
+    InvalidCursorError,
+    build_page,
+    clamp_page_size,
+    decode_cursor,
+    encode_cursor,
+    paginate_keyset,
+    raw_sort_key,
+)
 from app.services.registration import start_registration_session
-from app.services.telegram import send_telegram
+from app.services.stats_rollup import (
+    GRANULARITIES,
+    count_active_users,
+    get_access_timeseries,
+    sum_access_count,
+)
+from app.services.telegram import telegram_dispatcher
 from app.services.gpio_control import open_lock, get_lock_runtime_status
-from app.services.auth import hash_password
-from app.services.rfid_reader import rfid_reader
-from app.config import DEV_MODE, LOCK_DURATION
-from app.timezone import app_time_to_utc_naive, now_app_timezone, serialize_datetime
+from app.services.password_pool import PasswordPoolBusyError, password_pool
+from app.services.scan_debouncer import scan_debouncer
+from app.config import ARCHIVE_RETENTION_DAYS, DEV_MODE, EVENT_STREAM_KEEPALIVE_SECONDS
+from app.timezone import now_app_timezone, serialize_datetime
 
 log = logging.getLogger(__name__)
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -38,33 +114,44 @@ APPLY_TIMING_IMMEDIATE = "immediate"
 APPLY_TIMING_NEXT_CYCLE = "next_cycle"
 
 
-def _build_door_status_payload(db: Session) -> dict:
-    settings, evaluation, _ = sync_door_hardware_state(db)
+def _resolve_door(door_id: Optional[str]) -> Door:
+    door = door_registry.get(door_id)
+    if door is None:
+        raise HTTPException(404, "找不到指定的門")
+    return door
 
-    last_remote_unlock = db.query(DoorEvent).filter(
-        DoorEvent.action == "remote_unlock"
-    ).order_by(DoorEvent.created_at.desc()).first()
 
-    remote_unlock_count = db.query(func.count(DoorEvent.id)).filter(
-        DoorEvent.action == "remote_unlock"
-    ).scalar()
+def _build_door_status_payload(db: Session, door: Optional[Door] = None) -> dict:
+    door = door or door_registry.primary
+    settings, evaluation, _ = sync_door_hardware_state(db, door_id=door.door_id, actuator=door.actuator)
 
-    status = get_lock_runtime_status()
+    status = get_lock_runtime_status(door.actuator)
     status.update(serialize_door_settings(settings, evaluation))
     status.update({
+        "door_id": door.door_id,
+        "door_name": door.name,
         "dev_mode": DEV_MODE,
-        "rfid_reader_mode": "dev" if rfid_reader.dev_mode else "hardware",
-        "rfid_device_connected": True if rfid_reader.dev_mode else rfid_reader.device is not None,
-        "rfid_device_path": None if rfid_reader.dev_mode else rfid_reader.device_path,
-        "can_simulate_scan": DEV_MODE and rfid_reader.dev_mode,
-        "last_remote_unlock_at": serialize_datetime(last_remote_unlock.created_at) if last_remote_unlock else None,
-        "last_remote_unlock_by": last_remote_unlock.admin_name if last_remote_unlock else None,
-        "remote_unlock_count": remote_unlock_count or 0,
+        **door.reader_status(),
+        "event_writer": event_writer.stats(),
+        "telegram": telegram_dispatcher.stats(),
+        "scan_debouncer": scan_debouncer.stats(),
+        "admin_cache": admin_identity_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "registration_stream": registration_events.stats(),
+        "door_status_stream": door_status_events.stats(),
+        "offline_snapshot": offline_authorizer.stats(),
+        "next_scheduled_transition_at": serialize_datetime(door_scheduler.next_run_at),
     })
+    # 遠程開門次數與最近操作者由記憶體計數器提供，不再每次查詢 door_events
+    status.update(remote_unlock_counter.snapshot(db, door.door_id))
 
     return status
 
 
+def _publish_remote_unlock_counters(door: Door) -> None:
+    publish_door_status(remote_unlock_counter.snapshot(door_id=door.door_id), door.door_id)
+
+
 def _get_mode_source_label(active_mode_source: str, weekday_key: str) -> str:
     if active_mode_source == "weekday_override":
         return f"{get_weekday_label(weekday_key)}規則"
@@ -106,30 +193,106 @@ def _describe_scheduled_mode_change(
         f"切換為 {_get_mode_source_label(next_active_mode_source, weekday_key)} 的 {get_access_mode_label(next_access_mode)}。"
     )
 
+USER_SORT_KEYS = {
+    "created_at": raw_sort_key(User.created_at),
+    "name": User.name,
+    "student_id": User.student_id,
+}
+SORT_ORDERS = {"asc", "desc"}
+
+
+def _paginate(query, keys, page_size: Optional[int], cursor: Optional[str], descending: bool):
+    try:
+        return paginate_keyset(
+            query,
+            keys,
+            page_size=clamp_page_size(page_size),
+            cursor=cursor,
+            descending=descending,
+        )
+    except InvalidCursorError:
+        raise HTTPException(400, "分頁游標無效，請重新載入列表")
+
+
+def _resolve_sort(sort_keys: dict, sort: str, order: str):
+    if sort not in sort_keys:
+        raise HTTPException(400, f"不支援的排序欄位：{sort}")
+    if order not in SORT_ORDERS:
+        raise HTTPException(400, f"不支援的排序方向：{order}")
+    return sort_keys[sort], order == "desc"
+
+
+def _user_filters(q: Optional[str], is_active: Optional[bool]) -> list:
+    filters = []
+    if is_active is not None:
+        filters.append(User.is_active == is_active)
+    if q and q.strip():
+        keyword = q.strip()
+        filters.append(or_(
+            User.student_id.contains(keyword, autoescape=True),
+            User.name.contains(keyword, autoescape=True),
+            User.email.contains(keyword, autoescape=True),
+        ))
+    return filters
+
+
+def _serialize_user_row(row) -> dict:
+    return {
+        "id": row.id,
+        "student_id": row.student_id,
+        "name": row.name,
+        "email": row.email,
+        "telegram_id": row.telegram_id,
+        "is_active": row.is_active,
+        "card_count": row.card_count,
+        "created_at": serialize_datetime(row.created_at)
+    }
+
+
 @router.get("/users")
 async def list_users(
+    q: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    sort: str = "created_at",
+    order: str = "asc",
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
-    """列出所有用戶及其卡片數"""
+    """列出用戶及其卡片數（不帶 page_size / cursor 時回傳完整列表）"""
     current_admin = get_current_admin(admin_token)
+    sort_key, descending = _resolve_sort(USER_SORT_KEYS, sort, order)
 
-    users = db.query(User).all()
-    result = []
-    for u in users:
-        card_count = db.query(Card).filter(Card.user_id == u.id).count()
-        result.append({
-            "id": u.id,
-            "student_id": u.student_id,
-            "name": u.name,
-            "email": u.email,
-            "telegram_id": u.telegram_id,
-            "is_active": u.is_active,
-            "card_count": card_count,
-            "created_at": serialize_datetime(u.created_at)
-        })
+    # 一次 LEFT JOIN 卡片數，避免每位用戶各查一次
+    card_counts = (
+        db.query(Card.user_id.label("user_id"), func.count(Card.id).label("card_count"))
+        .group_by(Card.user_id)
+        .subquery()
+    )
+    filters = _user_filters(q, is_active)
+    query = (
+        db.query(
+            User.id,
+            User.student_id,
+            User.name,
+            User.email,
+            User.telegram_id,
+            User.is_active,
+            User.created_at,
+            func.coalesce(card_counts.c.card_count, 0).label("card_count"),
+        )
+        .outerjoin(card_counts, card_counts.c.user_id == User.id)
+        .filter(*filters)
+    )
+
+    if page_size is None and cursor is None:
+        ordering = [sort_key.desc(), User.id.desc()] if descending else [sort_key, User.id]
+        return [_serialize_user_row(row) for row in query.order_by(*ordering).all()]
 
-    return result
+    rows, next_cursor = _paginate(query, [sort_key, User.id], page_size, cursor, descending)
+    total = db.query(func.count(User.id)).filter(*filters).scalar()
+    return build_page([_serialize_user_row(row) for row in rows], next_cursor, total)
 
 @router.post("/users")
 async def create_user(
@@ -137,7 +300,6 @@ async def create_user(
     name: str = Form(...),
     email: Optional[str] = Form(None),
     telegram_id: Optional[str] = Form(None),
-    background_tasks: BackgroundTasks = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
@@ -162,9 +324,8 @@ async def create_user(
     log.info(f"👤 Admin {current_admin['name']} created user: {name} ({student_id})")
 
     # 背景發送通知
-    if background_tasks:
-        message = f"👤 新增使用者：{name} ({student_id})\n操作者：{current_admin['name']}"
-        background_tasks.add_task(send_telegram, message)
+    message = f"👤 新增使用者：{name} ({student_id})\n操作者：{current_admin['name']}"
+    telegram_dispatcher.notify(message)
 
     return {"message": "使用者已新增", "user_id": user.id}
 
@@ -191,30 +352,72 @@ async def list_user_cards(
         "created_at": serialize_datetime(c.created_at)
     } for c in cards]
 
+CARD_SORT_KEYS = {
+    "created_at": raw_sort_key(Card.created_at),
+    "rfid_uid": Card.rfid_uid,
+}
+
+
+def _serialize_card_row(row) -> dict:
+    return {
+        "id": row.id,
+        "rfid_uid": row.rfid_uid,
+        "nickname": row.nickname,
+        "user_id": row.user_id,
+        "is_active": row.is_active,
+        "user_name": row.user_name if row.user_name is not None else "未知",
+        "student_id": row.student_id if row.student_id is not None else "N/A",
+        "created_at": serialize_datetime(row.created_at)
+    }
+
+
 @router.get("/cards")
 async def list_all_cards(
+    user_id: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    nickname: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = "asc",
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
-    """列出所有卡片及其擁有者"""
+    """列出卡片及其擁有者（不帶 page_size / cursor 時回傳完整列表）"""
     current_admin = get_current_admin(admin_token)
+    sort_key, descending = _resolve_sort(CARD_SORT_KEYS, sort, order)
+
+    filters = []
+    if user_id:
+        filters.append(Card.user_id == user_id)
+    if is_active is not None:
+        filters.append(Card.is_active == is_active)
+    if nickname and nickname.strip():
+        filters.append(Card.nickname.contains(nickname.strip(), autoescape=True))
+
+    # 只選卡片頁面會顯示的欄位，擁有者以 JOIN 一次帶出
+    query = (
+        db.query(
+            Card.id,
+            Card.rfid_uid,
+            Card.nickname,
+            Card.user_id,
+            Card.is_active,
+            Card.created_at,
+            User.name.label("user_name"),
+            User.student_id.label("student_id"),
+        )
+        .outerjoin(User, User.id == Card.user_id)
+        .filter(*filters)
+    )
 
-    cards = db.query(Card).all()
-    result = []
-    for c in cards:
-        user = db.query(User).filter(User.id == c.user_id).first()
-        result.append({
-            "id": c.id,
-            "rfid_uid": c.rfid_uid,
-            "nickname": c.nickname,
-            "user_id": c.user_id,
-            "is_active": c.is_active,
-            "user_name": user.name if user else "未知",
-            "student_id": user.student_id if user else "N/A",
-            "created_at": serialize_datetime(c.created_at)
-        })
+    if page_size is None and cursor is None:
+        ordering = [sort_key.desc(), Card.id.desc()] if descending else [sort_key, Card.id]
+        return [_serialize_card_row(row) for row in query.order_by(*ordering).all()]
 
-    return result
+    rows, next_cursor = _paginate(query, [sort_key, Card.id], page_size, cursor, descending)
+    total = db.query(func.count(Card.id)).filter(*filters).scalar()
+    return build_page([_serialize_card_row(row) for row in rows], next_cursor, total)
 
 @router.post("/cards")
 async def create_card(
@@ -222,7 +425,6 @@ async def create_card(
     rfid_uid: Optional[str] = Form(None),
     ios_scan_text: Optional[str] = Form(None),
     nickname: Optional[str] = Form(None),
-    background_tasks: BackgroundTasks = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
@@ -240,25 +442,26 @@ async def create_card(
         raise HTTPException(400, str(exc)) from exc
 
     # 檢查 RFID UID 是否已被使用
-    existing = db.query(Card).filter(Card.rfid_uid == normalized_rfid_uid).first()
+    existing = db.query(Card).filter(card_uid_clause(normalized_rfid_uid)).first()
     if existing:
         raise HTTPException(400, "此卡片 UID 已被使用")
 
     card = Card(
         id=generate_uuid(),
         rfid_uid=normalized_rfid_uid,
+        uid_int=canonicalize_card_uid(normalized_rfid_uid),
         user_id=user_id,
         nickname=nickname
     )
     db.add(card)
     db.commit()
+    card_index.upsert_card(card, user)
 
     log.info(f"💳 Admin {current_admin['name']} created card for {user.name}: {normalized_rfid_uid}")
 
     # 背景發送通知
-    if background_tasks:
-        message = f"💳 新增卡片：{user.name} ({user.student_id})\nRFID: {normalized_rfid_uid}\n操作者：{current_admin['name']}"
-        background_tasks.add_task(send_telegram, message)
+    message = f"💳 新增卡片：{user.name} ({user.student_id})\nRFID: {normalized_rfid_uid}\n操作者：{current_admin['name']}"
+    telegram_dispatcher.notify(message)
 
     return {
         "message": "卡片已新增",
@@ -266,6 +469,50 @@ async def create_card(
         "rfid_uid": normalized_rfid_uid,
     }
 
+@router.post("/import")
+async def bulk_import(
+    file: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """批次匯入使用者與卡片（CSV / JSON），單一交易寫入並回傳逐列結果
+
+    欄位：student_id、name、email、telegram_id、rfid_uid（或 ios_scan_text）、nickname。
+    學號已存在時更新有填寫的欄位；同一學生多張卡片可分多列。
+    """
+    current_admin = get_current_admin(admin_token)
+
+    import_format = detect_import_format(file.filename, file.content_type)
+    try:
+        rows = parse_import_payload(await file.read(), import_format)
+    except BulkImportError as exc:
+        raise HTTPException(400, str(exc)) from exc
+
+    result = run_bulk_import(db, rows, dry_run=dry_run)
+    summary = result.summary()
+    if not dry_run:
+        db.commit()
+        if result.users_updated or result.cards_created:
+            # One rebuild for the whole batch instead of an upsert per card
+            card_index.load(db)
+
+        log.info(
+            f"📥 Admin {current_admin['name']} imported {summary['rows']} rows: "
+            f"{result.users_created} users created, {result.users_updated} updated, "
+            f"{result.cards_created} cards, {result.errors} errors"
+        )
+        if result.users_created or result.users_updated or result.cards_created:
+            telegram_dispatcher.notify(
+                f"📥 批次匯入：新增 {result.users_created} 位使用者、更新 {result.users_updated} 位、"
+                f"新增 {result.cards_created} 張卡片（{result.errors} 列錯誤）\n操作者：{current_admin['name']}"
+            )
+
+    return {
+        "summary": summary,
+        "rows": [row.to_dict() for row in result.rows],
+    }
+
 @router.post("/cards/bind")
 async def start_card_binding(
     user_id: str = Form(...),
@@ -307,10 +554,135 @@ async def start_card_binding(
         "initial_card_count": session.initial_card_count,
     }
 
+def _commit_bulk_mutation(db: Session, current_admin: dict, result: BulkMutationResult) -> dict:
+    """寫入單筆摘要事件、提交交易並發送一次通知"""
+    db.add(DoorEvent(
+        admin_id=current_admin["id"],
+        admin_name=current_admin["name"],
+        action=f"bulk_{result.action}_{result.target}",
+        source="admin_ui",
+        result="accepted",
+        description=result.describe(),
+    ))
+    db.commit()
+
+    if result.affected:
+        message = f"🗂️ {result.describe()}\n操作者：{current_admin['name']}"
+        telegram_dispatcher.notify(message)
+
+    log.info(
+        f"🗂️ Admin {current_admin['name']} bulk {result.action} {result.affected}/{result.requested} {result.target}"
+    )
+    return result.to_dict()
+
+# 批量路由需註冊在 /users/{user_id}、/cards/{card_id} 之前，否則 "bulk" 會被當成 ID
+@router.delete("/users/bulk")
+async def bulk_delete_users(
+    user_ids: List[str] = Form(...),
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """批量刪除用戶及其卡片"""
+    current_admin = get_current_admin(admin_token)
+
+    result = delete_users(db, user_ids)
+    response = _commit_bulk_mutation(db, current_admin, result)
+    for user_id in result.affected_ids:
+        card_index.remove_user(user_id)
+    return response
+
+@router.post("/users/bulk/activate")
+async def bulk_activate_users(
+    user_ids: List[str] = Form(...),
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """批量啟用用戶"""
+    current_admin = get_current_admin(admin_token)
+
+    result = set_users_active(db, user_ids, True)
+    response = _commit_bulk_mutation(db, current_admin, result)
+    card_index.set_users_active(result.affected_ids, True)
+    return response
+
+@router.post("/users/bulk/deactivate")
+async def bulk_deactivate_users(
+    user_ids: List[str] = Form(...),
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """批量停用用戶"""
+    current_admin = get_current_admin(admin_token)
+
+    result = set_users_active(db, user_ids, False)
+    response = _commit_bulk_mutation(db, current_admin, result)
+    card_index.set_users_active(result.affected_ids, False)
+    return response
+
+@router.delete("/cards/bulk")
+async def bulk_delete_cards(
+    card_ids: List[str] = Form(...),
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """批量刪除卡片"""
+    current_admin = get_current_admin(admin_token)
+
+    result = delete_cards(db, card_ids)
+    response = _commit_bulk_mutation(db, current_admin, result)
+    card_index.remove_cards(result.removed_uids)
+    return response
+
+@router.post("/cards/bulk/activate")
+async def bulk_activate_cards(
+    card_ids: List[str] = Form(...),
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """批量啟用卡片"""
+    current_admin = get_current_admin(admin_token)
+
+    result = set_cards_active(db, card_ids, True)
+    response = _commit_bulk_mutation(db, current_admin, result)
+    card_index.set_cards_active(result.affected_ids, True)
+    return response
+
+@router.post("/cards/bulk/deactivate")
+async def bulk_deactivate_cards(
+    card_ids: List[str] = Form(...),
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """批量停用卡片"""
+    current_admin = get_current_admin(admin_token)
+
+    result = set_cards_active(db, card_ids, False)
+    response = _commit_bulk_mutation(db, current_admin, result)
+    card_index.set_cards_active(result.affected_ids, False)
+    return response
+
+@router.post("/cards/bulk/reassign")
+async def bulk_reassign_cards(
+    card_ids: List[str] = Form(...),
+    user_id: str = Form(...),
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """批量將卡片轉移給指定用戶"""
+    current_admin = get_current_admin(admin_token)
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(404, "用戶不存在")
+
+    result = reassign_cards(db, card_ids, user_id)
+    response = _commit_bulk_mutation(db, current_admin, result)
+    card_index.reassign_cards(result.affected_ids, user)
+    return response
+
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: str,
-    background_tasks: BackgroundTasks,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
@@ -328,51 +700,19 @@ async def delete_user(
     # 刪除用戶（cascade 會自動刪除卡片）
     db.delete(user)
     db.commit()
+    card_index.remove_user(user_id)
 
     # 背景發送通知
     message = f"🗑️ 刪除用戶：{user_name} ({user_student_id})\n刪除 {card_count} 張卡片\n操作者：{current_admin['name']}"
-    background_tasks.add_task(send_telegram, message)
+    telegram_dispatcher.notify(message)
 
     log.info(f"🗑️ Admin {current_admin['name']} deleted user {user_name} ({user_student_id}) with {card_count} cards")
 
     return {"message": f"已刪除用戶 {user_name} 及其 {card_count} 張卡片"}
 
-@router.delete("/users/bulk")
-async def bulk_delete_users(
-    user_ids: List[str] = Form(...),
-    background_tasks: BackgroundTasks = None,
-    admin_token: Optional[str] = Cookie(None),
-    db: Session = Depends(get_db)
-):
-    """批量刪除用戶"""
-    current_admin = get_current_admin(admin_token)
-
-    deleted_count = 0
-    deleted_card_count = 0
-
-    for user_id in user_ids:
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            card_count = db.query(Card).filter(Card.user_id == user_id).count()
-            db.delete(user)
-            deleted_count += 1
-            deleted_card_count += card_count
-
-    db.commit()
-
-    log.info(f"🗑️ Admin {current_admin['name']} bulk deleted {deleted_count} users with {deleted_card_count} cards")
-
-    # 背景發送通知
-    if background_tasks:
-        message = f"🗑️ 批量刪除：{deleted_count} 位用戶及 {deleted_card_count} 張卡片\n操作者：{current_admin['name']}"
-        background_tasks.add_task(send_telegram, message)
-
-    return {"message": f"已刪除 {deleted_count} 位用戶及 {deleted_card_count} 張卡片"}
-
 @router.delete("/cards/{card_id}")
 async def delete_card(
     card_id: str,
-    background_tasks: BackgroundTasks,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
@@ -390,51 +730,22 @@ async def delete_card(
     # 刪除卡片
     db.delete(card)
     db.commit()
+    card_index.remove_card(card_uid)
 
     # 背景發送通知
     if user:
         message = f"🗑️ 刪除卡片：{user.name} ({user.student_id})\nRFID: {card_uid}\n操作者：{current_admin['name']}"
-        background_tasks.add_task(send_telegram, message)
+        telegram_dispatcher.notify(message)
 
     log.info(f"🗑️ Admin {current_admin['name']} deleted card {card_uid}")
 
     return {"message": "卡片已刪除"}
 
-@router.delete("/cards/bulk")
-async def bulk_delete_cards(
-    card_ids: List[str] = Form(...),
-    background_tasks: BackgroundTasks = None,
-    admin_token: Optional[str] = Cookie(None),
-    db: Session = Depends(get_db)
-):
-    """批量刪除卡片"""
-    current_admin = get_current_admin(admin_token)
-
-    deleted_count = 0
-
-    for card_id in card_ids:
-        card = db.query(Card).filter(Card.id == card_id).first()
-        if card:
-            db.delete(card)
-            deleted_count += 1
-
-    db.commit()
-
-    log.info(f"🗑️ Admin {current_admin['name']} bulk deleted {deleted_count} cards")
-
-    # 背景發送通知
-    if background_tasks:
-        message = f"🗑️ 批量刪除：{deleted_count} 張卡片\n操作者：{current_admin['name']}"
-        background_tasks.add_task(send_telegram, message)
-
-    return {"message": f"已刪除 {deleted_count} 張卡片"}
-
 @router.put("/cards/{card_id}")
 async def update_card(
     card_id: str,
     nickname: Optional[str] = Form(None),
     is_active: str = Form("true"),
-    background_tasks: BackgroundTasks = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
@@ -456,6 +767,10 @@ async def update_card(
         card.nickname = nickname
     card.is_active = is_active_bool
     db.commit()
+    if card.user:
+        card_index.upsert_card(card, card.user)
+    else:
+        card_index.remove_card(card.rfid_uid)
 
     # 記錄狀態變更
     status_msg = ""
@@ -483,12 +798,18 @@ async def list_admins(
         "created_at": serialize_datetime(a.created_at)
     } for a in admins]
 
+async def _hash_password(password: str) -> str:
+    try:
+        return await password_pool.hash(password)
+    except PasswordPoolBusyError:
+        raise HTTPException(503, "系統忙碌中，請稍後再試")
+
+
 @router.post("/admins")
 async def create_admin(
     username: str = Form(...),
     password: str = Form(...),
     name: str = Form(...),
-    background_tasks: BackgroundTasks = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
@@ -503,7 +824,7 @@ async def create_admin(
     new_admin = Admin(
         id=generate_uuid(),
         username=username,
-        password_hash=hash_password(password),
+        password_hash=await _hash_password(password),
         name=name
     )
     db.add(new_admin)
@@ -518,7 +839,6 @@ async def update_admin(
     admin_id: str,
     name: Optional[str] = Form(None),
     password: Optional[str] = Form(None),
-    background_tasks: BackgroundTasks = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
@@ -541,11 +861,12 @@ async def update_admin(
     if password is not None:
         password = password.strip()
     if password:
-        admin.password_hash = hash_password(password)
+        admin.password_hash = await _hash_password(password)
         updated = True
 
     if updated:
         db.commit()
+        admin_identity_cache.invalidate_admin(admin_id)
 
     log.info(f"✏️ Admin {current_admin['name']} updated admin: {old_name} → {admin.name}")
 
@@ -554,7 +875,6 @@ async def update_admin(
 @router.delete("/admins/{admin_id}")
 async def delete_admin(
     admin_id: str,
-    background_tasks: BackgroundTasks,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
@@ -579,6 +899,7 @@ async def delete_admin(
 
     db.delete(admin)
     db.commit()
+    admin_identity_cache.invalidate_admin(admin_id)
 
     log.info(f"🗑️ Admin {current_admin['name']} deleted admin {admin_name} ({admin_username})")
 
@@ -586,13 +907,15 @@ async def delete_admin(
 
 @router.post("/door/unlock")
 async def remote_unlock(
-    background_tasks: BackgroundTasks,
+    door_id: Optional[str] = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
-    """遠程開門"""
+    """遠程開門（door_id 未指定時為主門）"""
     current_admin = get_current_admin(admin_token)
-    current_status = _build_door_status_payload(db)
+    door = _resolve_door(door_id)
+    lock_duration = door.actuator.lock_duration
+    current_status = _build_door_status_payload(db, door)
 
     if current_status["door_state"] == "held_open":
         event = DoorEvent(
@@ -602,25 +925,28 @@ async def remote_unlock(
             source="door_control_ui",
             result="accepted",
             description="門目前已維持解鎖，略過額外開門請求。",
+            door_id=door.door_id,
         )
         db.add(event)
         db.commit()
+        remote_unlock_counter.record(current_admin["name"], door.door_id)
+        _publish_remote_unlock_counters(door)
         return {
             "message": "門目前已維持解鎖",
             "event_id": event.id,
-            "lock_duration_seconds": LOCK_DURATION,
+            "lock_duration_seconds": lock_duration,
             "status": current_status,
         }
 
     if current_status["door_state"] == "unlocking":
         return {
             "message": "門目前正在開啟中",
-            "lock_duration_seconds": LOCK_DURATION,
+            "lock_duration_seconds": lock_duration,
             "status": current_status,
         }
 
-    # 非阻塞地觸發開門，避免卡住整個事件迴圈
-    asyncio.create_task(asyncio.to_thread(open_lock))
+    # 開門指令立即返回，由 actuator 以計時器自動上鎖
+    open_lock(door.actuator)
 
     event = DoorEvent(
         admin_id=current_admin["id"],
@@ -628,22 +954,26 @@ async def remote_unlock(
         action="remote_unlock",
         source="door_control_ui",
         result="accepted",
-        description=f"遠程開門請求已送出，預計持續 {LOCK_DURATION} 秒",
+        description=f"遠程開門請求已送出，預計持續 {lock_duration:g} 秒",
+        door_id=door.door_id,
     )
     db.add(event)
     db.commit()
+    remote_unlock_counter.record(current_admin["name"], door.door_id)
+    _publish_remote_unlock_counters(door)
 
     # 背景發送通知
-    message = f"🚪 遠程開門操作\n操作者：{current_admin['name']}"
-    background_tasks.add_task(send_telegram, message)
+    door_label = door_registry.label(door)
+    message = f"🚪 遠程開門操作{f'（{door_label}）' if door_label else ''}\n操作者：{current_admin['name']}"
+    telegram_dispatcher.notify(message)
 
-    log.info(f"🚪 Admin {current_admin['name']} triggered remote unlock")
+    log.info(f"🚪 Admin {current_admin['name']} triggered remote unlock at {door.door_id}")
 
     return {
         "message": "門已開啟",
         "event_id": event.id,
-        "lock_duration_seconds": LOCK_DURATION,
-        "status": _build_door_status_payload(db),
+        "lock_duration_seconds": lock_duration,
+        "status": _build_door_status_payload(db, door),
     }
 
 
@@ -654,12 +984,13 @@ async def update_door_settings(
     daily_lock_time: Optional[str] = Form(None),
     first_unlock_time: Optional[str] = Form(None),
     apply_timing: str = Form(APPLY_TIMING_IMMEDIATE),
-    background_tasks: BackgroundTasks = None,
+    door_id: Optional[str] = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
-    """更新門禁模式與每日首刷常開排程。"""
+    """更新門禁模式與每日首刷常開排程（每扇門各自設定，door_id 未指定時為主門）。"""
     current_admin = get_current_admin(admin_token)
+    door = _resolve_door(door_id)
 
     if apply_timing not in {APPLY_TIMING_IMMEDIATE, APPLY_TIMING_NEXT_CYCLE}:
         raise HTTPException(400, "不支援的套用時機")
@@ -677,7 +1008,8 @@ async def update_door_settings(
     except ValueError as exc:
         raise HTTPException(400, str(exc)) from exc
 
-    settings, evaluation, _ = sync_door_hardware_state(db)
+    _, evaluation, _ = sync_door_hardware_state(db, door_id=door.door_id, actuator=door.actuator)
+    settings = get_or_create_door_settings(db, door.door_id)
     now_local = evaluation.now_local
     current_daily_lock_time = settings.daily_lock_time or normalized_daily_lock_time
     current_first_unlock_time = settings.first_unlock_time or normalized_first_unlock_time
@@ -748,11 +1080,16 @@ async def update_door_settings(
     db.add(settings)
     db.commit()
     db.refresh(settings)
+    refresh_door_settings_cache(db, settings)
 
-    if apply_timing == APPLY_TIMING_NEXT_CYCLE:
-        settings, evaluation, _ = sync_door_hardware_state(db, interrupt_timed_unlock=False)
-    else:
-        settings, evaluation, _ = sync_door_hardware_state(db, interrupt_timed_unlock=True)
+    settings, evaluation, _ = sync_door_hardware_state(
+        db,
+        interrupt_timed_unlock=apply_timing != APPLY_TIMING_NEXT_CYCLE,
+        door_id=door.door_id,
+        actuator=door.actuator,
+    )
+    # Rules changed: let the scheduler recompute its next transition instead of sleeping on stale ones.
+    door_scheduler.wake()
 
     event = DoorEvent(
         admin_id=current_admin["id"],
@@ -761,17 +1098,17 @@ async def update_door_settings(
         source="door_control_ui",
         result="accepted",
         description=description,
+        door_id=door.door_id,
     )
     db.add(event)
     db.commit()
 
-    if background_tasks:
-        background_tasks.add_task(
-            send_telegram,
-            f"🚪 門禁模式更新\n操作者：{current_admin['name']}\n{description}",
-        )
+    door_label = door_registry.label(door)
+    telegram_dispatcher.notify(
+        f"🚪 門禁模式更新{f'（{door_label}）' if door_label else ''}\n操作者：{current_admin['name']}\n{description}"
+    )
 
-    status = _build_door_status_payload(db)
+    status = _build_door_status_payload(db, door)
 
     return {
         "message": description,
@@ -779,14 +1116,56 @@ async def update_door_settings(
         "event_id": event.id,
     }
 
+@router.get("/doors")
+async def list_doors(
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """列出本機控制的所有門，以及各自的讀卡機、門鎖與門禁模式狀態"""
+    current_admin = get_current_admin(admin_token)
+
+    doors = []
+    for door in door_registry:
+        settings, evaluation, _ = sync_door_hardware_state(db, door_id=door.door_id, actuator=door.actuator)
+        doors.append({**door.describe(), **serialize_door_settings(settings, evaluation)})
+    return doors
+
 @router.get("/door/status")
 async def get_door_status(
+    door_id: Optional[str] = None,
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """回傳門禁設備即時狀態與可用能力（door_id 未指定時為主門）"""
+    current_admin = get_current_admin(admin_token)
+    return _build_door_status_payload(db, _resolve_door(door_id))
+
+@router.get("/door/status/stream")
+async def stream_door_status(
+    door_id: Optional[str] = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
-    """回傳門禁設備即時狀態與可用能力"""
+    """以 SSE 推送門鎖狀態變化（先送完整狀態，之後只送變動欄位；每扇門各自一條串流）"""
     current_admin = get_current_admin(admin_token)
-    return _build_door_status_payload(db)
+    door = _resolve_door(door_id)
+
+    async def events():
+        # 先訂閱再取快照，避免兩者之間的狀態變化遺失
+        with door_status_events.subscribe(door_status_topic(door.door_id)) as subscription:
+            status = _build_door_status_payload(db, door)
+            # 串流期間不再查詢資料庫，立即釋放連線
+            db.close()
+            yield format_sse(DOOR_STATUS_EVENT, status)
+
+            while True:
+                event = await subscription.get(EVENT_STREAM_KEEPALIVE_SECONDS)
+                if event is None:
+                    yield SSE_KEEPALIVE
+                    continue
+                yield format_sse(event["event"], event["data"], event["id"])
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 @router.get("/door/events")
 async def get_door_events(
@@ -794,41 +1173,39 @@ async def get_door_events(
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
-    """查詢最近的門禁控制事件"""
+    """查詢最近的門禁控制事件（資料庫不足時續讀已歸檔月份）"""
     current_admin = get_current_admin(admin_token)
 
+    limit = max(limit, 0)
     events = db.query(DoorEvent).order_by(DoorEvent.created_at.desc()).limit(limit).all()
-    return [{
-        "id": event.id,
-        "admin_id": event.admin_id,
-        "admin_name": event.admin_name,
-        "action": event.action,
-        "source": event.source,
-        "result": event.result,
-        "description": event.description,
-        "created_at": serialize_datetime(event.created_at),
-    } for event in events]
+    items = [serialize_door_event_row(event) for event in events]
+    if len(items) < limit:
+        archived = islice(archive_store.iter_rows("door_events"), limit - len(items))
+        items.extend(serialize_archived_door_event(row) for row in archived)
+    return items
 
 @router.post("/door/simulate-scan")
 async def simulate_door_scan(
     card_uid: str = Form(...),
+    door_id: Optional[str] = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
-    """管理後台使用的模擬刷卡入口（僅開發模式）"""
+    """管理後台使用的模擬刷卡入口（僅開發模式，door_id 未指定時為主門）"""
     current_admin = get_current_admin(admin_token)
 
     if not DEV_MODE:
         raise HTTPException(403, "此功能僅在開發模式可用")
 
-    if not rfid_reader.dev_mode:
+    door = _resolve_door(door_id)
+    if not door.reader.dev_mode:
         raise HTTPException(403, "RFID 讀卡機目前不在模擬模式")
 
     card_uid = card_uid.strip()
     if not card_uid:
         raise HTTPException(400, "請輸入卡片 UID")
 
-    success = await rfid_reader.simulate_scan(card_uid)
+    success = await door.reader.simulate_scan(card_uid)
     if not success:
         raise HTTPException(500, "RFID 讀卡機未就緒")
 
@@ -839,6 +1216,7 @@ async def simulate_door_scan(
         source="door_control_ui",
         result="accepted",
         description=f"已送出模擬刷卡：{card_uid}",
+        door_id=door.door_id,
     )
     db.add(event)
     db.commit()
@@ -851,32 +1229,197 @@ async def simulate_door_scan(
         "event_id": event.id,
     }
 
+def _resolve_log_filters(
+    user_id: Optional[str],
+    card_id: Optional[str],
+    rfid_uid: Optional[str],
+    action: Optional[str],
+    start: Optional[str],
+    end: Optional[str],
+) -> AccessLogFilters:
+    try:
+        start_at = parse_log_time(start)
+        end_at = parse_log_time(end)
+    except ValueError:
+        raise HTTPException(400, "日期格式錯誤，請使用 ISO 8601（例如 2026-03-01 或 2026-03-01T08:00）")
+
+    return AccessLogFilters(
+        user_id=user_id or None,
+        card_id=card_id or None,
+        rfid_uid=rfid_uid.strip() if rfid_uid and rfid_uid.strip() else None,
+        action=action or None,
+        start=start_at,
+        end=end_at,
+    )
+
+
 @router.get("/logs")
 async def get_access_logs(
     limit: int = 50,
+    user_id: Optional[str] = None,
+    card_id: Optional[str] = None,
+    rfid_uid: Optional[str] = None,
+    action: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
-    """查詢存取紀錄"""
+    """查詢存取紀錄（新到舊；start 含、end 不含，未帶時區視為台北時間）"""
+    current_admin = get_current_admin(admin_token)
+    filters = _resolve_log_filters(user_id, card_id, rfid_uid, action, start, end)
+    query = build_access_log_query(db, filters)
+
+    if page_size is None and cursor is None:
+        limit = max(limit, 0)
+        ordering = [key.desc() for key in ACCESS_LOG_KEYS]
+        rows = query.order_by(*ordering).limit(limit).all()
+        items = [serialize_access_log_row(row) for row in rows]
+        if len(items) < limit:
+            archived = list(islice(archive_store.iter_rows("access_logs", filters), limit - len(items)))
+            items.extend(serialize_archived_access_logs(db, archived))
+        return items
+
+    rows, next_cursor = _paginate(query, ACCESS_LOG_KEYS, page_size, cursor, descending=True)
+    items = [serialize_access_log_row(row) for row in rows]
+
+    # 歸檔月份一定早於資料庫內的紀錄：資料庫讀完後由同一個游標接續往下讀
+    size = clamp_page_size(page_size)
+    if next_cursor is None:
+        if rows:
+            before = (rows[-1]._keyset_0, rows[-1]._keyset_1)
+        else:
+            before = tuple(decode_cursor(cursor, len(ACCESS_LOG_KEYS))) if cursor else None
+        needed = size - len(items)
+        archived = list(islice(archive_store.iter_rows("access_logs", filters, before), needed + 1))
+        if len(archived) > needed:
+            archived = archived[:needed]
+            last_key = [archived[-1]["timestamp"], archived[-1]["id"]] if archived else list(before)
+            next_cursor = encode_cursor(last_key)
+        items.extend(serialize_archived_access_logs(db, archived))
+
+    # 紀錄量可能很大，總數只在明確要求時計算
+    total = None
+    if include_total:
+        total = db.query(func.count(AccessLog.id)).filter(*filters.clauses()).scalar()
+        total += archive_store.count_rows("access_logs", filters)
+    return build_page(items, next_cursor, total)
+
+
+def _resolve_export_format(export_format: str) -> str:
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(400, "匯出格式僅支援 csv 或 ndjson")
+    return export_format
+
+
+def _build_export_response(rows, columns, export_format: str, compress: bool, prefix: str) -> StreamingResponse:
+    filename = build_export_filename(prefix, export_format, compress, now_app_timezone())
+    return StreamingResponse(
+        stream_export(rows, columns, export_format, compress),
+        media_type="application/gzip" if compress else EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/logs/export")
+async def export_access_logs(
+    format: str = "csv",
+    gzip: bool = False,
+    user_id: Optional[str] = None,
+    card_id: Optional[str] = None,
+    rfid_uid: Optional[str] = None,
+    action: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    admin_token: Optional[str] = Cookie(None),
+):
+    """串流匯出存取紀錄（CSV / NDJSON，可選 gzip），篩選條件與 /logs 相同"""
+    current_admin = get_current_admin(admin_token)
+    export_format = _resolve_export_format(format)
+    filters = _resolve_log_filters(user_id, card_id, rfid_uid, action, start, end)
+
+    log.info(f"📤 Admin {current_admin['name']} exporting access logs as {export_format}")
+    return _build_export_response(
+        iter_access_log_rows(filters),
+        ACCESS_LOG_EXPORT_COLUMNS,
+        export_format,
+        gzip,
+        "access_logs",
+    )
+
+
+@router.get("/door/events/export")
+async def export_door_events(
+    format: str = "csv",
+    gzip: bool = False,
+    admin_id: Optional[str] = None,
+    action: Optional[str] = None,
+    source: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    admin_token: Optional[str] = Cookie(None),
+):
+    """串流匯出門禁控制事件（CSV / NDJSON，可選 gzip）"""
+    current_admin = get_current_admin(admin_token)
+    export_format = _resolve_export_format(format)
+    try:
+        filters = DoorEventFilters(
+            admin_id=admin_id or None,
+            action=action or None,
+            source=source or None,
+            start=parse_log_time(start),
+            end=parse_log_time(end),
+        )
+    except ValueError:
+        raise HTTPException(400, "日期格式錯誤，請使用 ISO 8601（例如 2026-03-01 或 2026-03-01T08:00）")
+
+    log.info(f"📤 Admin {current_admin['name']} exporting door events as {export_format}")
+    return _build_export_response(
+        iter_door_event_rows(filters),
+        DOOR_EVENT_EXPORT_COLUMNS,
+        export_format,
+        gzip,
+        "door_events",
+    )
+
+@router.get("/archive")
+async def get_archive_status(
+    admin_token: Optional[str] = Cookie(None),
+):
+    """查詢歸檔月份索引與最近一次歸檔結果"""
     current_admin = get_current_admin(admin_token)
 
-    logs = db.query(AccessLog).order_by(AccessLog.timestamp.desc()).limit(limit).all()
+    stats = archive_store.stats()
+    stats["retention_days"] = ARCHIVE_RETENTION_DAYS
+    stats["segments"] = [
+        segment.to_dict()
+        for table in ("access_logs", "door_events")
+        for segment in archive_store.segments(table)
+    ]
+    return stats
 
-    result = []
-    for log_entry in logs:
-        user = db.query(User).filter(User.id == log_entry.user_id).first() if log_entry.user_id else None
 
-        result.append({
-            "id": log_entry.id,
-            "user_id": log_entry.user_id,
-            "user_name": user.name if user else "未知",
-            "student_id": user.student_id if user else "N/A",
-            "rfid_uid": log_entry.rfid_uid,
-            "action": log_entry.action,
-            "timestamp": serialize_datetime(log_entry.timestamp)
-        })
+@router.post("/archive/run")
+async def trigger_archive_run(
+    full_vacuum: bool = Form(False),
+    admin_token: Optional[str] = Cookie(None),
+):
+    """立即執行歸檔；full_vacuum 會完整重整資料庫（舊資料庫首次切換 incremental 模式時使用）"""
+    current_admin = get_current_admin(admin_token)
+
+    try:
+        result = await asyncio.to_thread(run_archive, full_vacuum=full_vacuum)
+    except ArchiveBusyError:
+        raise HTTPException(409, "歸檔作業進行中，請稍後再試")
 
-    return result
+    log.info(f"🗄️ Admin {current_admin['name']} ran archive: {result.rows_archived} rows archived")
+    return {
+        "message": f"已歸檔 {result.rows_archived} 筆紀錄",
+        **result.to_dict(),
+    }
 
 @router.get("/stats")
 async def get_stats(
@@ -890,31 +1433,12 @@ async def get_stats(
     user_count = db.query(func.count(User.id)).scalar()
     card_count = db.query(func.count(Card.id)).scalar()
     admin_count = db.query(func.count(Admin.id)).scalar()
-    log_count = db.query(func.count(AccessLog.id)).scalar()
-    
-    now = now_app_timezone()
 
-    # 本月第一天（Asia/Taipei）後再轉回 SQLite 用的 UTC naive
-    first_day_of_month = app_time_to_utc_naive(
-        now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    )
-
-    # 本週第一天（週一，Asia/Taipei）後再轉回 SQLite 用的 UTC naive
-    days_since_monday = now.weekday()
-    first_day_of_week = app_time_to_utc_naive(
-        (now - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
-    )
-    
-    # 計算本月存取次數 - 只查詢 id 欄位
-    monthly_logs = db.query(func.count(AccessLog.id)).filter(
-        AccessLog.timestamp >= first_day_of_month
-    ).scalar()
-    
-    # 計算本週活躍使用者數（去重）- 只查詢 user_id 欄位
-    active_users = db.query(func.count(func.distinct(AccessLog.user_id))).filter(
-        AccessLog.timestamp >= first_day_of_week,
-        AccessLog.user_id.isnot(None)
-    ).scalar()
+    # 存取紀錄相關統計改讀每日彙總表，不再掃描 access_logs
+    today = now_app_timezone().date()
+    log_count = sum_access_count(db)
+    monthly_logs = sum_access_count(db, today.replace(day=1))
+    active_users = count_active_users(db, today - timedelta(days=today.weekday()))
 
     return {
         "user_count": user_count,
@@ -925,6 +1449,52 @@ async def get_stats(
         "active_users_count": active_users
     }
 
+# 未指定 start 時各粒度預設回溯的桶數
+TIMESERIES_DEFAULT_SPANS = {"day": 30, "week": 12, "month": 12}
+
+
+@router.get("/stats/timeseries")
+async def get_stats_timeseries(
+    granularity: str = "day",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """依日 / 週 / 月彙總存取次數與不重複使用者（僅讀取彙總表）"""
+    current_admin = get_current_admin(admin_token)
+
+    if granularity not in GRANULARITIES:
+        raise HTTPException(400, "granularity 僅支援 day、week 或 month")
+
+    try:
+        end_day = date.fromisoformat(end) if end else now_app_timezone().date()
+        if start:
+            start_day = date.fromisoformat(start)
+        else:
+            span = TIMESERIES_DEFAULT_SPANS[granularity]
+            if granularity == "day":
+                start_day = end_day - timedelta(days=span - 1)
+            elif granularity == "week":
+                start_day = end_day - timedelta(weeks=span - 1)
+            else:
+                month_index = end_day.year * 12 + end_day.month - 1 - (span - 1)
+                start_day = date(month_index // 12, month_index % 12 + 1, 1)
+    except ValueError:
+        raise HTTPException(400, "日期格式錯誤，請使用 YYYY-MM-DD")
+
+    try:
+        buckets = get_access_timeseries(db, granularity, start_day, end_day)
+    except ValueError as exc:
+        raise HTTPException(400, f"查詢區間無效：{exc}")
+
+    return {
+        "granularity": granularity,
+        "start": start_day.isoformat(),
+        "end": end_day.isoformat(),
+        "buckets": buckets,
+    }
+
 @router.put("/users/{user_id}")
 async def update_user(
     user_id: str,
@@ -933,7 +1503,6 @@ async def update_user(
     email: Optional[str] = Form(None),
     telegram_id: Optional[str] = Form(None),
     is_active: str = Form("true"),
-    background_tasks: BackgroundTasks = None,
     admin_token: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
 ):
@@ -966,6 +1535,7 @@ async def update_user(
     user.telegram_id = telegram_id
     user.is_active = is_active_bool
     db.commit()
+    card_index.patch_user(user)
 
     # 記錄狀態變更
     status_msg = ""
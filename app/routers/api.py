@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Form
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from typing import Optional
 import logging
 
 from app.database import get_db, Card, AccessLog
 from app.routers.dependencies import get_current_admin
-from app.services.telegram import send_telegram
-from app.services.rfid_reader import rfid_reader
+from app.services.card_index import card_uid_clause
+from app.services.telegram import telegram_dispatcher
+from app.services.door_registry import door_registry
+from app.services.stats_rollup import apply_access_rollups
 from app.config import DEV_MODE
+from app.timezone import utcnow
 from app.versioning import get_build_info
 
 log = logging.getLogger(__name__)
@@ -41,23 +45,26 @@ async def api_scan(
         return JSONResponse({"error": "missing rfid_uid"}, status_code=400)
 
     # 檢查卡片是否已註冊（使用新的一對多架構）
-    card = db.query(Card).filter(Card.rfid_uid == rfid_uid).first()
+    card = db.query(Card).filter(card_uid_clause(str(rfid_uid))).first()
 
     if card and card.user:
         user = card.user
         log.info(f"✅ Access granted (via API scan by {current_admin['name']}): {user.name} ({user.student_id})")
 
         # Log access
+        timestamp = utcnow()
         db.add(AccessLog(
             user_id=user.id,
             card_id=card.id,
             rfid_uid=rfid_uid,
-            action="entry"
+            action="entry",
+            timestamp=timestamp,
         ))
+        apply_access_rollups(db, [{"user_id": user.id, "timestamp": timestamp}])
         db.commit()
 
         # Send notification
-        send_telegram(f"歡迎！{user.name} ({user.student_id}) 解鎖門禁（測試模式 - {current_admin['name']}）")
+        telegram_dispatcher.notify(f"歡迎！{user.name} ({user.student_id}) 解鎖門禁（測試模式 - {current_admin['name']}）")
 
         return {
             "status": "allow",
@@ -108,20 +115,25 @@ async def api_register_scan_deprecated(request: Request):
 # ========== Development Mode API ==========
 
 @router.post("/dev/simulate-scan")
-async def simulate_rfid_scan(card_uid: str = Form(...)):
+async def simulate_rfid_scan(card_uid: str = Form(...), door_id: Optional[str] = None):
     """
     [開發模式] 模擬 RFID 刷卡
     - 用於本地開發測試，無需實際讀卡機
+    - door_id 指定刷卡的門（未指定時為主門）
     - 生產環境應禁用此端點
     """
     if not DEV_MODE:
         raise HTTPException(403, "此端點僅在開發模式可用")
 
-    if not rfid_reader.dev_mode:
+    door = door_registry.get(door_id)
+    if door is None:
+        raise HTTPException(404, "找不到指定的門")
+
+    if not door.reader.dev_mode:
         raise HTTPException(403, "RFID 讀卡機不在開發模式")
 
     try:
-        success = await rfid_reader.simulate_scan(card_uid)
+        success = await door.reader.simulate_scan(card_uid)
         if success:
             return {"status": "ok", "message": f"已模擬刷卡: {card_uid}"}
         else:
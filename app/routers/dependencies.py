@@ -5,16 +5,21 @@
 from typing import Optional
 from fastapi import Cookie, HTTPException
 from app.database import SessionLocal, Admin
+from app.services.admin_cache import admin_identity_cache
 from app.services.auth import verify_access_token
 import logging
 
 log = logging.getLogger(__name__)
 
 def _resolve_admin(admin_token: Optional[str]) -> Optional[dict]:
-    """Resolve the current admin from the JWT and database state."""
+    """Resolve the current admin from the JWT and database state (cached per token)."""
     if not admin_token:
         return None
 
+    cached = admin_identity_cache.get(admin_token)
+    if cached is not None:
+        return cached
+
     payload = verify_access_token(admin_token)
     if not payload:
         return None
@@ -28,13 +33,16 @@ def _resolve_admin(admin_token: Optional[str]) -> Optional[dict]:
         if not admin:
             return None
 
-        return {
+        identity = {
             "id": admin.id,
             "username": admin.username,
             "name": admin.name,
             "sub": admin.username,
         }
 
+    admin_identity_cache.put(admin_token, identity, payload.get("exp"))
+    return identity
+
 
 def get_optional_admin(admin_token: Optional[str] = Cookie(None, alias="admin_token")) -> Optional[dict]:
     """Return the current admin if the token is valid and the admin still exists."""
@@ -3,8 +3,8 @@ import os
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Request, Form, Depends, HTTPException, Cookie, Response, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi import APIRouter, Request, Form, Depends, HTTPException, Cookie, Response
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from slowapi import Limiter
@@ -12,17 +12,22 @@ from slowapi.util import get_remote_address
 
 from app.database import get_db, User, Card, Admin, RegistrationSession
 from app.routers.dependencies import get_current_admin, get_optional_admin
+from app.services.card_index import card_index
+from app.services.event_stream import SSE_HEADERS, SSE_KEEPALIVE, format_sse, registration_events
 from app.services.registration import (
-    REGISTRATION_STATUS_CARD_MISMATCH_RESET,
-    REGISTRATION_STATUS_COMPLETED,
-    REGISTRATION_STATUS_WAITING_FOR_FIRST_SCAN,
-    REGISTRATION_STATUS_WAITING_FOR_SECOND_SCAN,
+    REGISTRATION_EVENT,
+    REGISTRATION_STATUS_MESSAGES,
+    REGISTRATION_STATUS_TIMED_OUT,
+    build_registration_status,
+    count_user_cards,
+    publish_registration_status,
     start_registration_session,
 )
-from app.services.telegram import send_telegram
-from app.services.auth import verify_password, create_access_token
-from app.config import COOKIE_SECURE, RATE_LIMIT_PER_MINUTE, RATE_LIMIT_ENABLED
-from app.timezone import utcnow
+from app.services.telegram import telegram_dispatcher
+from app.services.auth import create_access_token
+from app.services.password_pool import PasswordPoolBusyError, password_pool
+from app.config import COOKIE_SECURE, EVENT_STREAM_KEEPALIVE_SECONDS, RATE_LIMIT_PER_MINUTE, RATE_LIMIT_ENABLED
+from app.timezone import utcnow, utcnow_aware
 
 log = logging.getLogger(__name__)
 router = APIRouter(tags=["web"])
@@ -74,7 +79,13 @@ async def login(
     # 查詢管理員
     admin = db.query(Admin).filter(Admin.username == username).first()
 
-    if not admin or not verify_password(password, admin.password_hash):
+    try:
+        password_ok = bool(admin) and await password_pool.verify(password, admin.password_hash)
+    except PasswordPoolBusyError:
+        log.warning(f"⚠️ Login rejected, password workers busy: {username}")
+        raise HTTPException(status_code=503, detail="系統忙碌中，請稍後再試")
+
+    if not password_ok:
         log.warning(f"⚠️ Failed login attempt for username: {username}")
         raise HTTPException(status_code=401, detail="帳號或密碼錯誤")
 
@@ -120,7 +131,6 @@ async def get_current_user(admin_token: Optional[str] = Cookie(None)):
 
 @router.post("/register")
 async def register_post(
-    background_tasks: BackgroundTasks,
     student_id: str = Form(...),
     name: str = Form(...),
     email: Optional[str] = Form(None),
@@ -195,6 +205,8 @@ async def register_post(
 
     db.commit()
     db.refresh(user)
+    card_index.patch_user(user)
+    publish_registration_status(session, session.initial_card_count)
 
     # 🔧 Send Telegram notification in background (非阻塞)
     card_count = session.initial_card_count
@@ -203,7 +215,7 @@ async def register_post(
     else:
         message = f"新註冊待綁定：{name} ({student_id})\n操作者：{current_admin['name']}"
 
-    background_tasks.add_task(send_telegram, message)
+    telegram_dispatcher.notify(message)
 
     log.info(f"✅ Registration session created for {student_id}")
 
@@ -220,81 +232,110 @@ async def register_post(
         "message": message
     })
 
-@router.get("/check_status/{student_id}")
-async def check_status(
-    student_id: str,
-    admin_token: Optional[str] = Cookie(None),
-    db: Session = Depends(get_db)
-):
-    """檢查卡片綁定狀態（僅管理員）"""
-    # 強制驗證管理員身份
-    current_admin = get_current_admin(admin_token)
-
+def _binding_status(db: Session, student_id: str) -> tuple[Optional[User], dict]:
     user = db.query(User).filter(User.student_id == student_id).first()
     if not user:
-        return {"bound": False, "card_count": 0, "binding_in_progress": False}
+        return None, {"bound": False, "card_count": 0, "binding_in_progress": False}
 
     # 查詢當前卡片數量
-    current_card_count = db.query(Card).filter(Card.user_id == user.id).count()
+    current_card_count = count_user_cards(db, user.id)
 
     # 查詢 registration session
     session = db.query(RegistrationSession).filter(
         RegistrationSession.user_id == user.id
     ).first()
 
-    if session:
-        # 檢查 session 是否已完成
-        if session.completed:
-            return {
-                "bound": True,
-                "card_count": current_card_count,
-                "binding_in_progress": False,
-                "initial_count": session.initial_card_count,
-                "step": 2,
-                "status_message": "綁定完成",
-                "last_status": session.last_status or REGISTRATION_STATUS_COMPLETED,
-            }
-
-        # 檢查是否過期
-        if session.expires_at and session.expires_at < utcnow():
-            return {
-                "bound": False,
-                "card_count": current_card_count,
-                "binding_in_progress": False,
-                "initial_count": session.initial_card_count,
-                "step": session.step,
-                "status_message": "綁定逾時",
-                "last_status": session.last_status or "timed_out",
-            }
-
-        status_map = {
-            REGISTRATION_STATUS_WAITING_FOR_FIRST_SCAN: "請刷卡第一次",
-            REGISTRATION_STATUS_WAITING_FOR_SECOND_SCAN: "很好！請再刷一次相同的卡片",
-            REGISTRATION_STATUS_CARD_MISMATCH_RESET: "卡片不一致，已重設，請重新刷第一次",
+    if not session:
+        return user, {
+            "bound": current_card_count > 0,
+            "card_count": current_card_count,
+            "binding_in_progress": False
         }
-        current_status = session.last_status or (
-            REGISTRATION_STATUS_WAITING_FOR_SECOND_SCAN if session.step == 1
-            else REGISTRATION_STATUS_WAITING_FOR_FIRST_SCAN
-        )
-        status_msg = status_map.get(current_status, "處理中...")
 
-        return {
+    # 檢查是否過期
+    if not session.completed and session.expires_at and session.expires_at < utcnow():
+        return user, {
             "bound": False,
             "card_count": current_card_count,
-            "binding_in_progress": True,
+            "binding_in_progress": False,
             "initial_count": session.initial_card_count,
             "step": session.step,
-            "status_message": status_msg,
-            "last_status": current_status,
-        }
-    else:
-        # 沒有 session
-        return {
-            "bound": current_card_count > 0,
-            "card_count": current_card_count,
-            "binding_in_progress": False
+            "status_message": REGISTRATION_STATUS_MESSAGES[REGISTRATION_STATUS_TIMED_OUT],
+            "last_status": session.last_status or REGISTRATION_STATUS_TIMED_OUT,
         }
 
+    return user, build_registration_status(session, current_card_count)
+
+@router.get("/check_status/{student_id}")
+async def check_status(
+    student_id: str,
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """檢查卡片綁定狀態（僅管理員）"""
+    # 強制驗證管理員身份
+    current_admin = get_current_admin(admin_token)
+
+    _, status = _binding_status(db, student_id)
+    return status
+
+def _parse_expires_at(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+@router.get("/check_status/{student_id}/stream")
+async def stream_status(
+    student_id: str,
+    admin_token: Optional[str] = Cookie(None),
+    db: Session = Depends(get_db)
+):
+    """以 SSE 推送卡片綁定狀態（僅管理員），取代輪詢 /check_status"""
+    current_admin = get_current_admin(admin_token)
+
+    user = db.query(User.id).filter(User.student_id == student_id).first()
+    if not user:
+        db.close()
+        raise HTTPException(status_code=404, detail="使用者不存在")
+
+    async def events():
+        # 先訂閱再取快照，避免兩者之間的狀態變化遺失
+        with registration_events.subscribe(user.id) as subscription:
+            _, status = _binding_status(db, student_id)
+            # 串流期間不再查詢資料庫，立即釋放連線
+            db.close()
+
+            yield format_sse(REGISTRATION_EVENT, status)
+            if not status.get("binding_in_progress"):
+                return
+            expires_at = _parse_expires_at(status.get("expires_at"))
+
+            while True:
+                timeout = EVENT_STREAM_KEEPALIVE_SECONDS
+                if expires_at is not None:
+                    remaining = (expires_at - utcnow_aware()).total_seconds()
+                    if remaining <= 0:
+                        yield format_sse(REGISTRATION_EVENT, {
+                            **status,
+                            "binding_in_progress": False,
+                            "status_message": REGISTRATION_STATUS_MESSAGES[REGISTRATION_STATUS_TIMED_OUT],
+                            "last_status": REGISTRATION_STATUS_TIMED_OUT,
+                        })
+                        return
+                    timeout = min(timeout, remaining)
+
+                event = await subscription.get(timeout)
+                if event is None:
+                    if expires_at is None or utcnow_aware() < expires_at:
+                        yield SSE_KEEPALIVE
+                    continue
+
+                status = event["data"]
+                yield format_sse(event["event"], status, event["id"])
+                if not status.get("binding_in_progress"):
+                    return
+                expires_at = _parse_expires_at(status.get("expires_at")) or expires_at
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.get("/success", response_class=HTMLResponse)
 async def success(request: Request, student_id: str, db: Session = Depends(get_db)):
     """Success page after binding"""
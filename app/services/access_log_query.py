@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Optional
+
+from sqlalchemy.orm import Query, Session
+
+from app.database import PRIMARY_DOOR_ID, AccessLog, User
+from app.services.pagination import raw_sort_key
+from app.timezone import app_time_to_utc_naive, serialize_datetime
+
+# Newest first; id breaks ties between rows written in the same instant.
+ACCESS_LOG_KEYS = (raw_sort_key(AccessLog.timestamp), AccessLog.id)
+OWNER_LOOKUP_CHUNK_SIZE = 500
+
+
+@dataclass(frozen=True)
+class AccessLogFilters:
+    user_id: Optional[str] = None
+    card_id: Optional[str] = None
+    rfid_uid: Optional[str] = None
+    action: Optional[str] = None
+    start: Optional[datetime] = None  # naive UTC, inclusive
+    end: Optional[datetime] = None  # naive UTC, exclusive
+
+    def clauses(self) -> list:
+        clauses = []
+        if self.user_id:
+            clauses.append(AccessLog.user_id == self.user_id)
+        if self.card_id:
+            clauses.append(AccessLog.card_id == self.card_id)
+        if self.rfid_uid:
+            clauses.append(AccessLog.rfid_uid == self.rfid_uid)
+        if self.action:
+            clauses.append(AccessLog.action == self.action)
+        if self.start is not None:
+            clauses.append(AccessLog.timestamp >= self.start)
+        if self.end is not None:
+            clauses.append(AccessLog.timestamp < self.end)
+        return clauses
+
+    def matches(self, row: dict, at: Optional[datetime]) -> bool:
+        """Python counterpart of `clauses()` for archived rows (`at` is the parsed timestamp)."""
+        for name in ("user_id", "card_id", "rfid_uid", "action"):
+            expected = getattr(self, name)
+            if expected and row.get(name) != expected:
+                return False
+        if self.start is not None and (at is None or at < self.start):
+            return False
+        if self.end is not None and (at is None or at >= self.end):
+            return False
+        return True
+
+
+def parse_log_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO date/datetime filter; values without an offset are Asia/Taipei local time."""
+    if value is None or not value.strip():
+        return None
+    return app_time_to_utc_naive(datetime.fromisoformat(value.strip()))
+
+
+def build_access_log_query(db: Session, filters: AccessLogFilters) -> Query:
+    """Access log rows joined with their owner, selecting only the columns the log views use."""
+    return (
+        db.query(
+            AccessLog.id,
+            AccessLog.user_id,
+            AccessLog.card_id,
+            AccessLog.rfid_uid,
+            AccessLog.action,
+            AccessLog.door_id,
+            AccessLog.timestamp,
+            User.name.label("user_name"),
+            User.student_id.label("student_id"),
+        )
+        .outerjoin(User, User.id == AccessLog.user_id)
+        .filter(*filters.clauses())
+    )
+
+
+def serialize_access_log_row(row) -> dict:
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "card_id": row.card_id,
+        "user_name": row.user_name if row.user_name is not None else "未知",
+        "student_id": row.student_id if row.student_id is not None else "N/A",
+        "rfid_uid": row.rfid_uid,
+        "action": row.action,
+        # Rows written before multi-door support have no door and came from the primary one.
+        "door_id": row.door_id or PRIMARY_DOOR_ID,
+        "timestamp": serialize_datetime(row.timestamp)
+    }
+
+
+def serialize_archived_access_logs(db: Session, rows: list[dict]) -> list[dict]:
+    """Serialize archived rows, looking owners up in the live users table like the SQL join does."""
+    user_ids = sorted({row["user_id"] for row in rows if row.get("user_id")})
+    owners = {}
+    for offset in range(0, len(user_ids), OWNER_LOOKUP_CHUNK_SIZE):
+        chunk = user_ids[offset:offset + OWNER_LOOKUP_CHUNK_SIZE]
+        for user_id, name, student_id in db.query(User.id, User.name, User.student_id).filter(User.id.in_(chunk)):
+            owners[user_id] = (name, student_id)
+
+    serialized = []
+    for row in rows:
+        user_name, student_id = owners.get(row.get("user_id"), (None, None))
+        fields = {
+            "door_id": None,
+            **row,
+            "timestamp": datetime.fromisoformat(row["timestamp"]) if row.get("timestamp") else None,
+            "user_name": user_name,
+            "student_id": student_id,
+        }
+        serialized.append(serialize_access_log_row(SimpleNamespace(**fields)))
+    return serialized
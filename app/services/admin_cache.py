@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+from typing import Callable, Optional
+
+from app.config import ADMIN_CACHE_MAX_ENTRIES, ADMIN_CACHE_TTL_SECONDS
+
+
+@dataclass(frozen=True)
+class CachedAdmin:
+    identity: dict
+    expires_at: float
+
+
+class AdminIdentityCache:
+    """Bounded TTL/LRU cache of verified admin token -> admin identity."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = ADMIN_CACHE_TTL_SECONDS,
+        max_entries: int = ADMIN_CACHE_MAX_ENTRIES,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self.ttl_seconds = max(ttl_seconds, 0.0)
+        self.max_entries = max(max_entries, 1)
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self._guard = threading.Lock()
+        self._entries: OrderedDict[str, CachedAdmin] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, token: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+
+        now = self.clock()
+        with self._guard:
+            entry = self._entries.get(token)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry.expires_at <= now:
+                del self._entries[token]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self._hits += 1
+            return dict(entry.identity)
+
+    def put(self, token: str, identity: dict, token_expires_at: Optional[float] = None) -> None:
+        """Cache an identity; the entry never outlives the token's own `exp`."""
+        if not self.enabled:
+            return
+
+        ttl = self.ttl_seconds
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - self.wall_clock())
+        if ttl <= 0:
+            return
+
+        with self._guard:
+            self._entries[token] = CachedAdmin(identity=dict(identity), expires_at=self.clock() + ttl)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_admin(self, admin_id: str) -> int:
+        """Drop every cached token of an admin (after rename / password change / deletion)."""
+        with self._guard:
+            tokens = [token for token, entry in self._entries.items() if entry.identity.get("id") == admin_id]
+            for token in tokens:
+                del self._entries[token]
+            self._invalidations += len(tokens)
+            return len(tokens)
+
+    def clear(self) -> None:
+        with self._guard:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, float | int | bool]:
+        with self._guard:
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl_seconds,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+            }
+
+
+# Global admin identity cache instance
+admin_identity_cache = AdminIdentityCache()
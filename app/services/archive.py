@@ -0,0 +1,481 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+import gzip
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import ARCHIVE_DIR, ARCHIVE_RETENTION_DAYS, SQLITE_AUTO_VACUUM
+from app.database import AccessLog, DoorEvent, SessionLocal
+from app.services.pagination import raw_sort_key
+from app.timezone import APP_TIMEZONE, app_time_to_utc_naive, now_app_timezone, to_app_timezone
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_INDEX_FILE = "index.json"
+ARCHIVE_INDEX_VERSION = 1
+ARCHIVE_BATCH_SIZE = 5000
+ARCHIVE_DELETE_CHUNK = 500
+
+
+class ArchiveBusyError(RuntimeError):
+    """Raised when an archive run is requested while another one is in progress."""
+
+
+@dataclass(frozen=True)
+class ArchiveTable:
+    name: str
+    model: Any
+    time_column: str
+    columns: tuple[str, ...]
+
+    @property
+    def time_attr(self):
+        return getattr(self.model, self.time_column)
+
+
+ARCHIVE_TABLES = {
+    "access_logs": ArchiveTable(
+        "access_logs",
+        AccessLog,
+        "timestamp",
+        ("id", "user_id", "card_id", "rfid_uid", "action", "door_id", "timestamp"),
+    ),
+    "door_events": ArchiveTable(
+        "door_events",
+        DoorEvent,
+        "created_at",
+        ("id", "admin_id", "admin_name", "action", "source", "result", "description", "door_id", "created_at"),
+    ),
+}
+
+
+def parse_stored_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Archived timestamps keep SQLite's stored text (naive UTC); parse it back for filtering/serializing."""
+    return datetime.fromisoformat(value) if value else None
+
+
+def month_bounds(month: str) -> tuple[datetime, datetime]:
+    """[start, end) of a local (Asia/Taipei) calendar month as naive UTC."""
+    start_local = datetime.strptime(month, "%Y-%m").replace(tzinfo=APP_TIMEZONE)
+    next_local = (start_local + timedelta(days=32)).replace(day=1)
+    return app_time_to_utc_naive(start_local), app_time_to_utc_naive(next_local)
+
+
+def archive_cutoff(now_local: datetime, retention_days: int) -> datetime:
+    """Start of the local month that contains now - retention, as naive UTC; older months are archived."""
+    horizon = now_local - timedelta(days=retention_days)
+    return month_bounds(horizon.strftime("%Y-%m"))[0]
+
+
+@dataclass
+class ArchiveSegment:
+    table: str
+    month: str  # YYYY-MM, local calendar month
+    file: str  # relative to the archive directory
+    rows: int = 0
+    min_id: Optional[int] = None
+    max_id: Optional[int] = None
+    first_at: Optional[str] = None  # stored timestamp text (naive UTC)
+    last_at: Optional[str] = None
+    actions: dict[str, int] = field(default_factory=dict)
+    bytes: int = 0
+    # Rows are stored newest first, so readers can stream the file; older segments were appended in runs.
+    newest_first: bool = False
+
+    def overlaps(self, start: Optional[datetime], end: Optional[datetime]) -> bool:
+        month_start, month_end = month_bounds(self.month)
+        return (start is None or month_end > start) and (end is None or month_start < end)
+
+    def within(self, start: Optional[datetime], end: Optional[datetime]) -> bool:
+        month_start, month_end = month_bounds(self.month)
+        return (start is None or month_start >= start) and (end is None or month_end <= end)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def count(self, row: dict, time_column: str) -> None:
+        stamp = row[time_column]
+        self.rows += 1
+        self.min_id = row["id"] if self.min_id is None else min(self.min_id, row["id"])
+        self.max_id = row["id"] if self.max_id is None else max(self.max_id, row["id"])
+        if stamp is not None:
+            self.first_at = stamp if self.first_at is None else min(self.first_at, stamp)
+            self.last_at = stamp if self.last_at is None else max(self.last_at, stamp)
+        action = row.get("action") or ""
+        self.actions[action] = self.actions.get(action, 0) + 1
+
+
+@dataclass
+class ArchiveRunResult:
+    cutoff: Optional[datetime] = None
+    rows: dict[str, int] = field(default_factory=dict)
+    segments: list[str] = field(default_factory=list)
+    reclaimed_pages: int = 0
+    full_vacuum: bool = False
+    duration_ms: float = 0.0
+    finished_at: Optional[datetime] = None
+
+    @property
+    def rows_archived(self) -> int:
+        return sum(self.rows.values())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "cutoff": to_app_timezone(self.cutoff).isoformat() if self.cutoff else None,
+            "rows": self.rows,
+            "rows_archived": self.rows_archived,
+            "segments": self.segments,
+            "reclaimed_pages": self.reclaimed_pages,
+            "full_vacuum": self.full_vacuum,
+            "duration_ms": round(self.duration_ms, 1),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ArchiveStore:
+    """Monthly gzip NDJSON segments per table, listed in a small JSON index."""
+
+    def __init__(self, root: str = ARCHIVE_DIR):
+        self.root = root
+        self._guard = threading.RLock()
+        self._index: Optional[dict[tuple[str, str], ArchiveSegment]] = None
+        self._index_mtime: Optional[int] = None
+        self.last_run: Optional[ArchiveRunResult] = None
+
+    # ---- index ----
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root, ARCHIVE_INDEX_FILE)
+
+    def _load_index(self) -> dict[tuple[str, str], ArchiveSegment]:
+        path = self._index_path()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        with self._guard:
+            if self._index is not None and self._index_mtime == mtime:
+                return self._index
+            index = {}
+            if mtime is not None:
+                with open(path, encoding="utf-8") as handle:
+                    payload = json.load(handle)
+                for item in payload.get("segments", []):
+                    segment = ArchiveSegment(**item)
+                    index[(segment.table, segment.month)] = segment
+            self._index = index
+            self._index_mtime = mtime
+            return index
+
+    def _write_index(self, index: dict[tuple[str, str], ArchiveSegment]) -> None:
+        payload = {
+            "version": ARCHIVE_INDEX_VERSION,
+            "segments": [index[key].to_dict() for key in sorted(index)],
+        }
+        path = self._index_path()
+        _atomic_write(path, json.dumps(payload, ensure_ascii=False, indent=1).encode("utf-8"))
+        with self._guard:
+            self._index = index
+            self._index_mtime = os.stat(path).st_mtime_ns
+
+    def segment(self, table: str, month: str) -> Optional[ArchiveSegment]:
+        return self._load_index().get((table, month))
+
+    def segments(
+        self,
+        table: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> list[ArchiveSegment]:
+        """Segments of `table` overlapping [start, end), newest month first."""
+        found = [
+            segment for (name, _), segment in self._load_index().items()
+            if name == table and segment.overlaps(start, end)
+        ]
+        return sorted(found, key=lambda segment: segment.month, reverse=True)
+
+    def count_actions(self, table: str, action: str) -> int:
+        return sum(segment.actions.get(action, 0) for segment in self.segments(table))
+
+    def stats(self) -> dict[str, Any]:
+        totals: dict[str, dict[str, int]] = {}
+        for segment in self._load_index().values():
+            total = totals.setdefault(segment.table, {"segments": 0, "rows": 0, "bytes": 0})
+            total["segments"] += 1
+            total["rows"] += segment.rows
+            total["bytes"] += segment.bytes
+        return {
+            "archive_dir": self.root,
+            "tables": totals,
+            "last_run": self.last_run.to_dict() if self.last_run else None,
+        }
+
+    # ---- segments ----
+
+    def iter_segment(self, segment: ArchiveSegment) -> Iterator[dict]:
+        """Rows of a segment newest first by (stored timestamp, id), decompressed line by line."""
+        path = os.path.join(self.root, segment.file)
+        if segment.newest_first:
+            yield from _read_rows(path)
+            return
+        # Segments from before newest-first writes are sorted in memory; the next append rewrites them.
+        key = _row_key(ARCHIVE_TABLES[segment.table].time_column)
+        yield from sorted(_read_rows(path), key=key, reverse=True)
+
+    def iter_rows(
+        self,
+        table: str,
+        filters=None,
+        before: Optional[tuple[str, int]] = None,
+    ) -> Iterator[dict]:
+        """Archived rows newest first; `filters` needs start/end and matches(row, at), `before` is a keyset bound."""
+        time_column = ARCHIVE_TABLES[table].time_column
+        start = getattr(filters, "start", None)
+        end = getattr(filters, "end", None)
+        for segment in self.segments(table, start, end):
+            if before is not None and segment.first_at is not None and segment.first_at > before[0]:
+                continue
+            for row in self.iter_segment(segment):
+                if before is not None and (row[time_column] or "", row["id"]) >= tuple(before):
+                    continue
+                if filters is not None and not filters.matches(row, parse_stored_timestamp(row[time_column])):
+                    continue
+                yield row
+
+    def count_rows(self, table: str, filters) -> int:
+        """Archived rows matching `filters`; whole months are answered from the index."""
+        total = 0
+        field_filters = {
+            name: value for name, value in vars(filters).items()
+            if name not in ("start", "end") and value is not None
+        }
+        for segment in self.segments(table, filters.start, filters.end):
+            if segment.within(filters.start, filters.end):
+                if not field_filters:
+                    total += segment.rows
+                    continue
+                if set(field_filters) == {"action"}:
+                    total += segment.actions.get(field_filters["action"], 0)
+                    continue
+            time_column = ARCHIVE_TABLES[table].time_column
+            total += sum(
+                1 for row in self.iter_segment(segment)
+                if filters.matches(row, parse_stored_timestamp(row[time_column]))
+            )
+        return total
+
+    def append(self, table: str, month: str, rows: Iterable[dict]) -> Optional[ArchiveSegment]:
+        """Merge rows (newest first) into the month's segment and update the index.
+
+        The segment is rewritten in newest-first order so readers can stream it. Rows already in the
+        segment (same id and timestamp, as after a run interrupted before its delete) are skipped.
+        """
+        existing = self.segment(table, month)
+        time_column = ARCHIVE_TABLES[table].time_column
+        key = _row_key(time_column)
+
+        archived = set()
+        if existing is not None:
+            archived = {(row["id"], parse_stored_timestamp(row[time_column])) for row in self.iter_segment(existing)}
+        fresh = (
+            row for row in _ensure_newest_first(rows, key)
+            if (row["id"], parse_stored_timestamp(row[time_column])) not in archived
+        )
+        first = next(fresh, None)
+        if first is None:
+            return existing
+        fresh = itertools.chain([first], fresh)
+
+        segment = ArchiveSegment(
+            table=table,
+            month=month,
+            file=existing.file if existing else f"{table}/{month}.ndjson.gz",
+            newest_first=True,
+        )
+        merged = heapq.merge(self.iter_segment(existing), fresh, key=key, reverse=True) if existing else fresh
+        path = os.path.join(self.root, segment.file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+
+        with open(temp_path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as handle:
+                for row in merged:
+                    handle.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+                    handle.write(b"\n")
+                    segment.count(row, time_column)
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        os.replace(temp_path, path)
+        segment.bytes = os.path.getsize(path)
+        index = dict(self._load_index())
+        index[(table, month)] = segment
+        self._write_index(index)
+        return segment
+
+
+def _row_key(time_column: str) -> Callable[[dict], tuple[str, int]]:
+    return lambda row: (row[time_column] or "", row["id"])
+
+
+def _read_rows(path: str) -> Iterator[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _ensure_newest_first(rows: Iterable[dict], key: Callable[[dict], tuple]) -> Iterator[dict]:
+    previous = None
+    for row in rows:
+        current = key(row)
+        if previous is not None and current > previous:
+            raise ValueError("Archive rows must be appended newest first")
+        previous = current
+        yield row
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+
+
+_run_guard = threading.Lock()
+
+
+def _archive_table(
+    db: Session,
+    store: ArchiveStore,
+    table: ArchiveTable,
+    cutoff: datetime,
+    result: ArchiveRunResult,
+) -> None:
+    time_key = raw_sort_key(table.time_attr)
+    columns = [getattr(table.model, name) for name in table.columns if name != table.time_column]
+    moved = 0
+
+    while True:
+        oldest = db.query(func.min(time_key)).filter(table.time_attr < cutoff).scalar()
+        if oldest is None:
+            break
+
+        month = to_app_timezone(parse_stored_timestamp(oldest)).strftime("%Y-%m")
+        start, end = month_bounds(month)
+        end = min(end, cutoff)
+        existing = store.segment(table.name, month)
+
+        query = (
+            db.query(*columns, time_key.label(table.time_column))
+            .filter(table.time_attr >= start, table.time_attr < end)
+            .order_by(time_key.desc(), table.model.id.desc())
+        )
+
+        # Delete exactly the rows that were read (written, or already in the segment), never an id range.
+        read_ids: list[int] = []
+
+        def read_rows():
+            for row in query.execution_options(yield_per=ARCHIVE_BATCH_SIZE):
+                read_ids.append(row.id)
+                yield dict(row._mapping)
+
+        before = existing.rows if existing else 0
+        segment = store.append(table.name, month, read_rows())
+        if not read_ids:
+            break
+
+        for offset in range(0, len(read_ids), ARCHIVE_DELETE_CHUNK):
+            db.query(table.model).filter(
+                table.model.id.in_(read_ids[offset:offset + ARCHIVE_DELETE_CHUNK]),
+                table.time_attr >= start,
+                table.time_attr < end,
+            ).delete(synchronize_session=False)
+        db.commit()
+
+        written = segment.rows - before if segment else 0
+        moved += written
+        if written:
+            result.segments.append(segment.file)
+
+    result.rows[table.name] = moved
+
+
+def reclaim_space(bind, full_vacuum: bool = False) -> int:
+    """Return freed pages to the filesystem; a full VACUUM also switches old files to incremental mode."""
+    if bind.dialect.name != "sqlite":
+        return 0
+
+    with bind.connect() as connection:
+        if full_vacuum:
+            before = connection.exec_driver_sql("PRAGMA page_count").scalar()
+            if SQLITE_AUTO_VACUUM:
+                connection.exec_driver_sql(f"PRAGMA auto_vacuum={SQLITE_AUTO_VACUUM}")
+            connection.exec_driver_sql("VACUUM")
+            return max(before - connection.exec_driver_sql("PRAGMA page_count").scalar(), 0)
+
+        if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            log.info("🗄️ auto_vacuum is not INCREMENTAL; run a full VACUUM once to reclaim archived space")
+            return 0
+        freed = connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+        # Each step of incremental_vacuum frees one page; executescript steps it to completion.
+        connection.connection.driver_connection.executescript("PRAGMA incremental_vacuum")
+        return freed
+
+
+def run_archive(
+    session_factory: Callable[[], Session] = SessionLocal,
+    store: Optional[ArchiveStore] = None,
+    *,
+    retention_days: int = ARCHIVE_RETENTION_DAYS,
+    now_local: Optional[datetime] = None,
+    full_vacuum: bool = False,
+) -> ArchiveRunResult:
+    """Move whole months older than the retention horizon into the archive, then reclaim space."""
+    store = store or archive_store
+    if not _run_guard.acquire(blocking=False):
+        raise ArchiveBusyError("An archive run is already in progress")
+
+    try:
+        started = time.perf_counter()
+        result = ArchiveRunResult(full_vacuum=full_vacuum)
+        with session_factory() as db:
+            if retention_days > 0:
+                result.cutoff = archive_cutoff(now_local or now_app_timezone(), retention_days)
+                for table in ARCHIVE_TABLES.values():
+                    _archive_table(db, store, table, result.cutoff, result)
+            bind = db.get_bind()
+
+        if result.rows_archived or full_vacuum:
+            result.reclaimed_pages = reclaim_space(bind, full_vacuum)
+        result.duration_ms = (time.perf_counter() - started) * 1000
+        result.finished_at = now_app_timezone()
+        store.last_run = result
+    finally:
+        _run_guard.release()
+
+    if result.rows_archived:
+        log.info(
+            f"🗄️ Archived {result.rows_archived} rows into {len(result.segments)} segment(s), "
+            f"reclaimed {result.reclaimed_pages} pages in {result.duration_ms:.0f}ms"
+        )
+    return result
+
+
+# Global archive store instance
+archive_store = ArchiveStore()
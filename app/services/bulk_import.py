@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass, field
+import io
+import json
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+from app.database import Card, User, generate_uuid
+from app.services.card_uid import (
+    CardUIDNormalizationError,
+    canonicalize_card_uid,
+    card_uid_key,
+    normalize_card_uid_input,
+)
+
+IMPORT_FORMATS = ("csv", "json")
+IMPORT_MAX_ROWS = 5000
+# Keeps IN (...) lists well under SQLite's bound-parameter limit.
+IMPORT_LOOKUP_CHUNK = 500
+
+IMPORT_FIELDS = ("student_id", "name", "email", "telegram_id", "rfid_uid", "ios_scan_text", "nickname")
+FIELD_MAX_LENGTHS = {
+    "student_id": 20,
+    "name": 50,
+    "email": 100,
+    "telegram_id": 50,
+    "nickname": 50,
+}
+USER_FIELDS = ("name", "email", "telegram_id")
+
+
+class BulkImportError(ValueError):
+    """Raised when the uploaded payload as a whole cannot be imported."""
+
+
+@dataclass
+class ImportRowResult:
+    row: int
+    student_id: Optional[str] = None
+    rfid_uid: Optional[str] = None
+    user: Optional[str] = None  # created / updated / unchanged
+    card: Optional[str] = None  # created / exists / None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "row": self.row,
+            "status": "ok" if self.ok else "error",
+            "student_id": self.student_id,
+            "rfid_uid": self.rfid_uid,
+            "user": self.user,
+            "card": self.card,
+            "error": self.error,
+        }
+
+
+@dataclass
+class ImportResult:
+    rows: list[ImportRowResult] = field(default_factory=list)
+    users_created: int = 0
+    users_updated: int = 0
+    cards_created: int = 0
+    dry_run: bool = False
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for row in self.rows if not row.ok)
+
+    def summary(self) -> dict[str, int | bool]:
+        return {
+            "rows": len(self.rows),
+            "errors": self.errors,
+            "users_created": self.users_created,
+            "users_updated": self.users_updated,
+            "cards_created": self.cards_created,
+            "dry_run": self.dry_run,
+        }
+
+
+def detect_import_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".json") or "json" in (content_type or ""):
+        return "json"
+    return "csv"
+
+
+def parse_import_payload(content: bytes, import_format: str) -> list[dict[str, Optional[str]]]:
+    """Decode a CSV (header row) or JSON (list of objects, or {"rows": [...]}) upload into raw rows."""
+    if import_format not in IMPORT_FORMATS:
+        raise BulkImportError("匯入格式僅支援 csv 或 json")
+
+    try:
+        # utf-8-sig also accepts the BOM that Excel (and our own CSV export) writes.
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise BulkImportError("檔案必須為 UTF-8 編碼") from exc
+
+    if import_format == "json":
+        try:
+            payload = json.loads(text)
+        except ValueError as exc:
+            raise BulkImportError(f"JSON 格式錯誤：{exc}") from exc
+        if isinstance(payload, dict):
+            payload = payload.get("rows")
+        if not isinstance(payload, list) or any(not isinstance(item, dict) for item in payload):
+            raise BulkImportError("JSON 必須是物件陣列，或包含 rows 陣列的物件")
+        raw_rows = payload
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or "student_id" not in [name.strip() for name in reader.fieldnames]:
+            raise BulkImportError("CSV 第一列必須是欄位名稱，且包含 student_id")
+        raw_rows = list(reader)
+
+    if len(raw_rows) > IMPORT_MAX_ROWS:
+        raise BulkImportError(f"單次最多匯入 {IMPORT_MAX_ROWS} 筆")
+
+    return [_clean_row(raw) for raw in raw_rows]
+
+
+def _clean_row(raw: dict[str, Any]) -> dict[str, Optional[str]]:
+    cleaned = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        key = str(key).strip()
+        if key not in IMPORT_FIELDS:
+            continue
+        value = "" if value is None else str(value).strip()
+        cleaned[key] = value or None
+    return cleaned
+
+
+def _chunks(values: list, size: int = IMPORT_LOOKUP_CHUNK) -> Iterable[list]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _load_users_by_student_id(db: Session, student_ids: set[str]) -> dict[str, dict[str, Any]]:
+    users = {}
+    for chunk in _chunks(sorted(student_ids)):
+        rows = (
+            db.query(User.id, User.student_id, User.name, User.email, User.telegram_id)
+            .filter(User.student_id.in_(chunk))
+            .all()
+        )
+        for row in rows:
+            users[row.student_id] = dict(row._mapping)
+    return users
+
+
+def _load_card_owners(db: Session, rfid_uids: set[str]) -> dict[int | str, str]:
+    """Owners of existing cards keyed by `card_uid_key`, so padding variants of a UID collide."""
+    owners = {}
+    uid_ints = {canonicalize_card_uid(rfid_uid) for rfid_uid in rfid_uids} - {None}
+    for chunk in _chunks(sorted(uid_ints)):
+        for uid_int, user_id in db.query(Card.uid_int, Card.user_id).filter(Card.uid_int.in_(chunk)):
+            owners[uid_int] = user_id
+    # Exact strings as well: non-decimal UIDs and rows the uid_int backfill has not reached yet
+    for chunk in _chunks(sorted(rfid_uids)):
+        for rfid_uid, user_id in db.query(Card.rfid_uid, Card.user_id).filter(Card.rfid_uid.in_(chunk)):
+            owners.setdefault(card_uid_key(rfid_uid), user_id)
+    return owners
+
+
+def _validate_row(index: int, row: dict[str, Optional[str]]) -> tuple[ImportRowResult, Optional[str]]:
+    result = ImportRowResult(row=index, student_id=row.get("student_id"))
+    if not result.student_id:
+        result.error = "缺少學號"
+        return result, None
+
+    for name, max_length in FIELD_MAX_LENGTHS.items():
+        value = row.get(name)
+        if value and len(value) > max_length:
+            result.error = f"{name} 超過 {max_length} 字元"
+            return result, None
+
+    rfid_uid = None
+    if row.get("rfid_uid") or row.get("ios_scan_text"):
+        try:
+            rfid_uid = normalize_card_uid_input(row.get("rfid_uid"), row.get("ios_scan_text"))
+        except CardUIDNormalizationError as exc:
+            result.error = str(exc)
+            return result, None
+        if len(rfid_uid) > 50:
+            result.error = "卡片 UID 超過 50 字元"
+            return result, None
+        result.rfid_uid = rfid_uid
+    return result, rfid_uid
+
+
+def run_bulk_import(db: Session, rows: list[dict[str, Optional[str]]], *, dry_run: bool = False) -> ImportResult:
+    """Validate and upsert users/cards in the caller's transaction (the caller commits).
+
+    Users are matched by student_id (new ones inserted, changed fields updated); each row
+    may add one card. Lookups against existing data are set-based, writes are executemany.
+    """
+    result = ImportResult(dry_run=dry_run)
+    validated = []
+    for index, row in enumerate(rows, start=1):
+        row_result, rfid_uid = _validate_row(index, row)
+        result.rows.append(row_result)
+        if row_result.ok:
+            validated.append((row_result, row, rfid_uid))
+
+    existing_users = _load_users_by_student_id(db, {row_result.student_id for row_result, _, _ in validated})
+    card_owners = _load_card_owners(db, {rfid_uid for _, _, rfid_uid in validated if rfid_uid})
+
+    new_users: dict[str, dict[str, Any]] = {}
+    user_updates: dict[str, dict[str, Any]] = {}
+    new_cards: list[dict[str, Any]] = []
+    claimed_uids: dict[int | str, tuple[str, int]] = {}  # UID key -> (user_id, row) for cards added by this file
+
+    for row_result, row, rfid_uid in validated:
+        student_id = row_result.student_id
+        existing = existing_users.get(student_id)
+        pending_user = new_users.get(student_id)
+        if existing is None and pending_user is None and not row.get("name"):
+            row_result.error = "新使用者需要姓名"
+            continue
+
+        if existing is not None:
+            user_id = existing["id"]
+        elif pending_user is not None:
+            user_id = pending_user["id"]
+        else:
+            user_id = generate_uuid()
+
+        # Settle the card first so a rejected row changes nothing.
+        card_status = None
+        if rfid_uid is not None:
+            owner = card_owners.get(card_uid_key(rfid_uid))
+            claimed = claimed_uids.get(card_uid_key(rfid_uid))
+            if owner is not None and owner != user_id:
+                row_result.error = "此卡片 UID 已被其他使用者使用"
+                continue
+            if claimed is not None and claimed[0] != user_id:
+                row_result.error = f"卡片 UID 與第 {claimed[1]} 列重複"
+                continue
+            card_status = "exists" if owner == user_id or claimed is not None else "created"
+
+        if existing is None and pending_user is None:
+            new_users[student_id] = {
+                "id": user_id,
+                "student_id": student_id,
+                "name": row["name"],
+                "email": row.get("email"),
+                "telegram_id": row.get("telegram_id"),
+                "is_active": True,
+            }
+            row_result.user = "created"
+        elif existing is None:
+            # Another row for a student created earlier in this file (e.g. a second card)
+            row_result.user = "unchanged"
+        else:
+            changes = {
+                name: row[name]
+                for name in USER_FIELDS
+                if row.get(name) and row[name] != existing.get(name)
+            }
+            if changes:
+                pending = user_updates.setdefault(user_id, {
+                    "user_id": user_id,
+                    **{name: existing.get(name) for name in USER_FIELDS},
+                })
+                pending.update(changes)
+                existing.update(changes)
+            row_result.user = "updated" if changes else "unchanged"
+
+        row_result.card = card_status
+        if card_status == "created":
+            claimed_uids[card_uid_key(rfid_uid)] = (user_id, row_result.row)
+            new_cards.append({
+                "id": generate_uuid(),
+                "rfid_uid": rfid_uid,
+                "uid_int": canonicalize_card_uid(rfid_uid),
+                "user_id": user_id,
+                "nickname": row.get("nickname"),
+                "is_active": True,
+            })
+
+    result.users_created = len(new_users)
+    result.users_updated = len(user_updates)
+    result.cards_created = len(new_cards)
+    if dry_run:
+        return result
+
+    if new_users:
+        db.execute(insert(User), list(new_users.values()))
+    if user_updates:
+        db.execute(
+            update(User.__table__)
+            .where(User.__table__.c.id == bindparam("user_id"))
+            .values({name: bindparam(name) for name in USER_FIELDS}),
+            list(user_updates.values()),
+        )
+    if new_cards:
+        db.execute(insert(Card), new_cards)
+    return result
+
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.database import Card, RegistrationSession, User
+
+# Keeps IN (...) lists well under SQLite's bound-parameter limit.
+BULK_CHUNK_SIZE = 500
+
+ACTION_LABELS = {
+    "delete": "刪除",
+    "activate": "啟用",
+    "deactivate": "停用",
+    "reassign": "轉移",
+}
+TARGET_LABELS = {
+    "users": "位用戶",
+    "cards": "張卡片",
+}
+
+
+@dataclass
+class BulkMutationResult:
+    target: str  # users / cards
+    action: str  # delete / activate / deactivate / reassign
+    requested: int
+    affected_ids: list[str] = field(default_factory=list)
+    missing_ids: list[str] = field(default_factory=list)
+    cards_affected: int = 0  # cards removed alongside deleted users
+    removed_uids: list[str] = field(default_factory=list)
+
+    @property
+    def affected(self) -> int:
+        return len(self.affected_ids)
+
+    def _summary(self) -> str:
+        text = f"{ACTION_LABELS[self.action]} {self.affected} {TARGET_LABELS[self.target]}"
+        if self.target == "users" and self.action == "delete":
+            text += f"及 {self.cards_affected} 張卡片"
+        if self.missing_ids:
+            text += f"（{len(self.missing_ids)} 筆不存在）"
+        return text
+
+    def describe(self) -> str:
+        """Text for the summary DoorEvent."""
+        return f"批量{self._summary()}"
+
+    def to_dict(self) -> dict:
+        return {
+            "message": f"已{self._summary()}",
+            "target": self.target,
+            "action": self.action,
+            "requested": self.requested,
+            "affected": self.affected,
+            "cards_affected": self.cards_affected,
+            "missing_ids": self.missing_ids,
+        }
+
+
+def unique_ids(ids: Iterable[str]) -> list[str]:
+    """Drop blanks and duplicates while keeping the caller's order."""
+    return list(dict.fromkeys(value.strip() for value in ids if value and value.strip()))
+
+
+def _chunks(values: list[str], size: int = BULK_CHUNK_SIZE) -> Iterable[list[str]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _existing_ids(db: Session, column, ids: list[str]) -> set[str]:
+    found = set()
+    for chunk in _chunks(ids):
+        found.update(db.execute(select(column).where(column.in_(chunk))).scalars())
+    return found
+
+
+def _split(db: Session, target: str, action: str, column, ids: list[str]) -> BulkMutationResult:
+    ids = unique_ids(ids)
+    found = _existing_ids(db, column, ids)
+    return BulkMutationResult(
+        target=target,
+        action=action,
+        requested=len(ids),
+        affected_ids=[value for value in ids if value in found],
+        missing_ids=[value for value in ids if value not in found],
+    )
+
+
+def delete_users(db: Session, user_ids: Iterable[str]) -> BulkMutationResult:
+    """Delete users with their cards and registration sessions; the caller commits."""
+    result = _split(db, "users", "delete", User.id, list(user_ids))
+    for chunk in _chunks(result.affected_ids):
+        result.cards_affected += db.execute(
+            select(func.count(Card.id)).where(Card.user_id.in_(chunk))
+        ).scalar()
+        db.execute(delete(RegistrationSession).where(RegistrationSession.user_id.in_(chunk)))
+        db.execute(delete(Card).where(Card.user_id.in_(chunk)))
+        db.execute(delete(User).where(User.id.in_(chunk)))
+    return result
+
+
+def set_users_active(db: Session, user_ids: Iterable[str], active: bool) -> BulkMutationResult:
+    result = _split(db, "users", "activate" if active else "deactivate", User.id, list(user_ids))
+    for chunk in _chunks(result.affected_ids):
+        db.execute(update(User).where(User.id.in_(chunk)).values(is_active=active))
+    return result
+
+
+def delete_cards(db: Session, card_ids: Iterable[str]) -> BulkMutationResult:
+    result = _split(db, "cards", "delete", Card.id, list(card_ids))
+    for chunk in _chunks(result.affected_ids):
+        result.removed_uids.extend(db.execute(select(Card.rfid_uid).where(Card.id.in_(chunk))).scalars())
+        db.execute(delete(Card).where(Card.id.in_(chunk)))
+    return result
+
+
+def set_cards_active(db: Session, card_ids: Iterable[str], active: bool) -> BulkMutationResult:
+    result = _split(db, "cards", "activate" if active else "deactivate", Card.id, list(card_ids))
+    for chunk in _chunks(result.affected_ids):
+        db.execute(update(Card).where(Card.id.in_(chunk)).values(is_active=active))
+    return result
+
+
+def reassign_cards(db: Session, card_ids: Iterable[str], user_id: str) -> BulkMutationResult:
+    """Move cards to another user; the caller has verified that the user exists."""
+    result = _split(db, "cards", "reassign", Card.id, list(card_ids))
+    for chunk in _chunks(result.affected_ids):
+        db.execute(update(Card).where(Card.id.in_(chunk)).values(user_id=user_id))
+    return result
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+import logging
+import threading
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from app.database import Card, User
+from app.services.card_uid import canonicalize_card_uid, card_uid_key
+
+log = logging.getLogger(__name__)
+
+
+def card_uid_clause(value: str):
+    """WHERE clause matching a card by its canonical integer, or by string for non-decimal UIDs.
+
+    The string comparison is kept alongside the integer so rows the backfill has not reached
+    yet still match.
+    """
+    uid_int = canonicalize_card_uid(value)
+    if uid_int is None:
+        return Card.rfid_uid == value.strip()
+    return (Card.uid_int == uid_int) | (Card.rfid_uid == value.strip())
+
+
+@dataclass(frozen=True)
+class CardAuthorization:
+    card_id: str
+    rfid_uid: str
+    user_id: str
+    card_active: bool
+    user_active: bool
+    name: str
+    student_id: str
+    nickname: str | None = None
+
+    @property
+    def is_authorized(self) -> bool:
+        return self.card_active and self.user_active
+
+
+def _build_authorization(card: Card, user: User) -> CardAuthorization:
+    return CardAuthorization(
+        card_id=card.id,
+        rfid_uid=card.rfid_uid,
+        user_id=user.id,
+        card_active=bool(card.is_active),
+        user_active=bool(user.is_active),
+        name=user.name,
+        student_id=user.student_id,
+        nickname=card.nickname,
+    )
+
+
+def _deny_biased(entries: Iterable[CardAuthorization]) -> CardAuthorization:
+    """Pick the entry that answers for a shared canonical UID: a revoked card beats an active one."""
+    return min(entries, key=lambda entry: (entry.is_authorized, entry.card_id))
+
+
+class CardAuthorizationIndex:
+    """In-process UID → authorization map so scans can be decided without SQLite.
+
+    Entries are keyed by `card_uid_key`, so zero-padding variants of a decimal UID hit the same card.
+    Legacy rows that collide on that key (the same UID stored twice with different padding) are kept
+    side by side: an exact-string scan still finds its own card, any other variant gets the deny-biased
+    entry, mirroring how the uid_int backfill leaves such duplicates for an admin to merge.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._by_uid: dict[int | str, CardAuthorization] = {}
+        self._collisions: dict[int | str, dict[str, CardAuthorization]] = {}
+        self._cards_by_user: dict[str, set[str]] = {}
+        self._uid_by_card: dict[str, int | str] = {}
+        self._loaded = False
+        # Bumped on every mutation so snapshot writers can tell when the index changed.
+        self._version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def entries(self) -> tuple[int, list[CardAuthorization]]:
+        """Consistent copy of every entry together with the version it belongs to."""
+        with self._guard:
+            return self._version, list(self._by_uid.values())
+
+    def __len__(self) -> int:
+        return len(self._by_uid)
+
+    def load(self, db: Session) -> int:
+        """Rebuild the whole index from the database."""
+        rows = db.query(Card, User).join(User, Card.user_id == User.id).all()
+        entries = [_build_authorization(card, user) for card, user in rows]
+
+        with self._guard:
+            self._by_uid = {}
+            self._collisions = {}
+            self._cards_by_user = {}
+            self._uid_by_card = {}
+            for entry in entries:
+                self._store_locked(entry)
+            self._loaded = True
+            self._version += 1
+
+        log.info(f"📇 Card authorization index loaded: {len(entries)} cards")
+        return len(entries)
+
+    def get(self, rfid_uid: str) -> CardAuthorization | None:
+        key = card_uid_key(rfid_uid)
+        if key in self._collisions:
+            with self._guard:
+                return self._lookup_locked(rfid_uid)
+        return self._by_uid.get(key)
+
+    def upsert_card(self, card: Card, user: User) -> CardAuthorization:
+        """Insert or replace the entry for a card after its row was committed."""
+        entry = _build_authorization(card, user)
+        with self._guard:
+            previous = self._entry_for_card_locked(entry.card_id)
+            if previous:
+                self._discard_locked(previous)
+            self._store_locked(entry)
+            self._version += 1
+        return entry
+
+    def patch_user(self, user: User) -> int:
+        """Propagate user-level changes (active flag, name, student ID) to every card."""
+        with self._guard:
+            card_ids = list(self._cards_by_user.get(user.id, ()))
+            for card_id in card_ids:
+                entry = self._entry_for_card_locked(card_id)
+                if entry is None:
+                    continue
+                self._store_locked(replace(
+                    entry,
+                    user_active=bool(user.is_active),
+                    name=user.name,
+                    student_id=user.student_id,
+                ))
+            self._version += 1
+            return len(card_ids)
+
+    def set_cards_active(self, card_ids: Iterable[str], active: bool) -> int:
+        """Patch the card-level active flag in place, without reloading every card."""
+        with self._guard:
+            patched = self._patch_cards_locked(card_ids, card_active=bool(active))
+            self._version += 1
+        return patched
+
+    def set_users_active(self, user_ids: Iterable[str], active: bool) -> int:
+        """Patch the user-level active flag on every card of these users."""
+        with self._guard:
+            card_ids = [card_id for user_id in user_ids for card_id in self._cards_by_user.get(user_id, ())]
+            patched = self._patch_cards_locked(card_ids, user_active=bool(active))
+            self._version += 1
+        return patched
+
+    def reassign_cards(self, card_ids: Iterable[str], user: User) -> int:
+        """Move cards to another user after a committed reassignment."""
+        with self._guard:
+            patched = self._patch_cards_locked(
+                card_ids,
+                user_id=user.id,
+                user_active=bool(user.is_active),
+                name=user.name,
+                student_id=user.student_id,
+            )
+            self._version += 1
+        return patched
+
+    def remove_card(self, rfid_uid: str) -> None:
+        with self._guard:
+            entry = self._lookup_locked(rfid_uid)
+            if entry:
+                self._discard_locked(entry)
+            self._version += 1
+
+    def remove_cards(self, rfid_uids: Iterable[str]) -> None:
+        with self._guard:
+            for rfid_uid in rfid_uids:
+                entry = self._lookup_locked(rfid_uid)
+                if entry:
+                    self._discard_locked(entry)
+            self._version += 1
+
+    def remove_user(self, user_id: str) -> None:
+        with self._guard:
+            for card_id in list(self._cards_by_user.get(user_id, ())):
+                entry = self._entry_for_card_locked(card_id)
+                if entry:
+                    self._discard_locked(entry)
+            self._cards_by_user.pop(user_id, None)
+            self._version += 1
+
+    def clear(self) -> None:
+        with self._guard:
+            self._by_uid = {}
+            self._collisions = {}
+            self._cards_by_user = {}
+            self._uid_by_card = {}
+            self._loaded = False
+            self._version += 1
+
+    def _lookup_locked(self, rfid_uid: str) -> CardAuthorization | None:
+        key = card_uid_key(rfid_uid)
+        bucket = self._collisions.get(key)
+        if bucket:
+            exact = rfid_uid.strip()
+            for entry in bucket.values():
+                if entry.rfid_uid.strip() == exact:
+                    return entry
+        return self._by_uid.get(key)
+
+    def _entry_for_card_locked(self, card_id: str) -> CardAuthorization | None:
+        key = self._uid_by_card.get(card_id)
+        if key is None:
+            return None
+        bucket = self._collisions.get(key)
+        if bucket is not None:
+            return bucket.get(card_id)
+        entry = self._by_uid.get(key)
+        return entry if entry is not None and entry.card_id == card_id else None
+
+    def _patch_cards_locked(self, card_ids: Iterable[str], **changes) -> int:
+        patched = 0
+        for card_id in card_ids:
+            entry = self._entry_for_card_locked(card_id)
+            if entry is None:
+                continue
+            updated = replace(entry, **changes)
+            if updated.user_id != entry.user_id:
+                self._forget_user_card_locked(entry)
+            self._store_locked(updated)
+            patched += 1
+        return patched
+
+    def _store_locked(self, entry: CardAuthorization) -> None:
+        key = card_uid_key(entry.rfid_uid)
+        current = self._by_uid.get(key)
+        bucket = self._collisions.get(key)
+        if bucket is None and current is not None and current.card_id != entry.card_id:
+            log.warning(
+                f"⚠️ Cards {current.rfid_uid} and {entry.rfid_uid} share canonical UID {key}; "
+                "other spellings are denied until they are merged"
+            )
+            bucket = self._collisions[key] = {current.card_id: current}
+
+        if bucket is None:
+            self._by_uid[key] = entry
+        else:
+            bucket[entry.card_id] = entry
+            self._by_uid[key] = _deny_biased(bucket.values())
+        self._cards_by_user.setdefault(entry.user_id, set()).add(entry.card_id)
+        self._uid_by_card[entry.card_id] = key
+
+    def _discard_locked(self, entry: CardAuthorization) -> None:
+        key = card_uid_key(entry.rfid_uid)
+        bucket = self._collisions.get(key)
+        if bucket is None:
+            self._by_uid.pop(key, None)
+        else:
+            bucket.pop(entry.card_id, None)
+            self._by_uid[key] = _deny_biased(bucket.values())
+            if len(bucket) == 1:
+                del self._collisions[key]
+        self._uid_by_card.pop(entry.card_id, None)
+        self._forget_user_card_locked(entry)
+
+    def _forget_user_card_locked(self, entry: CardAuthorization) -> None:
+        user_cards = self._cards_by_user.get(entry.user_id)
+        if user_cards is not None:
+            user_cards.discard(entry.card_id)
+            if not user_cards:
+                self._cards_by_user.pop(entry.user_id, None)
+
+
+# Global index instance
+card_index = CardAuthorizationIndex()
@@ -1,5 +1,5 @@
 import re
-from typing import Optional
+from typing import Optional, Union
 
 
 IOS_SERIAL_STATUS_PATTERN = re.compile(
@@ -9,6 +9,10 @@ IOS_SERIAL_STATUS_PATTERN = re.compile(
 IOS_SERIAL_ONLY_PATTERN = re.compile(
     r"^\s*([0-9a-fA-F][0-9a-fA-F](?:[\s:\-]?[0-9a-fA-F][0-9a-fA-F])*)\s*$"
 )
+DECIMAL_UID_PATTERN = re.compile(r"[0-9]+")
+# Readers emit the 4-byte UID as 10 zero-padded decimal digits; the column is a signed 64-bit integer.
+CANONICAL_UID_DIGITS = 10
+CANONICAL_UID_MAX = 2 ** 63 - 1
 
 
 class CardUIDNormalizationError(ValueError):
@@ -60,5 +64,27 @@ def convert_ios_serial_to_rfid_uid(serial_number: str) -> str:
 
     byte_pairs = [compact_serial[index:index + 2] for index in range(0, len(compact_serial), 2)]
     reversed_hex = "".join(reversed(byte_pairs))
-    decimal_uid = int(reversed_hex, 16)
-    return str(decimal_uid).zfill(10)
+    return format_card_uid(int(reversed_hex, 16))
+
+
+def canonicalize_card_uid(value: Optional[str]) -> Optional[int]:
+    """Integer key of a decimal card UID ("0340914674" and "340914674" are the same card).
+
+    Returns None for UIDs in any other format; those keep matching by their exact string.
+    """
+    text = (value or "").strip()
+    if not DECIMAL_UID_PATTERN.fullmatch(text):
+        return None
+    uid_int = int(text)
+    return uid_int if uid_int <= CANONICAL_UID_MAX else None
+
+
+def format_card_uid(uid_int: int) -> str:
+    return str(uid_int).zfill(CANONICAL_UID_DIGITS)
+
+
+def card_uid_key(value: str) -> Union[int, str]:
+    """Hashable lookup key shared by the in-memory indexes: the canonical integer when there is one."""
+    uid_int = canonicalize_card_uid(value)
+    return uid_int if uid_int is not None else value.strip()
+
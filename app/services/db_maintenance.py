@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import ARCHIVE_INTERVAL_SECONDS, SQLITE_WAL_CHECKPOINT_INTERVAL
+from app.database import Card, SessionLocal, checkpoint_wal
+from app.services.archive import ArchiveBusyError, run_archive
+from app.services.card_uid import canonicalize_card_uid
+
+log = logging.getLogger(__name__)
+
+# Rows per backfill transaction; each one holds the write lock only briefly.
+CARD_UID_BACKFILL_CHUNK = 500
+
+
+async def wal_checkpoint_loop(interval: int = SQLITE_WAL_CHECKPOINT_INTERVAL):
+    """Periodically fold the WAL back into the main database file so it does not grow unbounded."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            result = await asyncio.to_thread(checkpoint_wal)
+            if result:
+                busy, wal_frames, checkpointed_frames = result
+                log.debug(f"🗄️ WAL checkpoint: {checkpointed_frames}/{wal_frames} frames (busy={busy})")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            log.error(f"❌ WAL checkpoint failed: {exc}")
+
+
+async def archive_loop(interval: int = ARCHIVE_INTERVAL_SECONDS, initial_delay: int = 60):
+    """Periodically move access logs and door events past the retention horizon into the archive."""
+    await asyncio.sleep(initial_delay)
+    while True:
+        try:
+            await asyncio.to_thread(run_archive)
+        except asyncio.CancelledError:
+            raise
+        except ArchiveBusyError:
+            log.info("🗄️ Archive run skipped: a manual run is in progress")
+        except Exception as exc:
+            log.error(f"❌ Archive run failed: {exc}")
+        await asyncio.sleep(interval)
+
+
+def backfill_card_uid_ints(
+    session_factory: Callable[[], Session] = SessionLocal,
+    chunk_size: int = CARD_UID_BACKFILL_CHUNK,
+    pause: float = 0.05,
+) -> int:
+    """Fill cards.uid_int in short keyset-ordered transactions while the service keeps running.
+
+    Cards whose canonical integer is already taken (the same card stored twice with different
+    zero-padding) are left NULL and logged for an admin to merge.
+    """
+    filled = 0
+    last_id = ""
+    while True:
+        with session_factory() as db:
+            rows = (
+                db.query(Card.id, Card.rfid_uid)
+                .filter(Card.uid_int.is_(None), Card.id > last_id)
+                .order_by(Card.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            candidates = {row.id: canonicalize_card_uid(row.rfid_uid) for row in rows}
+            wanted = {uid_int for uid_int in candidates.values() if uid_int is not None}
+            taken = {
+                uid_int for (uid_int,) in db.query(Card.uid_int).filter(Card.uid_int.in_(sorted(wanted)))
+            } if wanted else set()
+
+            updates = []
+            for row in rows:
+                uid_int = candidates[row.id]
+                if uid_int is None:
+                    continue
+                if uid_int in taken:
+                    log.warning(f"⚠️ Card {row.rfid_uid} duplicates another card's canonical UID {uid_int}; left unindexed")
+                    continue
+                taken.add(uid_int)
+                updates.append({"id": row.id, "uid_int": uid_int})
+
+            if updates:
+                db.execute(update(Card), updates)
+                db.commit()
+                filled += len(updates)
+        time.sleep(pause)
+
+    if filled:
+        log.info(f"🗄️ Backfilled canonical UIDs for {filled} cards")
+    return filled
+
+
+async def run_card_uid_backfill():
+    """Background startup task for `backfill_card_uid_ints`; a failure is retried on the next start."""
+    try:
+        await asyncio.to_thread(backfill_card_uid_ints)
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        log.error(f"❌ Card UID backfill failed: {exc}")
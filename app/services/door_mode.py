@@ -1,16 +1,21 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime, time
+from dataclasses import dataclass, replace
+from datetime import datetime, time, timedelta
 import json
-from typing import Mapping
+import logging
+import threading
+from typing import Callable, Mapping
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.database import DoorControlSettings
-from app.services.gpio_control import force_lock, get_lock_runtime_status, hold_unlock
+from app.database import PRIMARY_DOOR_ID, DoorControlSettings
+from app.services.gpio_control import LockActuator, force_lock, get_lock_runtime_status, hold_unlock
 from app.timezone import app_time_to_utc_naive, now_app_timezone, serialize_datetime
 
+log = logging.getLogger(__name__)
+
 MODE_NORMAL = "normal"
 MODE_ALWAYS_LOCKED = "always_locked"
 MODE_FIRST_SCAN_HOLD = "first_scan_hold"
@@ -71,6 +76,40 @@ class ScheduleEvaluation:
     weekday_mode_overrides: dict[str, str | None]
 
 
+@dataclass(frozen=True)
+class DoorSettingsSnapshot:
+    """Normalised, immutable copy of `DoorControlSettings` for read paths."""
+
+    version: int
+    id: int
+    access_mode: str
+    pending_access_mode: str | None
+    weekday_mode_overrides: dict[str, str | None]
+    pending_weekday_mode_overrides: dict[str, str | None] | None
+    daily_lock_time: str
+    first_unlock_time: str
+    schedule_hold_date: str | None
+    schedule_hold_started_at: datetime | None
+    door_id: str = PRIMARY_DOOR_ID
+
+
+@dataclass
+class _CachedDoorState:
+    bind: object
+    snapshot: DoorSettingsSnapshot
+    evaluation: ScheduleEvaluation
+    valid_from: datetime
+    valid_until: datetime
+
+
+_STATE_CACHE_GUARD = threading.Lock()
+_snapshot_version = 0
+# One entry per door id, filled on first use.
+_cached_states: dict[str, _CachedDoorState] = {}
+# Called with (snapshot, evaluation) whenever the cached mode/schedule state changes.
+_settings_listeners: list[Callable[[DoorSettingsSnapshot, ScheduleEvaluation], None]] = []
+
+
 def is_schedule_access_mode(access_mode: str | None) -> bool:
     return access_mode in SCHEDULE_ACCESS_MODES
 
@@ -167,7 +206,7 @@ def get_weekday_key(now_local: datetime) -> str:
 
 
 def resolve_effective_access_mode(
-    settings: DoorControlSettings,
+    settings: DoorControlSettings | DoorSettingsSnapshot,
     now_local: datetime | None = None,
     *,
     default_access_mode: str | None = None,
@@ -200,7 +239,7 @@ def resolve_effective_access_mode(
 
 
 def resolve_pending_effective_access_mode(
-    settings: DoorControlSettings,
+    settings: DoorControlSettings | DoorSettingsSnapshot,
     now_local: datetime | None = None,
 ) -> EffectiveModeResolution:
     return resolve_effective_access_mode(
@@ -297,11 +336,22 @@ def validate_schedule_config(daily_lock_time: str | None, first_unlock_time: str
     return normalized_daily_lock_time, normalized_first_unlock_time
 
 
-def get_or_create_door_settings(db: Session) -> DoorControlSettings:
-    settings = db.query(DoorControlSettings).first()
+def _query_door_settings(db: Session, door_id: str) -> DoorControlSettings | None:
+    if door_id == PRIMARY_DOOR_ID:
+        # The primary door's row keeps id=1 (its door_id may still be NULL on a database made by older code).
+        return db.get(DoorControlSettings, 1)
+    return db.query(DoorControlSettings).filter(DoorControlSettings.door_id == door_id).first()
+
+
+def get_or_create_door_settings(db: Session, door_id: str = PRIMARY_DOOR_ID) -> DoorControlSettings:
+    settings = _query_door_settings(db, door_id)
     if settings:
         mutated = False
 
+        if settings.door_id != door_id:
+            settings.door_id = door_id
+            mutated = True
+
         normalized_access_mode = normalize_access_mode(settings.access_mode) or MODE_NORMAL
         if settings.access_mode != normalized_access_mode:
             settings.access_mode = normalized_access_mode
@@ -342,8 +392,13 @@ def get_or_create_door_settings(db: Session) -> DoorControlSettings:
             db.refresh(settings)
         return settings
 
+    if door_id == PRIMARY_DOOR_ID:
+        settings_id = 1
+    else:
+        settings_id = max((db.query(func.max(DoorControlSettings.id)).scalar() or 0) + 1, 2)
     settings = DoorControlSettings(
-        id=1,
+        id=settings_id,
+        door_id=door_id,
         access_mode=MODE_NORMAL,
         weekday_mode_overrides=serialize_weekday_mode_overrides(None),
         daily_lock_time=DEFAULT_DAILY_LOCK_TIME,
@@ -361,7 +416,7 @@ def clear_schedule_hold(settings: DoorControlSettings) -> None:
 
 
 def evaluate_schedule(
-    settings: DoorControlSettings,
+    settings: DoorControlSettings | DoorSettingsSnapshot,
     now_local: datetime | None = None,
     *,
     default_access_mode: str | None = None,
@@ -422,12 +477,176 @@ def evaluate_schedule(
     )
 
 
+def snapshot_door_settings(settings: DoorControlSettings) -> DoorSettingsSnapshot:
+    global _snapshot_version
+    with _STATE_CACHE_GUARD:
+        _snapshot_version += 1
+        version = _snapshot_version
+
+    return DoorSettingsSnapshot(
+        version=version,
+        id=settings.id,
+        access_mode=normalize_access_mode(settings.access_mode) or MODE_NORMAL,
+        pending_access_mode=normalize_access_mode(
+            settings.pending_access_mode,
+            field_name="pending_access_mode",
+            allow_none=True,
+        ),
+        weekday_mode_overrides=normalize_weekday_mode_overrides(settings.weekday_mode_overrides),
+        pending_weekday_mode_overrides=(
+            normalize_weekday_mode_overrides(settings.pending_weekday_mode_overrides)
+            if settings.pending_weekday_mode_overrides is not None
+            else None
+        ),
+        daily_lock_time=settings.daily_lock_time or DEFAULT_DAILY_LOCK_TIME,
+        first_unlock_time=settings.first_unlock_time or DEFAULT_FIRST_UNLOCK_TIME,
+        schedule_hold_date=settings.schedule_hold_date,
+        schedule_hold_started_at=settings.schedule_hold_started_at,
+        door_id=settings.door_id or PRIMARY_DOOR_ID,
+    )
+
+
+def get_next_schedule_boundary(
+    settings: DoorControlSettings | DoorSettingsSnapshot,
+    now_local: datetime,
+) -> datetime:
+    """Return the next instant at which `evaluate_schedule` may produce a different result."""
+    next_midnight = datetime.combine(
+        now_local.date() + timedelta(days=1),
+        time(0, 0),
+        tzinfo=now_local.tzinfo,
+    )
+    candidates = [next_midnight]
+
+    try:
+        daily_lock_time, first_unlock_time = validate_schedule_config(
+            settings.daily_lock_time,
+            settings.first_unlock_time,
+        )
+    except ValueError:
+        return next_midnight
+
+    for value in (first_unlock_time, daily_lock_time):
+        boundary = datetime.combine(now_local.date(), parse_time_value(value), tzinfo=now_local.tzinfo)
+        if boundary > now_local:
+            candidates.append(boundary)
+
+    return min(candidates)
+
+
+def add_door_settings_listener(listener: Callable[[DoorSettingsSnapshot, ScheduleEvaluation], None]) -> None:
+    if listener not in _settings_listeners:
+        _settings_listeners.append(listener)
+
+
+def remove_door_settings_listener(listener: Callable[[DoorSettingsSnapshot, ScheduleEvaluation], None]) -> None:
+    if listener in _settings_listeners:
+        _settings_listeners.remove(listener)
+
+
+def _notify_settings_listeners(snapshot: DoorSettingsSnapshot, evaluation: ScheduleEvaluation) -> None:
+    for listener in list(_settings_listeners):
+        try:
+            listener(snapshot, evaluation)
+        except Exception as exc:
+            log.error(f"Door settings listener failed: {exc}")
+
+
+def refresh_door_settings_cache(
+    db: Session,
+    settings: DoorControlSettings | None = None,
+    now_local: datetime | None = None,
+    *,
+    door_id: str = PRIMARY_DOOR_ID,
+) -> tuple[DoorSettingsSnapshot, ScheduleEvaluation]:
+    """Rebuild a door's cached snapshot after its settings were written (or on first use)."""
+    settings = settings or get_or_create_door_settings(db, door_id)
+    snapshot = snapshot_door_settings(settings)
+    now_local = now_local or now_app_timezone()
+    evaluation = evaluate_schedule(snapshot, now_local)
+
+    with _STATE_CACHE_GUARD:
+        _cached_states[snapshot.door_id] = _CachedDoorState(
+            bind=db.get_bind(),
+            snapshot=snapshot,
+            evaluation=evaluation,
+            valid_from=now_local,
+            valid_until=get_next_schedule_boundary(snapshot, now_local),
+        )
+
+    _notify_settings_listeners(snapshot, evaluation)
+    return snapshot, evaluation
+
+
+def get_cached_door_settings_snapshot(door_id: str = PRIMARY_DOOR_ID) -> DoorSettingsSnapshot | None:
+    with _STATE_CACHE_GUARD:
+        state = _cached_states.get(door_id)
+        return state.snapshot if state is not None else None
+
+
+def get_cached_door_settings_snapshots() -> dict[str, DoorSettingsSnapshot]:
+    """Every door's cached snapshot, keyed by door id."""
+    with _STATE_CACHE_GUARD:
+        return {door_id: state.snapshot for door_id, state in _cached_states.items()}
+
+
+def get_next_door_transition(now_local: datetime | None = None) -> datetime | None:
+    """Next instant any door's cached schedule changes phase, or None before a cache is primed."""
+    snapshots = get_cached_door_settings_snapshots()
+    if not snapshots:
+        return None
+    now_local = now_local or now_app_timezone()
+    return min(get_next_schedule_boundary(snapshot, now_local) for snapshot in snapshots.values())
+
+
+def invalidate_door_settings_cache(door_id: str | None = None) -> None:
+    """Drop one door's cached settings, or every door's when no id is given."""
+    with _STATE_CACHE_GUARD:
+        if door_id is None:
+            _cached_states.clear()
+        else:
+            _cached_states.pop(door_id, None)
+
+
+def get_door_settings_state(
+    db: Session,
+    now_local: datetime | None = None,
+    *,
+    door_id: str = PRIMARY_DOOR_ID,
+) -> tuple[DoorSettingsSnapshot, ScheduleEvaluation]:
+    """Return a door's cached settings snapshot and evaluation, touching the DB only on a cold cache."""
+    now_local = now_local or now_app_timezone()
+    with _STATE_CACHE_GUARD:
+        state = _cached_states.get(door_id)
+        same_bind = state is not None and state.bind is db.get_bind()
+        if same_bind and state.valid_from <= now_local < state.valid_until:
+            return state.snapshot, replace(state.evaluation, now_local=now_local)
+
+    if not same_bind:
+        return refresh_door_settings_cache(db, now_local=now_local, door_id=door_id)
+
+    # Crossed a phase boundary: re-evaluate the in-memory snapshot only.
+    snapshot = state.snapshot
+    evaluation = evaluate_schedule(snapshot, now_local)
+    with _STATE_CACHE_GUARD:
+        if _cached_states.get(door_id) is state:
+            state.evaluation = evaluation
+            state.valid_from = now_local
+            state.valid_until = get_next_schedule_boundary(snapshot, now_local)
+    _notify_settings_listeners(snapshot, evaluation)
+    return snapshot, evaluation
+
+
 def activate_schedule_hold(
     db: Session,
     settings: DoorControlSettings | None = None,
     now_local: datetime | None = None,
+    *,
+    door_id: str = PRIMARY_DOOR_ID,
+    actuator: LockActuator | None = None,
 ) -> ScheduleEvaluation:
-    settings = settings or get_or_create_door_settings(db)
+    if not isinstance(settings, DoorControlSettings):
+        settings = get_or_create_door_settings(db, door_id)
     now_local = now_local or now_app_timezone()
 
     settings.schedule_hold_date = now_local.date().isoformat()
@@ -436,18 +655,21 @@ def activate_schedule_hold(
     db.commit()
     db.refresh(settings)
 
-    hold_unlock()
-    return evaluate_schedule(settings, now_local)
+    hold_unlock(actuator)
+    _, evaluation = refresh_door_settings_cache(db, settings, now_local)
+    return evaluation
 
 
 def sync_door_hardware_state(
     db: Session,
     *,
     interrupt_timed_unlock: bool = False,
-) -> tuple[DoorControlSettings, ScheduleEvaluation, dict[str, bool | str | None]]:
-    settings = get_or_create_door_settings(db)
-    evaluation = evaluate_schedule(settings)
-    runtime = get_lock_runtime_status()
+    door_id: str = PRIMARY_DOOR_ID,
+    actuator: LockActuator | None = None,
+) -> tuple[DoorSettingsSnapshot, ScheduleEvaluation, dict[str, bool | str | None]]:
+    """Apply a door's mode and schedule to its relay (`actuator` defaults to the primary door's)."""
+    snapshot, evaluation = get_door_settings_state(db, door_id=door_id)
+    runtime = get_lock_runtime_status(actuator)
 
     mutated = False
     hardware_action = None
@@ -459,6 +681,7 @@ def sync_door_hardware_state(
 
     if evaluation.should_clear_hold:
         cleared_schedule_hold = True
+        settings = get_or_create_door_settings(db, door_id)
         clear_schedule_hold(settings)
 
         if settings.pending_access_mode is not None:
@@ -474,7 +697,7 @@ def sync_door_hardware_state(
         db.add(settings)
         db.commit()
         db.refresh(settings)
-        evaluation = evaluate_schedule(settings, evaluation.now_local)
+        snapshot, evaluation = refresh_door_settings_cache(db, settings, evaluation.now_local)
         mutated = True
 
         if pending_settings_applied:
@@ -498,16 +721,16 @@ def sync_door_hardware_state(
         should_force_lock = current_door_state == "held_open"
 
     if should_hold_open and current_door_state != "held_open":
-        hold_unlock()
+        hold_unlock(actuator)
         hardware_action = "hold_unlock"
     elif should_force_lock and (
         current_door_state == "held_open"
         or (interrupt_timed_unlock and current_door_state == "unlocking")
     ):
-        force_lock()
+        force_lock(actuator)
         hardware_action = "force_lock"
 
-    return settings, evaluation, {
+    return snapshot, evaluation, {
         "mutated": mutated,
         "hardware_action": hardware_action,
         "cleared_schedule_hold": cleared_schedule_hold,
@@ -518,7 +741,7 @@ def sync_door_hardware_state(
 
 
 def serialize_door_settings(
-    settings: DoorControlSettings,
+    settings: DoorControlSettings | DoorSettingsSnapshot,
     evaluation: ScheduleEvaluation | None = None,
 ) -> dict[str, object | None]:
     evaluation = evaluation or evaluate_schedule(settings)
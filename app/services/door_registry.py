@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from functools import partial
+import json
+import logging
+import re
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Optional
+
+from app.config import (
+    DEV_MODE,
+    DOOR_NAME,
+    DOORS_CONFIG,
+    LOCK_ACTIVE_LEVEL,
+    LOCK_DURATION,
+    LOCK_PIN,
+    RFID_DEVICE_PATHS,
+)
+from app.database import PRIMARY_DOOR_ID
+from app.services.gpio_control import LockActuator, lock_actuator, setup_lock_pin
+from app.services.rfid_reader import RFIDReader, rfid_reader
+
+log = logging.getLogger(__name__)
+
+# Door ids appear in URLs, SSE topics and log rows, so keep them short slugs.
+DOOR_ID_PATTERN = re.compile(r"[a-z0-9][a-z0-9_-]{0,49}")
+
+
+class DoorConfigError(ValueError):
+    """Raised when DOORS_CONFIG is malformed or two doors claim the same id, relay pin or reader."""
+
+
+@dataclass(frozen=True)
+class DoorConfig:
+    door_id: str
+    name: str
+    device_paths: tuple[str, ...]
+    lock_pin: int
+    lock_active_level: int = LOCK_ACTIVE_LEVEL
+    lock_duration: float = LOCK_DURATION
+
+
+def primary_door_config() -> DoorConfig:
+    """The door described by the single-door settings (RFID_DEVICE_PATHS, LOCK_PIN, ...)."""
+    return DoorConfig(
+        door_id=PRIMARY_DOOR_ID,
+        name=DOOR_NAME,
+        device_paths=tuple(RFID_DEVICE_PATHS),
+        lock_pin=LOCK_PIN,
+        lock_active_level=LOCK_ACTIVE_LEVEL,
+        lock_duration=LOCK_DURATION,
+    )
+
+
+def parse_doors_config(raw: Optional[str]) -> list[DoorConfig]:
+    """Parse DOORS_CONFIG (an inline JSON array, or the path of a file holding one) into the extra doors."""
+    raw = (raw or "").strip()
+    if not raw:
+        return []
+    if not raw.startswith("["):
+        try:
+            with open(raw, encoding="utf-8") as handle:
+                raw = handle.read()
+        except OSError as exc:
+            raise DoorConfigError(f"Cannot read DOORS_CONFIG file {raw}: {exc}") from exc
+
+    try:
+        payload = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise DoorConfigError(f"DOORS_CONFIG is not valid JSON: {exc}") from exc
+    if not isinstance(payload, list):
+        raise DoorConfigError("DOORS_CONFIG must be a JSON array of doors")
+
+    configs = []
+    for item in payload:
+        if not isinstance(item, dict):
+            raise DoorConfigError("Each DOORS_CONFIG entry must be a JSON object")
+
+        door_id = str(item.get("id") or "").strip()
+        if not DOOR_ID_PATTERN.fullmatch(door_id):
+            raise DoorConfigError(f"Invalid door id {door_id!r} (lowercase letters, digits, '-' and '_')")
+
+        readers = item.get("readers")
+        if isinstance(readers, str):
+            readers = [readers]
+        if not isinstance(readers, list) or not readers or not all(
+            isinstance(path, str) and path.strip() for path in readers
+        ):
+            raise DoorConfigError(f"Door {door_id} needs at least one reader device path")
+
+        try:
+            config = DoorConfig(
+                door_id=door_id,
+                name=str(item.get("name") or door_id),
+                device_paths=tuple(path.strip() for path in readers),
+                lock_pin=int(item["lock_pin"]),
+                lock_active_level=int(item.get("lock_active_level", LOCK_ACTIVE_LEVEL)),
+                lock_duration=float(item.get("lock_duration", LOCK_DURATION)),
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            raise DoorConfigError(f"Door {door_id} needs an integer lock_pin and numeric lock settings") from exc
+        if config.lock_active_level not in (0, 1):
+            raise DoorConfigError(f"Door {door_id}: lock_active_level must be 0 or 1")
+        if config.lock_duration <= 0:
+            raise DoorConfigError(f"Door {door_id}: lock_duration must be positive")
+        configs.append(config)
+
+    return configs
+
+
+def validate_door_configs(configs: Iterable[DoorConfig]) -> None:
+    """Two doors must never share an id, a relay pin or a reader device."""
+    door_ids: set[str] = set()
+    pins: dict[int, str] = {}
+    readers: dict[str, str] = {}
+    for config in configs:
+        if config.door_id in door_ids:
+            raise DoorConfigError(f"Duplicate door id: {config.door_id}")
+        door_ids.add(config.door_id)
+
+        if config.lock_pin in pins:
+            raise DoorConfigError(f"Doors {pins[config.lock_pin]} and {config.door_id} share GPIO {config.lock_pin}")
+        pins[config.lock_pin] = config.door_id
+
+        for path in config.device_paths:
+            if path in readers:
+                raise DoorConfigError(f"Doors {readers[path]} and {config.door_id} share reader {path}")
+            readers[path] = config.door_id
+
+
+class Door:
+    """One entrance: its readers feed scans in, its actuator drives its relay."""
+
+    def __init__(self, config: DoorConfig, actuator: LockActuator, reader: RFIDReader):
+        self.config = config
+        self.actuator = actuator
+        self.reader = reader
+
+    @property
+    def door_id(self) -> str:
+        return self.config.door_id
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+    @property
+    def is_primary(self) -> bool:
+        return self.door_id == PRIMARY_DOOR_ID
+
+    def reader_status(self) -> dict[str, Any]:
+        reader = self.reader
+        return {
+            "rfid_reader_mode": "dev" if reader.dev_mode else "hardware",
+            "rfid_device_connected": True if reader.dev_mode else reader.device is not None,
+            "rfid_device_path": None if reader.dev_mode else reader.device_path,
+            "rfid_connected_devices": [] if reader.dev_mode else sorted(reader.devices),
+            "can_simulate_scan": DEV_MODE and reader.dev_mode,
+        }
+
+    def describe(self) -> dict[str, Any]:
+        """Static configuration plus live relay and reader state, for the door list."""
+        return {
+            "door_id": self.door_id,
+            "door_name": self.name,
+            "is_primary": self.is_primary,
+            "rfid_device_paths": list(self.config.device_paths),
+            **self.actuator.runtime_status(),
+            **self.reader_status(),
+        }
+
+
+class DoorRegistry:
+    """Every door served by this process, keyed by door id; the primary door is always present."""
+
+    def __init__(self, doors: Iterable[Door]):
+        self._doors = {door.door_id: door for door in doors}
+        self.primary = self._doors[PRIMARY_DOOR_ID]
+
+    def get(self, door_id: Optional[str] = None) -> Optional[Door]:
+        """The door with this id (the primary door when no id is given); None for an unknown id."""
+        if not door_id:
+            return self.primary
+        return self._doors.get(door_id)
+
+    def __iter__(self) -> Iterator[Door]:
+        return iter(self._doors.values())
+
+    def __len__(self) -> int:
+        return len(self._doors)
+
+    @property
+    def door_ids(self) -> list[str]:
+        return list(self._doors)
+
+    def label(self, door: Door) -> str:
+        """The door's name for user-facing messages; empty while the system has a single door."""
+        return door.name if len(self) > 1 else ""
+
+    async def run(self, handler: Callable[..., Awaitable[None]]) -> None:
+        """Read every door's readers on this event loop; `handler(card_uid, door=door)` decides each scan.
+
+        Scans at one door are handled in arrival order while different doors proceed concurrently.
+        """
+        log.info(f"🚪 Serving {len(self)} door(s): {', '.join(self.door_ids)}")
+        await asyncio.gather(*(door.reader.read_loop(partial(handler, door=door)) for door in self))
+
+    def close(self) -> None:
+        for door in self:
+            door.actuator.close()
+
+
+def build_door_registry(raw_config: Optional[str] = DOORS_CONFIG) -> DoorRegistry:
+    """The primary door reuses the global actuator and reader; each extra door gets its own."""
+    primary_config = primary_door_config()
+    extra_configs = parse_doors_config(raw_config)
+    validate_door_configs([primary_config, *extra_configs])
+
+    doors = [Door(primary_config, lock_actuator, rfid_reader)]
+    if extra_configs:
+        # With several readers attached, guessing the primary one by name could grab another door's.
+        rfid_reader.auto_detect = False
+    for config in extra_configs:
+        setup_lock_pin(config.lock_pin, config.lock_active_level)
+        actuator = LockActuator(
+            door_id=config.door_id,
+            lock_duration=config.lock_duration,
+            pin=config.lock_pin,
+            active_level=config.lock_active_level,
+        )
+        doors.append(Door(config, actuator, RFIDReader(list(config.device_paths), auto_detect=False)))
+    return DoorRegistry(doors)
+
+
+# Global door registry instance
+door_registry = build_door_registry()
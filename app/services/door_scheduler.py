@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+import logging
+from typing import Awaitable, Callable, Optional
+
+from app.config import DOOR_SCHEDULER_MAX_SLEEP_SECONDS
+from app.services.door_mode import get_next_door_transition
+from app.timezone import now_app_timezone
+
+log = logging.getLogger(__name__)
+
+
+class DoorModeScheduler:
+    """Runs the door-mode enforcement tick exactly at schedule transitions instead of polling."""
+
+    def __init__(
+        self,
+        *,
+        clock: Callable[[], datetime] = now_app_timezone,
+        next_transition: Callable[[datetime], Optional[datetime]] = get_next_door_transition,
+        max_sleep_seconds: float = DOOR_SCHEDULER_MAX_SLEEP_SECONDS,
+    ):
+        self.clock = clock
+        self.next_transition = next_transition
+        self.max_sleep_seconds = max_sleep_seconds
+        self.next_run_at: Optional[datetime] = None
+        self.tick_count = 0
+        self._wake_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def seconds_until_next_run(self, now_local: Optional[datetime] = None) -> float:
+        """Delay before the next tick: the next transition, capped by the safety-net interval."""
+        now_local = now_local or self.clock()
+        next_at = self.next_transition(now_local)
+        cap_at = now_local + timedelta(seconds=self.max_sleep_seconds)
+        if next_at is None or next_at > cap_at:
+            next_at = cap_at
+
+        self.next_run_at = next_at
+        return max((next_at - now_local).total_seconds(), 0.0)
+
+    def wake(self) -> None:
+        """Re-run the tick now, e.g. after the door rules were changed. Safe from any thread."""
+        if self._wake_event is None or self._loop is None:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            self._wake_event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake_event.set)
+
+    async def run(self, tick: Callable[[], Awaitable[None]]) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake_event = asyncio.Event()
+
+        while True:
+            self._wake_event.clear()
+            try:
+                await tick()
+                self.tick_count += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                log.error(f"❌ Door mode scheduler tick failed: {exc}", exc_info=True)
+
+            delay = self.seconds_until_next_run()
+            log.debug(f"⏰ Next door mode transition at {self.next_run_at.isoformat()} ({delay:.1f}s)")
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Global scheduler instance
+door_scheduler = DoorModeScheduler()
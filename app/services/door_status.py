@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+import threading
+from typing import Any, Callable, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.database import PRIMARY_DOOR_ID, DoorEvent
+from app.services.archive import ArchiveStore, archive_store, parse_stored_timestamp
+from app.services.door_mode import (
+    DoorSettingsSnapshot,
+    ScheduleEvaluation,
+    add_door_settings_listener,
+    serialize_door_settings,
+)
+from app.services.door_registry import DoorRegistry, door_registry
+from app.services.event_stream import door_status_events
+from app.timezone import serialize_datetime, utcnow
+
+# Status patches go to one topic per door; the primary door keeps the original topic name.
+DOOR_STATUS_TOPIC = "door"
+DOOR_STATUS_EVENT = "door_status"
+
+# Lock listeners for the non-primary doors, kept so attaching twice does not publish twice.
+_door_lock_publishers: dict[str, Callable[[dict[str, Any]], None]] = {}
+
+
+@dataclass
+class _RemoteUnlockTally:
+    count: int = 0
+    last_at: Optional[datetime] = None
+    last_by: Optional[str] = None
+
+
+class RemoteUnlockCounter:
+    """Per-door remote-unlock count and latest operator, seeded from door_events once and then kept in memory.
+
+    Rows without a door_id predate multi-door support and belong to the primary door.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._loaded = False
+        self._tallies: dict[str, _RemoteUnlockTally] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, db: Session, store: Optional[ArchiveStore] = None) -> None:
+        tallies: dict[str, _RemoteUnlockTally] = {}
+        counts = (
+            db.query(DoorEvent.door_id, func.count(DoorEvent.id))
+            .filter(DoorEvent.action == "remote_unlock")
+            .group_by(DoorEvent.door_id)
+        )
+        for door_id, count in counts:
+            tallies.setdefault(door_id or PRIMARY_DOOR_ID, _RemoteUnlockTally()).count += count
+        for door_id, tally in tallies.items():
+            latest = (
+                db.query(DoorEvent.created_at, DoorEvent.admin_name)
+                .filter(DoorEvent.action == "remote_unlock", _door_clause(door_id))
+                .order_by(DoorEvent.created_at.desc())
+                .first()
+            )
+            if latest:
+                tally.last_at, tally.last_by = latest
+        self._add_archived(tallies, store or archive_store)
+
+        with self._guard:
+            self._tallies = tallies
+            self._loaded = True
+
+    @staticmethod
+    def _add_archived(tallies: dict[str, _RemoteUnlockTally], store: ArchiveStore) -> None:
+        # The index only counts actions per month, so the few segments holding remote unlocks are read
+        # to split them by door; segments and their rows come newest first.
+        for segment in store.segments("door_events"):
+            if not segment.actions.get("remote_unlock"):
+                continue
+            for row in store.iter_segment(segment):
+                if row["action"] != "remote_unlock":
+                    continue
+                tally = tallies.setdefault(row.get("door_id") or PRIMARY_DOOR_ID, _RemoteUnlockTally())
+                tally.count += 1
+                if tally.last_at is None:
+                    tally.last_at, tally.last_by = parse_stored_timestamp(row["created_at"]), row["admin_name"]
+
+    def record(
+        self,
+        admin_name: str,
+        door_id: str = PRIMARY_DOOR_ID,
+        created_at: Optional[datetime] = None,
+    ) -> None:
+        """Count a committed remote_unlock event; a no-op before `load` (which will include it)."""
+        with self._guard:
+            if not self._loaded:
+                return
+            tally = self._tallies.setdefault(door_id, _RemoteUnlockTally())
+            tally.count += 1
+            tally.last_at = created_at or utcnow()
+            tally.last_by = admin_name
+
+    def snapshot(self, db: Optional[Session] = None, door_id: str = PRIMARY_DOOR_ID) -> dict[str, Any]:
+        if not self._loaded and db is not None:
+            self.load(db)
+        with self._guard:
+            tally = self._tallies.get(door_id) or _RemoteUnlockTally()
+            return {
+                "last_remote_unlock_at": serialize_datetime(tally.last_at),
+                "last_remote_unlock_by": tally.last_by,
+                "remote_unlock_count": tally.count,
+            }
+
+    def reset(self) -> None:
+        with self._guard:
+            self._loaded = False
+            self._tallies = {}
+
+
+def _door_clause(door_id: str):
+    if door_id == PRIMARY_DOOR_ID:
+        return or_(DoorEvent.door_id.is_(None), DoorEvent.door_id == PRIMARY_DOOR_ID)
+    return DoorEvent.door_id == door_id
+
+
+def door_status_topic(door_id: str = PRIMARY_DOOR_ID) -> str:
+    return DOOR_STATUS_TOPIC if door_id == PRIMARY_DOOR_ID else f"{DOOR_STATUS_TOPIC}:{door_id}"
+
+
+def publish_door_status(fields: dict[str, Any], door_id: str = PRIMARY_DOOR_ID) -> int:
+    """Push a partial status update (same keys as GET /admin/door/status) to the door's open streams."""
+    return door_status_events.publish(door_status_topic(door_id), DOOR_STATUS_EVENT, fields)
+
+
+def publish_lock_state(runtime_status: dict[str, Any], door_id: str = PRIMARY_DOOR_ID) -> None:
+    publish_door_status(runtime_status, door_id)
+
+
+def publish_door_settings(snapshot: DoorSettingsSnapshot, evaluation: ScheduleEvaluation) -> None:
+    publish_door_status(serialize_door_settings(snapshot, evaluation), snapshot.door_id)
+
+
+def attach_door_status_publishers(registry: Optional[DoorRegistry] = None) -> None:
+    """Publish every door's relay transitions and mode changes as they happen (idempotent)."""
+    for door in registry or door_registry:
+        if door.is_primary:
+            door.actuator.add_listener(publish_lock_state)
+            continue
+        publisher = _door_lock_publishers.setdefault(door.door_id, partial(publish_lock_state, door_id=door.door_id))
+        door.actuator.add_listener(publisher)
+    add_door_settings_listener(publish_door_settings)
+
+
+# Global remote-unlock counter instance
+remote_unlock_counter = RemoteUnlockCounter()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+import json
+import threading
+from typing import Any, Iterator, Optional
+
+from app.config import EVENT_STREAM_QUEUE_SIZE
+
+
+class Subscription:
+    """One listener's bounded queue; the oldest event is dropped when it falls behind."""
+
+    def __init__(self, topic: str, loop: asyncio.AbstractEventLoop, max_queue_size: int):
+        self.topic = topic
+        self.loop = loop
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=max(max_queue_size, 1))
+        self.dropped = 0
+
+    def deliver(self, event: dict[str, Any]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict[str, Any]]:
+        """Next event, or None when `timeout` passes first."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """In-process pub/sub fan-out for Server-Sent Events, keyed by topic (e.g. a user id).
+
+    Publishing never touches the database or blocks; with no subscribers it is a dict lookup.
+    """
+
+    def __init__(self, name: str, max_queue_size: int = EVENT_STREAM_QUEUE_SIZE):
+        self.name = name
+        self.max_queue_size = max_queue_size
+        self._guard = threading.Lock()
+        self._subscriptions: dict[str, set[Subscription]] = defaultdict(set)
+        self._sequence = 0
+        self._published = 0
+        self._delivered = 0
+
+    @contextmanager
+    def subscribe(self, topic: str) -> Iterator[Subscription]:
+        subscription = Subscription(topic, asyncio.get_running_loop(), self.max_queue_size)
+        with self._guard:
+            self._subscriptions[topic].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._guard:
+                listeners = self._subscriptions.get(topic)
+                if listeners is not None:
+                    listeners.discard(subscription)
+                    if not listeners:
+                        del self._subscriptions[topic]
+
+    def publish(self, topic: str, event_type: str, data: dict[str, Any]) -> int:
+        """Fan an event out to the topic's subscribers; returns how many were reached. Thread-safe."""
+        with self._guard:
+            self._sequence += 1
+            self._published += 1
+            listeners = list(self._subscriptions.get(topic, ()))
+            self._delivered += len(listeners)
+            event = {"id": self._sequence, "event": event_type, "data": data}
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        for subscription in listeners:
+            if subscription.loop is running_loop:
+                subscription.deliver(event)
+            else:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+                except RuntimeError:
+                    # The subscriber's loop already closed; its subscription is about to go away.
+                    pass
+        return len(listeners)
+
+    def subscriber_count(self, topic: Optional[str] = None) -> int:
+        with self._guard:
+            if topic is not None:
+                return len(self._subscriptions.get(topic, ()))
+            return sum(len(listeners) for listeners in self._subscriptions.values())
+
+    def stats(self) -> dict[str, int]:
+        with self._guard:
+            subscriptions = [sub for listeners in self._subscriptions.values() for sub in listeners]
+            return {
+                "topics": len(self._subscriptions),
+                "subscribers": len(subscriptions),
+                "published": self._published,
+                "delivered": self._delivered,
+                "dropped": sum(sub.dropped for sub in subscriptions),
+            }
+
+
+def format_sse(event_type: str, data: dict[str, Any], event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+SSE_KEEPALIVE = ": keepalive\n\n"
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # keep nginx from buffering the stream
+}
+
+
+# Global broker instances
+registration_events = EventBroker("registration")
+door_status_events = EventBroker("door_status")
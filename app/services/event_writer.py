@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import logging
+from typing import Any, Callable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import (
+    EVENT_WRITER_BATCH_SIZE,
+    EVENT_WRITER_FLUSH_INTERVAL_MS,
+    EVENT_WRITER_QUEUE_SIZE,
+)
+from app.database import AccessLog, DoorEvent, SessionLocal
+from app.services.stats_rollup import apply_access_rollups
+from app.timezone import utcnow
+
+log = logging.getLogger(__name__)
+
+# Columns stamped at submit time so batching does not shift the recorded time.
+TIMESTAMP_COLUMNS = {
+    AccessLog: "timestamp",
+    DoorEvent: "created_at",
+}
+MAX_WRITE_ATTEMPTS = 4
+# Exponential backoff between attempts, so a short "database is locked" burst is ridden out.
+WRITE_RETRY_BACKOFF_SECONDS = 0.25
+# A batch that exhausts its attempts is held and retried ahead of newer rows after this pause.
+HELD_RETRY_SECONDS = 5.0
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class PendingWrite:
+    model: type
+    values: dict[str, Any]
+
+
+class EventWriter:
+    """Write-behind queue that coalesces AccessLog / DoorEvent inserts into batched transactions."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        *,
+        flush_interval_ms: int = EVENT_WRITER_FLUSH_INTERVAL_MS,
+        batch_size: int = EVENT_WRITER_BATCH_SIZE,
+        max_queue_size: int = EVENT_WRITER_QUEUE_SIZE,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = max(flush_interval_ms, 0) / 1000
+        self.batch_size = max(batch_size, 1)
+        self.max_queue_size = max(max_queue_size, 1)
+        self._queue: asyncio.Queue[PendingWrite] | None = None
+        self._task: asyncio.Task | None = None
+        # Rows whose batch failed every attempt, oldest first; written before anything newer.
+        self._held: list[PendingWrite] = []
+        self._written = 0
+        self._batches = 0
+        self._failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "running": self.running,
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "held": len(self._held),
+            "written": self._written,
+            "batches": self._batches,
+            "failed": self._failed,
+        }
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+        log.info(
+            f"📝 Event writer started (batch {self.batch_size} rows / {int(self.flush_interval * 1000)} ms)"
+        )
+
+    async def stop(self) -> None:
+        """Stop the worker and flush everything still queued."""
+        if self._task is None:
+            return
+        if not self._task.done():
+            # A sentinel (rather than task.cancel()) lets the worker finish its current batch.
+            await self._queue.put(_STOP)
+            await self._task
+        self._task = None
+
+        remaining = [pending for pending in self._drain_queue() if pending is not _STOP]
+        if remaining or self._held:
+            if not await self._write(remaining):
+                self._discard_held("writer stopped")
+        log.info(f"📝 Event writer stopped, {self._written} rows written in {self._batches} batches")
+
+    async def submit(self, model: type, **values: Any) -> None:
+        """Queue a row for insertion; waits when the queue is full (backpressure)."""
+        column = TIMESTAMP_COLUMNS.get(model)
+        if column and values.get(column) is None:
+            values[column] = utcnow()
+
+        pending = PendingWrite(model=model, values=values)
+        if not self.running:
+            # No worker (scripts, tests): write through so nothing is silently queued forever.
+            if not await self._write([pending]):
+                self._discard_held("no writer running")
+            return
+
+        await self._queue.put(pending)
+
+    async def flush(self) -> None:
+        """Write everything currently queued without waiting for the next batch window."""
+        pending = self._drain_queue()
+        if pending or self._held:
+            await self._write(pending)
+
+    def _drain_queue(self) -> list[PendingWrite]:
+        pending = []
+        if self._queue is None:
+            return pending
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return pending
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            try:
+                if self._held:
+                    first = await asyncio.wait_for(self._queue.get(), HELD_RETRY_SECONDS)
+                else:
+                    first = await self._queue.get()
+            except asyncio.TimeoutError:
+                # Nothing new arrived: retry the held rows on their own.
+                await self._write([])
+                continue
+            if first is _STOP:
+                return
+
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if pending is _STOP:
+                    stopping = True
+                    break
+                batch.append(pending)
+
+            await self._write(batch)
+
+    async def _write(self, batch: list[PendingWrite]) -> bool:
+        """Write held rows plus `batch`, backing off between attempts; on failure the rows stay held."""
+        batch = self._held + batch
+        self._held = []
+        for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+            if await asyncio.to_thread(self._write_batch, batch, attempt):
+                return True
+            if attempt < MAX_WRITE_ATTEMPTS:
+                await asyncio.sleep(WRITE_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+        # Keep the rows for the next round instead of dropping them; bounded like the queue itself.
+        overflow = len(batch) - self.max_queue_size
+        if overflow > 0:
+            self._failed += overflow
+            log.error(f"❌ Dropping {overflow} oldest held events, the database has been unwritable too long")
+            batch = batch[overflow:]
+        self._held = batch
+        log.warning(f"⚠️ Holding {len(batch)} events for retry in {HELD_RETRY_SECONDS:g}s")
+        return False
+
+    def _discard_held(self, reason: str) -> None:
+        if self._held:
+            self._failed += len(self._held)
+            log.error(f"❌ Lost {len(self._held)} events ({reason}), the database stayed unwritable")
+            self._held = []
+
+    def _write_batch(self, batch: list[PendingWrite], attempt: int = 1) -> bool:
+        rows_by_model: dict[type, list[dict[str, Any]]] = {}
+        for pending in batch:
+            rows_by_model.setdefault(pending.model, []).append(pending.values)
+
+        with self.session_factory() as db:
+            try:
+                for model, rows in rows_by_model.items():
+                    db.execute(insert(model), rows)
+                if AccessLog in rows_by_model:
+                    # Same transaction, so the stats rollups never drift from access_logs.
+                    apply_access_rollups(db, rows_by_model[AccessLog])
+                db.commit()
+            except Exception as exc:
+                db.rollback()
+                log.error(
+                    f"❌ Failed to write {len(batch)} queued events "
+                    f"(attempt {attempt}/{MAX_WRITE_ATTEMPTS}): {exc}"
+                )
+                return False
+        self._written += len(batch)
+        self._batches += 1
+        return True
+
+
+# Global writer instance
+event_writer = EventWriter()
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+import io
+from itertools import islice
+import json
+import logging
+from types import SimpleNamespace
+from typing import Callable, Iterable, Iterator, Optional
+import zlib
+
+from sqlalchemy.orm import Session
+
+from app.database import PRIMARY_DOOR_ID, DoorEvent, SessionLocal
+from app.services.access_log_query import (
+    ACCESS_LOG_KEYS,
+    AccessLogFilters,
+    build_access_log_query,
+    serialize_access_log_row,
+    serialize_archived_access_logs,
+)
+from app.services.archive import ArchiveStore, archive_store, parse_stored_timestamp
+from app.services.pagination import raw_sort_key
+from app.timezone import serialize_datetime
+
+log = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+ACCESS_LOG_EXPORT_COLUMNS = (
+    "id",
+    "timestamp",
+    "user_id",
+    "student_id",
+    "user_name",
+    "card_id",
+    "rfid_uid",
+    "action",
+    "door_id",
+)
+DOOR_EVENT_EXPORT_COLUMNS = (
+    "id",
+    "created_at",
+    "admin_id",
+    "admin_name",
+    "action",
+    "source",
+    "result",
+    "description",
+    "door_id",
+)
+
+
+@dataclass(frozen=True)
+class DoorEventFilters:
+    admin_id: Optional[str] = None
+    action: Optional[str] = None
+    source: Optional[str] = None
+    start: Optional[datetime] = None  # naive UTC, inclusive
+    end: Optional[datetime] = None  # naive UTC, exclusive
+
+    def clauses(self) -> list:
+        clauses = []
+        if self.admin_id:
+            clauses.append(DoorEvent.admin_id == self.admin_id)
+        if self.action:
+            clauses.append(DoorEvent.action == self.action)
+        if self.source:
+            clauses.append(DoorEvent.source == self.source)
+        if self.start is not None:
+            clauses.append(DoorEvent.created_at >= self.start)
+        if self.end is not None:
+            clauses.append(DoorEvent.created_at < self.end)
+        return clauses
+
+    def matches(self, row: dict, at: Optional[datetime]) -> bool:
+        """Python counterpart of `clauses()` for archived rows (`at` is the parsed created_at)."""
+        for name in ("admin_id", "action", "source"):
+            expected = getattr(self, name)
+            if expected and row.get(name) != expected:
+                return False
+        if self.start is not None and (at is None or at < self.start):
+            return False
+        if self.end is not None and (at is None or at >= self.end):
+            return False
+        return True
+
+
+def serialize_door_event_row(row) -> dict:
+    return {
+        "id": row.id,
+        "admin_id": row.admin_id,
+        "admin_name": row.admin_name,
+        "action": row.action,
+        "source": row.source,
+        "result": row.result,
+        "description": row.description,
+        "door_id": row.door_id or PRIMARY_DOOR_ID,
+        "created_at": serialize_datetime(row.created_at),
+    }
+
+
+def serialize_archived_door_event(row: dict) -> dict:
+    return serialize_door_event_row(SimpleNamespace(**{
+        "door_id": None,
+        **row,
+        "created_at": parse_stored_timestamp(row["created_at"]),
+    }))
+
+
+def iter_access_log_rows(
+    filters: AccessLogFilters,
+    session_factory: Callable[[], Session] = SessionLocal,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    store: Optional[ArchiveStore] = None,
+) -> Iterator[dict]:
+    """Stream access logs newest first, then archived months; the generator owns its session throughout."""
+    with session_factory() as db:
+        query = (
+            build_access_log_query(db, filters)
+            .order_by(*[key.desc() for key in ACCESS_LOG_KEYS])
+            .execution_options(yield_per=batch_size)
+        )
+        for row in query:
+            yield serialize_access_log_row(row)
+
+        archived = (store or archive_store).iter_rows("access_logs", filters)
+        while batch := list(islice(archived, batch_size)):
+            yield from serialize_archived_access_logs(db, batch)
+
+
+def iter_door_event_rows(
+    filters: DoorEventFilters,
+    session_factory: Callable[[], Session] = SessionLocal,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    store: Optional[ArchiveStore] = None,
+) -> Iterator[dict]:
+    """Stream door events newest first, then archived months; the generator owns its session throughout."""
+    with session_factory() as db:
+        query = (
+            db.query(
+                DoorEvent.id,
+                DoorEvent.created_at,
+                DoorEvent.admin_id,
+                DoorEvent.admin_name,
+                DoorEvent.action,
+                DoorEvent.source,
+                DoorEvent.result,
+                DoorEvent.description,
+                DoorEvent.door_id,
+            )
+            .filter(*filters.clauses())
+            .order_by(raw_sort_key(DoorEvent.created_at).desc(), DoorEvent.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        for row in query:
+            yield serialize_door_event_row(row)
+
+    for row in (store or archive_store).iter_rows("door_events", filters):
+        yield serialize_archived_door_event(row)
+
+
+def _encode_csv(rows: Iterable[dict], columns: tuple[str, ...]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+    # BOM so Excel opens the Chinese names as UTF-8
+    buffer.write("\ufeff")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _encode_ndjson(rows: Iterable[dict], columns: tuple[str, ...]) -> Iterator[str]:
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "\n".join(lines) + "\n"
+            lines = []
+            size = 0
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def stream_export(
+    rows: Iterable[dict],
+    columns: tuple[str, ...],
+    export_format: str,
+    compress: bool = False,
+) -> Iterator[bytes]:
+    """Encode rows as CSV/NDJSON in ~64 KiB chunks, optionally gzip-compressed on the fly."""
+    encoder = _encode_csv if export_format == "csv" else _encode_ndjson
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31 -> gzip container
+
+    exported = 0
+    for chunk in encoder(rows, columns):
+        data = chunk.encode("utf-8")
+        exported += len(data)
+        if compressor is None:
+            if data:
+                yield data
+            continue
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+
+    if compressor is not None:
+        yield compressor.flush()
+    log.info(f"📤 Export finished: {exported} bytes of {export_format}{' (gzip)' if compress else ''}")
+
+
+def build_export_filename(prefix: str, export_format: str, compress: bool, now: datetime) -> str:
+    suffix = f".{export_format}.gz" if compress else f".{export_format}"
+    return f"{prefix}_{now.strftime('%Y%m%d-%H%M%S')}{suffix}"
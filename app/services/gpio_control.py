@@ -1,22 +1,15 @@
-import time
+import asyncio
 import logging
 import atexit
 import threading
 from datetime import timedelta
+from typing import Callable, Optional
 
 from app.config import LOCK_PIN, LOCK_ACTIVE_LEVEL, LOCK_DURATION
+from app.database import PRIMARY_DOOR_ID
 from app.timezone import serialize_datetime, utcnow_aware
 
 log = logging.getLogger(__name__)
-LOCK_OPERATION_GUARD = threading.Lock()
-LOCK_STATUS_GUARD = threading.Lock()
-
-_last_unlock_started_at = None
-_last_unlock_finished_at = None
-_unlock_until = None
-_hold_open_started_at = None
-_door_state = "locked"
-_state_token = 0
 
 # GPIO initialization
 GPIO = None
@@ -49,6 +42,15 @@ except Exception as e:
     
     GPIO = MockGPIO()
 
+
+def setup_lock_pin(pin: int, active_level: int = LOCK_ACTIVE_LEVEL) -> None:
+    """Configure another door's relay pin as an output, starting locked."""
+    if not GPIO_AVAILABLE:
+        return
+    GPIO.setup(pin, GPIO.OUT)
+    GPIO.output(pin, GPIO.HIGH if active_level == 0 else GPIO.LOW)
+    log.info(f"GPIO lock pin initialized: GPIO {pin}")
+
 def cleanup_gpio():
     """Cleanup GPIO on exit"""
     if GPIO_AVAILABLE:
@@ -66,98 +68,240 @@ def _serialize_datetime(value):
     return serialize_datetime(value)
 
 
-def _get_relay_levels():
-    active = GPIO.LOW if LOCK_ACTIVE_LEVEL == 0 else GPIO.HIGH
-    inactive = GPIO.HIGH if LOCK_ACTIVE_LEVEL == 0 else GPIO.LOW
+def _get_relay_levels(active_level: int = LOCK_ACTIVE_LEVEL):
+    active = GPIO.LOW if active_level == 0 else GPIO.HIGH
+    inactive = GPIO.HIGH if active_level == 0 else GPIO.LOW
     return active, inactive
 
 
-def _set_relay_state(unlocked: bool):
-    active, inactive = _get_relay_levels()
-    GPIO.output(LOCK_PIN, active if unlocked else inactive)
+def _set_relay_state(unlocked: bool, pin: int = LOCK_PIN, active_level: int = LOCK_ACTIVE_LEVEL):
+    active, inactive = _get_relay_levels(active_level)
+    GPIO.output(pin, active if unlocked else inactive)
 
 
-def get_lock_runtime_status():
-    """Return the current in-memory lock runtime status for UI and diagnostics."""
-    with LOCK_STATUS_GUARD:
-        return {
-            "door_state": _door_state,
-            "gpio_available": GPIO_AVAILABLE,
-            "lock_duration_seconds": LOCK_DURATION,
-            "lock_pin": LOCK_PIN,
-            "lock_active_level": LOCK_ACTIVE_LEVEL,
-            "unlock_until": _serialize_datetime(_unlock_until) if _door_state == "unlocking" else None,
-            "last_unlock_started_at": _serialize_datetime(_last_unlock_started_at),
-            "last_unlock_finished_at": _serialize_datetime(_last_unlock_finished_at),
-            "hold_open_started_at": _serialize_datetime(_hold_open_started_at),
-        }
-
-
-def open_lock():
-    """Unlock the door for specified duration"""
-    with LOCK_OPERATION_GUARD:
-        started_at = _utcnow()
-        with LOCK_STATUS_GUARD:
-            global _last_unlock_started_at, _last_unlock_finished_at, _unlock_until
-            global _hold_open_started_at, _door_state, _state_token
-            _state_token += 1
-            operation_token = _state_token
-            _last_unlock_started_at = started_at
-            _last_unlock_finished_at = None
-            _unlock_until = started_at + timedelta(seconds=LOCK_DURATION)
-            _hold_open_started_at = None
-            _door_state = "unlocking"
-
-        log.info(f"🔓 Unlocking door for {LOCK_DURATION} seconds")
+class LockActuator:
+    """Owns the relay state machine (locked / unlocking / held_open); relocks on a timer, never a sleeping thread."""
+
+    def __init__(
+        self,
+        *,
+        door_id: str = PRIMARY_DOOR_ID,
+        lock_duration: float = LOCK_DURATION,
+        pin: int = LOCK_PIN,
+        active_level: int = LOCK_ACTIVE_LEVEL,
+        relay_writer: Optional[Callable[[bool], None]] = None,
+        clock: Optional[Callable] = None,
+    ):
+        self.door_id = door_id
+        self.lock_duration = lock_duration
+        self.pin = pin
+        self.active_level = active_level
+        self._relay_writer = relay_writer
+        self._clock = clock or _utcnow
+        self._guard = threading.RLock()
+        self._relock_timer = None
+        self._door_state = "locked"
+        self._state_token = 0
+        self._last_unlock_started_at = None
+        self._last_unlock_finished_at = None
+        self._unlock_until = None
+        self._hold_open_started_at = None
+        self._listeners: list[Callable[[dict], None]] = []
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """Call `listener(runtime_status)` after every state transition (from the loop or a timer thread)."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[dict], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    @property
+    def door_state(self) -> str:
+        return self._door_state
+
+    def runtime_status(self) -> dict:
+        with self._guard:
+            return {
+                "door_state": self._door_state,
+                "gpio_available": GPIO_AVAILABLE,
+                "lock_duration_seconds": self.lock_duration,
+                "lock_pin": self.pin,
+                "lock_active_level": self.active_level,
+                "unlock_until": (
+                    _serialize_datetime(self._unlock_until) if self._door_state == "unlocking" else None
+                ),
+                "last_unlock_started_at": _serialize_datetime(self._last_unlock_started_at),
+                "last_unlock_finished_at": _serialize_datetime(self._last_unlock_finished_at),
+                "hold_open_started_at": _serialize_datetime(self._hold_open_started_at),
+            }
+
+    def open_lock(self, duration: Optional[float] = None) -> None:
+        """Start a timed unlock, or extend the one already in progress."""
+        duration = self.lock_duration if duration is None else duration
+        if self.extend_unlock(duration):
+            return
+
+        with self._guard:
+            started_at = self._clock()
+            self._state_token += 1
+            token = self._state_token
+            self._last_unlock_started_at = started_at
+            self._last_unlock_finished_at = None
+            self._unlock_until = started_at + timedelta(seconds=duration)
+            self._hold_open_started_at = None
+            self._door_state = "unlocking"
+            self._write_relay(True)
+            self._schedule_relock(token, duration)
+
+        log.info(f"🔓 Unlocking door for {duration} seconds")
+        if not GPIO_AVAILABLE:
+            log.info(f"(Simulating unlock for {duration} seconds...)")
+        self._notify_listeners()
+
+    def extend_unlock(self, duration: Optional[float] = None) -> bool:
+        """Push back the relock deadline of an unlock in progress; False when the door is not unlocking."""
+        duration = self.lock_duration if duration is None else duration
+        with self._guard:
+            if self._door_state != "unlocking" or self._unlock_until is None:
+                return False
+            self._unlock_until = max(self._unlock_until, self._clock() + timedelta(seconds=duration))
+            unlock_until = self._unlock_until
+
+        log.info(f"🔓 Unlock extended until {_serialize_datetime(unlock_until)}")
+        self._notify_listeners()
+        return True
+
+    def hold_unlock(self) -> None:
+        """Keep the door unlocked until another mode or schedule forces it closed."""
+        with self._guard:
+            started_at = self._clock()
+            self._state_token += 1
+            self._cancel_relock()
+            self._door_state = "held_open"
+            self._last_unlock_started_at = started_at
+            self._last_unlock_finished_at = None
+            self._unlock_until = None
+            if self._hold_open_started_at is None:
+                self._hold_open_started_at = started_at
+            self._write_relay(True)
+
+        log.info("🔓 Door set to held-open state")
+        self._notify_listeners()
+
+    def force_lock(self) -> None:
+        """Immediately force the door back into the locked state."""
+        with self._guard:
+            self._state_token += 1
+            self._cancel_relock()
+            self._door_state = "locked"
+            self._unlock_until = None
+            self._hold_open_started_at = None
+            self._last_unlock_finished_at = self._clock()
+            self._write_relay(False)
+
+        log.info("🔒 Door force-locked")
+        self._notify_listeners()
+
+    def deny_access(self) -> None:
+        """Leave the door locked; the denial is only logged."""
+        log.warning(f"🚫 Access denied at {self.door_id}")
+
+    def close(self) -> None:
+        """Relock a timed unlock that would otherwise outlive the event loop."""
+        with self._guard:
+            unlocking = self._door_state == "unlocking"
+        if unlocking:
+            self.force_lock()
+
+    def _write_relay(self, unlocked: bool) -> None:
+        # Resolved at call time so the module-level writer can be swapped (bench instrumentation).
+        if self._relay_writer is not None:
+            self._relay_writer(unlocked)
+        else:
+            _set_relay_state(unlocked, self.pin, self.active_level)
+
+    def _schedule_relock(self, token: int, delay: float) -> None:
+        self._cancel_relock()
+        delay = max(delay, 0)
         try:
-            _set_relay_state(True)
-            if not GPIO_AVAILABLE:
-                log.info(f"(Simulating unlock for {LOCK_DURATION} seconds...)")
-            time.sleep(LOCK_DURATION)
-        finally:
-            should_lock = False
-            with LOCK_STATUS_GUARD:
-                if _state_token == operation_token and _door_state == "unlocking":
-                    _last_unlock_finished_at = _utcnow()
-                    _unlock_until = None
-                    _door_state = "locked"
-                    should_lock = True
-            if should_lock:
-                _set_relay_state(False)
-                log.info("🔒 Door locked")
-
-
-def hold_unlock():
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            self._relock_timer = loop.call_later(delay, self._relock, token)
+        else:
+            timer = threading.Timer(delay, self._relock, args=(token,))
+            timer.daemon = True
+            timer.start()
+            self._relock_timer = timer
+
+    def _cancel_relock(self) -> None:
+        if self._relock_timer is not None:
+            self._relock_timer.cancel()
+            self._relock_timer = None
+
+    def _relock(self, token: int) -> None:
+        with self._guard:
+            if token != self._state_token or self._door_state != "unlocking":
+                return
+            remaining = (self._unlock_until - self._clock()).total_seconds()
+            if remaining > 0:
+                # The deadline was extended while the timer was pending.
+                self._schedule_relock(token, remaining)
+                return
+
+            self._relock_timer = None
+            self._last_unlock_finished_at = self._clock()
+            self._unlock_until = None
+            self._door_state = "locked"
+            self._write_relay(False)
+
+        log.info("🔒 Door locked")
+        self._notify_listeners()
+
+    def _notify_listeners(self) -> None:
+        if not self._listeners:
+            return
+        status = self.runtime_status()
+        for listener in list(self._listeners):
+            try:
+                listener(status)
+            except Exception as exc:
+                log.error(f"Lock state listener failed: {exc}")
+
+
+# Global actuator instance
+lock_actuator = LockActuator()
+
+
+def get_lock_runtime_status(actuator: Optional[LockActuator] = None):
+    """Return the current in-memory lock runtime status for UI and diagnostics."""
+    return (actuator or lock_actuator).runtime_status()
+
+
+def open_lock(actuator: Optional[LockActuator] = None):
+    """Unlock the door for specified duration (returns immediately; relock is timer-driven)."""
+    (actuator or lock_actuator).open_lock()
+
+
+def extend_unlock(duration: Optional[float] = None, actuator: Optional[LockActuator] = None) -> bool:
+    """Push back the relock deadline of an unlock in progress; False when the door is not unlocking."""
+    return (actuator or lock_actuator).extend_unlock(duration)
+
+
+def hold_unlock(actuator: Optional[LockActuator] = None):
     """Keep the door unlocked until another mode or schedule forces it closed."""
-    started_at = _utcnow()
-    with LOCK_STATUS_GUARD:
-        global _last_unlock_started_at, _last_unlock_finished_at, _unlock_until
-        global _hold_open_started_at, _door_state, _state_token
-        _state_token += 1
-        _door_state = "held_open"
-        _last_unlock_started_at = started_at
-        _last_unlock_finished_at = None
-        _unlock_until = None
-        if _hold_open_started_at is None:
-            _hold_open_started_at = started_at
-
-    _set_relay_state(True)
-    log.info("🔓 Door set to held-open state")
-
-
-def force_lock():
+    (actuator or lock_actuator).hold_unlock()
+
+
+def force_lock(actuator: Optional[LockActuator] = None):
     """Immediately force the door back into the locked state."""
-    with LOCK_STATUS_GUARD:
-        global _last_unlock_finished_at, _unlock_until, _hold_open_started_at, _door_state, _state_token
-        _state_token += 1
-        _door_state = "locked"
-        _unlock_until = None
-        _hold_open_started_at = None
-        _last_unlock_finished_at = _utcnow()
-
-    _set_relay_state(False)
-    log.info("🔒 Door force-locked")
-
-def deny_access():
-    """Log access denial"""
-    log.warning("🚫 Access denied")
+    (actuator or lock_actuator).force_lock()
+
+
+def deny_access(actuator: Optional[LockActuator] = None):
+    """Log an access denial at the actuator's door; the lock stays as it is."""
+    (actuator or lock_actuator).deny_access()
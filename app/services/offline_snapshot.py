@@ -0,0 +1,508 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass
+from datetime import datetime
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Callable, Iterable, Mapping, Optional
+import zlib
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import OFFLINE_JOURNAL_PATH, OFFLINE_SNAPSHOT_PATH
+from app.database import PRIMARY_DOOR_ID, AccessLog, DoorEvent, SessionLocal
+from app.services.card_index import CardAuthorization, card_index
+from app.services.card_uid import card_uid_key, format_card_uid
+from app.services.door_mode import (
+    ACCESS_DECISION_ACTIVATE_HOLD,
+    ACCESS_DECISION_DENY,
+    ACCESS_DECISION_TIMED_UNLOCK,
+    DoorSettingsSnapshot,
+    evaluate_schedule,
+    get_cached_door_settings_snapshot,
+    get_cached_door_settings_snapshots,
+    get_card_access_decision,
+)
+from app.services.stats_rollup import apply_access_rollups
+from app.timezone import APP_TIMEZONE, now_app_timezone, utcnow
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"MOLIAUTH"
+SNAPSHOT_FORMAT_VERSION = 1
+# Keys are NUL-padded to the width of cards.rfid_uid so every entry has the same size.
+UID_WIDTH = 50
+CARD_ID_WIDTH = 36
+NAME_WIDTH = 64
+
+# magic, format version, uid width, entries, users, settings JSON length, generated_at, crc32 of the body
+HEADER = struct.Struct("<8sHHIIIdI")
+# uid, card id, flags, user index
+ENTRY = struct.Struct(f"<{UID_WIDTH}s{CARD_ID_WIDTH}sB3xI")
+# user id, student id, name
+USER = struct.Struct(f"<{CARD_ID_WIDTH}s20s{NAME_WIDTH}s")
+
+FLAG_CARD_ACTIVE = 0x01
+FLAG_USER_ACTIVE = 0x02
+
+REASON_UNKNOWN_CARD = "unknown_card"
+REASON_USER_DISABLED = "user_disabled"
+REASON_CARD_DISABLED = "card_disabled"
+REASON_ACCESS_MODE = "access_mode"
+
+
+class SnapshotFormatError(ValueError):
+    """Raised when a snapshot file is truncated, corrupted or from another format version."""
+
+
+def _pack_text(value: Optional[str], width: int) -> bytes:
+    raw = (value or "").encode("utf-8")[:width]
+    # Never cut a multi-byte character in half.
+    return raw.decode("utf-8", errors="ignore").encode("utf-8")
+
+
+def _unpack_text(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode("utf-8", errors="ignore")
+
+
+def _snapshot_key(rfid_uid: str) -> bytes:
+    """Decimal UIDs are stored zero-padded, so format variants of one card share a key."""
+    key = card_uid_key(rfid_uid)
+    return (format_card_uid(key) if isinstance(key, int) else key).encode("utf-8")
+
+
+def _settings_to_json(door_settings: Optional[Mapping[str, DoorSettingsSnapshot]]) -> bytes:
+    if not door_settings:
+        return b""
+    payload = {}
+    for door_id, settings in door_settings.items():
+        payload[door_id] = asdict(settings)
+        if settings.schedule_hold_started_at is not None:
+            payload[door_id]["schedule_hold_started_at"] = settings.schedule_hold_started_at.isoformat()
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _settings_from_json(raw: bytes) -> dict[str, DoorSettingsSnapshot]:
+    if not raw:
+        return {}
+    payload = json.loads(raw.decode("utf-8"))
+    if "access_mode" in payload:
+        # Written before multi-door support: the primary door's settings alone.
+        payload = {PRIMARY_DOOR_ID: payload}
+
+    door_settings = {}
+    for door_id, fields in payload.items():
+        if fields.get("schedule_hold_started_at"):
+            fields["schedule_hold_started_at"] = datetime.fromisoformat(fields["schedule_hold_started_at"])
+        door_settings[door_id] = DoorSettingsSnapshot(**{**fields, "door_id": door_id})
+    return door_settings
+
+
+def write_snapshot(
+    path: str,
+    entries: Iterable[CardAuthorization],
+    door_settings: Optional[Mapping[str, DoorSettingsSnapshot]] = None,
+) -> int:
+    """Write the binary snapshot atomically (temp file, fsync, rename); returns the entry count."""
+    users: dict[str, int] = {}
+    user_records = []
+    keyed = []
+    for entry in entries:
+        key = _snapshot_key(entry.rfid_uid)
+        if len(key) > UID_WIDTH:
+            log.warning(f"⚠️ Card UID too long for the offline snapshot, skipped: {entry.rfid_uid}")
+            continue
+        if entry.user_id not in users:
+            users[entry.user_id] = len(user_records)
+            user_records.append(USER.pack(
+                entry.user_id.encode("ascii"),
+                _pack_text(entry.student_id, 20),
+                _pack_text(entry.name, NAME_WIDTH),
+            ))
+        flags = (FLAG_CARD_ACTIVE if entry.card_active else 0) | (FLAG_USER_ACTIVE if entry.user_active else 0)
+        keyed.append((key.ljust(UID_WIDTH, b"\0"), entry.card_id.encode("ascii"), flags, users[entry.user_id]))
+
+    keyed.sort(key=lambda item: item[0])
+    settings_blob = _settings_to_json(door_settings)
+    body = b"".join(ENTRY.pack(*item) for item in keyed) + b"".join(user_records) + settings_blob
+    header = HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_FORMAT_VERSION,
+        UID_WIDTH,
+        len(keyed),
+        len(user_records),
+        len(settings_blob),
+        time.time(),
+        zlib.crc32(body),
+    )
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(header)
+        handle.write(body)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+    # Persist the rename itself, so a power cut cannot leave the old name pointing nowhere.
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+    return len(keyed)
+
+
+class AuthorizationSnapshot:
+    """Read-only, memory-mapped view of a snapshot file; lookups binary-search the sorted UID keys."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if size < HEADER.size:
+                raise SnapshotFormatError("Snapshot file is truncated")
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            (magic, version, uid_width, self.entry_count, self.user_count,
+             settings_length, self.generated_at, checksum) = HEADER.unpack_from(self._map, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_FORMAT_VERSION or uid_width != UID_WIDTH:
+                raise SnapshotFormatError("Not a snapshot of this format version")
+            self._users_offset = HEADER.size + self.entry_count * ENTRY.size
+            self._settings_offset = self._users_offset + self.user_count * USER.size
+            if self._settings_offset + settings_length != size:
+                raise SnapshotFormatError("Snapshot file is truncated")
+            if zlib.crc32(self._map[HEADER.size:]) != checksum:
+                raise SnapshotFormatError("Snapshot checksum mismatch")
+            self.door_settings = _settings_from_json(self._map[self._settings_offset:size])
+        except Exception:
+            self._map.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.entry_count
+
+    def _key_at(self, index: int) -> bytes:
+        offset = HEADER.size + index * ENTRY.size
+        return self._map[offset:offset + UID_WIDTH]
+
+    def get(self, rfid_uid: str) -> Optional[CardAuthorization]:
+        key = _snapshot_key(rfid_uid)
+        if len(key) > UID_WIDTH:
+            return None
+        key = key.ljust(UID_WIDTH, b"\0")
+
+        low, high = 0, self.entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.entry_count or self._key_at(low) != key:
+            return None
+
+        _, card_id, flags, user_index = ENTRY.unpack_from(self._map, HEADER.size + low * ENTRY.size)
+        user_id, student_id, name = USER.unpack_from(self._map, self._users_offset + user_index * USER.size)
+        return CardAuthorization(
+            card_id=_unpack_text(card_id),
+            rfid_uid=rfid_uid,
+            user_id=_unpack_text(user_id),
+            card_active=bool(flags & FLAG_CARD_ACTIVE),
+            user_active=bool(flags & FLAG_USER_ACTIVE),
+            name=_unpack_text(name),
+            student_id=_unpack_text(student_id),
+        )
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class OfflineJournal:
+    """Append-only NDJSON log of decisions taken while the database was unavailable."""
+
+    def __init__(self, path: str = OFFLINE_JOURNAL_PATH):
+        self.path = path
+        self._guard = threading.Lock()
+
+    @property
+    def replay_path(self) -> str:
+        return f"{self.path}.replaying"
+
+    def append(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._guard:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def has_pending(self) -> bool:
+        return os.path.exists(self.replay_path) or os.path.exists(self.path)
+
+    def take(self) -> list[dict[str, Any]]:
+        """Move the journal aside for replay (an earlier unfinished replay is resumed first)."""
+        with self._guard:
+            if not os.path.exists(self.replay_path):
+                if not os.path.exists(self.path):
+                    return []
+                os.replace(self.path, self.replay_path)
+
+        records = []
+        with open(self.replay_path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A torn last line from a power cut mid-append.
+                    log.warning("⚠️ Skipping unreadable offline journal line")
+        return records
+
+    def complete(self) -> None:
+        with self._guard:
+            if os.path.exists(self.replay_path):
+                os.remove(self.replay_path)
+
+
+@dataclass(frozen=True)
+class OfflineDecision:
+    card_uid: str
+    access_decision: str
+    reason: str
+    authorization: Optional[CardAuthorization] = None
+    entered_degraded: bool = False
+
+
+class OfflineAuthorizer:
+    """Keeps the snapshot in step with the card index and decides scans from it when SQLite fails."""
+
+    def __init__(
+        self,
+        snapshot_path: str = OFFLINE_SNAPSHOT_PATH,
+        journal_path: str = OFFLINE_JOURNAL_PATH,
+    ):
+        self.snapshot_path = snapshot_path
+        self.journal = OfflineJournal(journal_path)
+        self._guard = threading.Lock()
+        self._snapshot: Optional[AuthorizationSnapshot] = None
+        self._written_version: Optional[tuple[int, Optional[int]]] = None
+        self._degraded_since: Optional[datetime] = None
+        self._decisions = 0
+        self._snapshots_written = 0
+        self._reconciled = 0
+
+    @property
+    def degraded(self) -> bool:
+        return self._degraded_since is not None
+
+    def open(self) -> bool:
+        """Map the snapshot on disk; a missing or damaged file leaves the previous mapping in place."""
+        try:
+            snapshot = AuthorizationSnapshot(self.snapshot_path)
+        except FileNotFoundError:
+            return False
+        except (OSError, SnapshotFormatError) as exc:
+            log.error(f"❌ Offline snapshot unusable ({self.snapshot_path}): {exc}")
+            return False
+
+        with self._guard:
+            previous, self._snapshot = self._snapshot, snapshot
+        if previous is not None:
+            previous.close()
+        log.info(f"📦 Offline snapshot mapped: {len(snapshot)} cards")
+        return True
+
+    def close(self) -> None:
+        with self._guard:
+            snapshot, self._snapshot = self._snapshot, None
+        if snapshot is not None:
+            snapshot.close()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rewrite the snapshot from the in-memory card index when it (or any door's settings) changed."""
+        if not card_index.loaded:
+            return False
+        cached = get_cached_door_settings_snapshots()
+        version, entries = card_index.entries()
+        state = (version, tuple(sorted((door_id, settings.version) for door_id, settings in cached.items())))
+        if not force and state == self._written_version:
+            return False
+        # Keep the last known settings of doors whose cache is not primed yet rather than dropping them.
+        door_settings = {**(self._snapshot.door_settings if self._snapshot is not None else {}), **cached}
+
+        count = write_snapshot(self.snapshot_path, entries, door_settings)
+        self._written_version = state
+        self._snapshots_written += 1
+        self.open()
+        log.debug(f"📦 Offline snapshot written: {count} cards")
+        return True
+
+    def lookup(self, card_uid: str) -> Optional[CardAuthorization]:
+        with self._guard:
+            snapshot = self._snapshot
+        return snapshot.get(card_uid) if snapshot is not None else None
+
+    def _door_settings(self, door_id: str) -> Optional[DoorSettingsSnapshot]:
+        cached = get_cached_door_settings_snapshot(door_id)
+        if cached is not None:
+            return cached
+        with self._guard:
+            return self._snapshot.door_settings.get(door_id) if self._snapshot is not None else None
+
+    def decide(
+        self,
+        card_uid: str,
+        authorization: Optional[CardAuthorization] = None,
+        now_local: Optional[datetime] = None,
+        door_id: str = PRIMARY_DOOR_ID,
+    ) -> OfflineDecision:
+        """Decide a scan without the database and journal it; the caller drives the lock."""
+        authorization = authorization or self.lookup(card_uid)
+        access_decision = ACCESS_DECISION_DENY
+        if authorization is None:
+            reason = REASON_UNKNOWN_CARD
+        elif not authorization.user_active:
+            reason = REASON_USER_DISABLED
+        elif not authorization.card_active:
+            reason = REASON_CARD_DISABLED
+        else:
+            reason = REASON_ACCESS_MODE
+            settings = self._door_settings(door_id)
+            if settings is None:
+                # Never saw the settings: behave like the default (normal) mode.
+                access_decision = ACCESS_DECISION_TIMED_UNLOCK
+            else:
+                evaluation = evaluate_schedule(settings, now_local or now_app_timezone())
+                access_decision = get_card_access_decision(evaluation.effective_access_mode, evaluation.phase)
+            if access_decision == ACCESS_DECISION_ACTIVATE_HOLD:
+                # Holding the door open must be persisted; offline it degrades to a timed unlock.
+                access_decision = ACCESS_DECISION_TIMED_UNLOCK
+
+        with self._guard:
+            entered = self._degraded_since is None
+            if entered:
+                self._degraded_since = now_app_timezone()
+            self._decisions += 1
+
+        record = {
+            "at": utcnow().isoformat(sep=" "),
+            "rfid_uid": card_uid,
+            "decision": access_decision,
+            "reason": reason,
+            "user_id": authorization.user_id if authorization else None,
+            "card_id": authorization.card_id if authorization else None,
+            "door_id": door_id,
+        }
+        try:
+            self.journal.append(record)
+        except OSError as exc:
+            log.error(f"❌ Failed to journal offline decision for {card_uid}: {exc}")
+
+        return OfflineDecision(card_uid, access_decision, reason, authorization, entered)
+
+    def reconcile(self, session_factory: Callable[[], Session] = SessionLocal) -> int:
+        """Replay journaled grants into access_logs; returns the rows written. Raises while the DB is still down."""
+        if not self.journal.has_pending():
+            return 0
+
+        records = self.journal.take()
+        granted = [
+            {
+                "user_id": record["user_id"],
+                "card_id": record["card_id"],
+                "rfid_uid": record["rfid_uid"],
+                "action": "entry",
+                "door_id": record.get("door_id"),
+                "timestamp": datetime.fromisoformat(record["at"]),
+            }
+            for record in records
+            if record.get("decision") != ACCESS_DECISION_DENY and record.get("user_id")
+        ]
+
+        with session_factory() as db:
+            already_replayed = False
+            if granted:
+                # A replay interrupted after its commit must not write the same entries twice.
+                stamps = [row["timestamp"] for row in granted]
+                existing = {
+                    (rfid_uid, timestamp)
+                    for rfid_uid, timestamp in db.query(AccessLog.rfid_uid, AccessLog.timestamp)
+                    .filter(AccessLog.timestamp >= min(stamps), AccessLog.timestamp <= max(stamps))
+                }
+                granted = [row for row in granted if (row["rfid_uid"], row["timestamp"]) not in existing]
+                already_replayed = not granted
+            if granted:
+                db.execute(insert(AccessLog), granted)
+                apply_access_rollups(db, granted)
+            if records and not already_replayed:
+                denied = sum(1 for record in records if record.get("decision") == ACCESS_DECISION_DENY)
+                db.add(DoorEvent(
+                    admin_id=None,
+                    admin_name="系統自動化",
+                    action="offline_reconcile",
+                    source="offline_snapshot",
+                    result="success",
+                    description=(
+                        f"資料庫無法使用期間共 {len(records)} 次離線刷卡判斷"
+                        f"（允許 {len(records) - denied}、拒絕 {denied}），已補寫 {len(granted)} 筆存取紀錄。"
+                    ),
+                ))
+            db.commit()
+
+        self.journal.complete()
+        with self._guard:
+            self._degraded_since = None
+            self._reconciled += len(granted)
+        log.info(f"📦 Offline journal reconciled: {len(records)} decisions, {len(granted)} access logs written")
+        return len(granted)
+
+    def recover(self, session_factory: Callable[[], Session] = SessionLocal) -> None:
+        """One maintenance pass: reload the index if startup missed it, replay the journal, refresh the snapshot."""
+        if not card_index.loaded:
+            with session_factory() as db:
+                card_index.load(db)
+        self.reconcile(session_factory)
+        if self.degraded and not self.journal.has_pending():
+            with self._guard:
+                self._degraded_since = None
+        self.refresh()
+
+    async def run(self, interval: int, session_factory: Callable[[], Session] = SessionLocal) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.recover, session_factory)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                log.error(f"❌ Offline snapshot maintenance failed: {exc}")
+
+    def stats(self) -> dict[str, Any]:
+        with self._guard:
+            snapshot = self._snapshot
+            return {
+                "degraded": self._degraded_since is not None,
+                "degraded_since": self._degraded_since.isoformat() if self._degraded_since else None,
+                "snapshot_cards": len(snapshot) if snapshot is not None else 0,
+                "snapshot_generated_at": (
+                    datetime.fromtimestamp(snapshot.generated_at, APP_TIMEZONE).isoformat() if snapshot is not None else None
+                ),
+                "snapshots_written": self._snapshots_written,
+                "offline_decisions": self._decisions,
+                "reconciled_access_logs": self._reconciled,
+                "journal_pending": self.journal.has_pending(),
+            }
+
+
+# Global offline authorizer instance
+offline_authorizer = OfflineAuthorizer()
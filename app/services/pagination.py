@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import String, tuple_, type_coerce
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def raw_sort_key(column):
+    """Compare a TIMESTAMP column by its stored SQLite text so cursors round-trip exactly.
+
+    Rows written by CURRENT_TIMESTAMP and by Python differ in precision; comparing the
+    stored text keeps cursor comparisons consistent with ORDER BY. No CAST is emitted,
+    so indexes on the column still apply.
+    """
+    return type_coerce(column, String)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError) as exc:
+        raise InvalidCursorError("Malformed cursor") from exc
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("Cursor does not match this listing")
+    if any(not isinstance(value, (str, int, float)) for value in values):
+        raise InvalidCursorError("Cursor does not match this listing")
+    return values
+
+
+def clamp_page_size(page_size: Optional[int]) -> int:
+    if not page_size or page_size < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def paginate_keyset(
+    query: Query,
+    keys: Sequence,
+    *,
+    page_size: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> tuple[list, Optional[str]]:
+    """Fetch one page ordered by `keys` (last key must be unique) plus the cursor for the next page.
+
+    Rows come back with the key values appended as `_keyset_<n>` columns.
+    """
+    labels = [key.label(f"_keyset_{index}") for index, key in enumerate(keys)]
+    query = query.add_columns(*labels)
+
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        position = tuple_(*keys)
+        boundary = tuple_(*values)
+        query = query.filter(position < boundary if descending else position > boundary)
+
+    ordering = [key.desc() if descending else key.asc() for key in keys]
+    rows = query.order_by(*ordering).limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, f"_keyset_{index}") for index in range(len(keys))])
+    return rows, next_cursor
+
+
+def build_page(items: list, next_cursor: Optional[str], total: Optional[int] = None) -> dict:
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        "total": total,
+    }
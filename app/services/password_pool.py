@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+from app.config import PASSWORD_HASH_QUEUE_TIMEOUT, PASSWORD_HASH_WORKERS
+from app.services.auth import hash_password, verify_password
+
+log = logging.getLogger(__name__)
+
+
+class PasswordPoolBusyError(RuntimeError):
+    """Raised when a password job waits longer than the queue timeout for a worker."""
+
+
+class PasswordWorkerPool:
+    """Runs bcrypt hashing/verification on a small dedicated thread pool, off the event loop."""
+
+    def __init__(
+        self,
+        max_workers: int = PASSWORD_HASH_WORKERS,
+        queue_timeout: float = PASSWORD_HASH_QUEUE_TIMEOUT,
+    ):
+        self.max_workers = max(max_workers, 1)
+        self.queue_timeout = max(queue_timeout, 0.0)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._guard = threading.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "max_workers": self.max_workers,
+            "queue_timeout": self.queue_timeout,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run `func(*args)` on a worker; raises PasswordPoolBusyError after waiting `queue_timeout`."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(loop)
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout or None)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise PasswordPoolBusyError(
+                f"No password worker free within {self.queue_timeout:g}s"
+            ) from None
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        try:
+            # Permits equal workers, so the job starts immediately instead of queueing in the executor.
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            semaphore.release()
+
+    async def verify(self, plain_password: str, password_hash: str) -> bool:
+        return await self.run(verify_password, plain_password, password_hash)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    def close(self) -> None:
+        with self._guard:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._guard:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-worker",
+                )
+            return self._executor
+
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        # asyncio primitives bind to one loop; rebuild when a new loop (tests, scripts) shows up.
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+
+# Global password worker pool instance
+password_pool = PasswordWorkerPool()
@@ -5,12 +5,29 @@ from sqlalchemy.orm import Session
 
 from app.config import REGISTER_TIMEOUT
 from app.database import Card, RegistrationSession
-from app.timezone import utcnow
+from app.services.event_stream import registration_events
+from app.timezone import serialize_datetime, utcnow
 
 REGISTRATION_STATUS_WAITING_FOR_FIRST_SCAN = "waiting_for_first_scan"
 REGISTRATION_STATUS_WAITING_FOR_SECOND_SCAN = "waiting_for_second_scan"
 REGISTRATION_STATUS_CARD_MISMATCH_RESET = "card_mismatch_reset"
 REGISTRATION_STATUS_COMPLETED = "completed"
+REGISTRATION_STATUS_TIMED_OUT = "timed_out"
+
+REGISTRATION_STATUS_MESSAGES = {
+    REGISTRATION_STATUS_WAITING_FOR_FIRST_SCAN: "請刷卡第一次",
+    REGISTRATION_STATUS_WAITING_FOR_SECOND_SCAN: "很好！請再刷一次相同的卡片",
+    REGISTRATION_STATUS_CARD_MISMATCH_RESET: "卡片不一致，已重設，請重新刷第一次",
+    REGISTRATION_STATUS_COMPLETED: "綁定完成",
+    REGISTRATION_STATUS_TIMED_OUT: "綁定逾時",
+}
+
+# SSE event name for registration status pushes (same shape as GET /check_status)
+REGISTRATION_EVENT = "registration"
+
+
+def count_user_cards(db: Session, user_id: str) -> int:
+    return db.query(Card).filter(Card.user_id == user_id).count()
 
 
 def get_active_registration_sessions(
@@ -57,6 +74,8 @@ def start_registration_session(
 
     Returns a tuple of `(session, conflicting_session)`. A conflicting session
     means another user already has an active binding flow, and no changes were made.
+    With `commit=False` the caller owns the transaction and must call
+    `publish_registration_status(session, session.initial_card_count)` once it has committed.
     """
     if now is None:
         now = utcnow()
@@ -70,7 +89,7 @@ def start_registration_session(
     if conflicting_session:
         return None, conflicting_session
 
-    initial_card_count = db.query(Card).filter(Card.user_id == user_id).count()
+    initial_card_count = count_user_cards(db, user_id)
     expires_at = now + timedelta(seconds=REGISTER_TIMEOUT)
 
     session = db.query(RegistrationSession).filter(
@@ -101,6 +120,49 @@ def start_registration_session(
     if commit:
         db.commit()
         db.refresh(session)
+        publish_registration_status(session, initial_card_count)
     else:
         db.flush()
     return session, None
+
+
+def build_registration_status(session: RegistrationSession, card_count: int) -> dict:
+    """Status payload for a session as of its last transition (expiry is left to the reader).
+
+    Both /check_status and the status stream are built here, so they always carry the same fields.
+    """
+    if session.completed:
+        payload = {
+            "bound": True,
+            "card_count": card_count,
+            "binding_in_progress": False,
+            "initial_count": session.initial_card_count,
+            "step": 2,
+            "status_message": REGISTRATION_STATUS_MESSAGES[REGISTRATION_STATUS_COMPLETED],
+            "last_status": REGISTRATION_STATUS_COMPLETED,
+        }
+    else:
+        last_status = session.last_status or (
+            REGISTRATION_STATUS_WAITING_FOR_SECOND_SCAN if session.step == 1
+            else REGISTRATION_STATUS_WAITING_FOR_FIRST_SCAN
+        )
+        payload = {
+            "bound": False,
+            "card_count": card_count,
+            "binding_in_progress": True,
+            "initial_count": session.initial_card_count,
+            "step": session.step,
+            "status_message": REGISTRATION_STATUS_MESSAGES.get(last_status, "處理中..."),
+            "last_status": last_status,
+            "expires_at": serialize_datetime(session.expires_at),
+        }
+    return payload
+
+
+def publish_registration_status(session: RegistrationSession, card_count: int) -> int:
+    """Push the session's current state to open status streams for its user."""
+    return registration_events.publish(
+        session.user_id,
+        REGISTRATION_EVENT,
+        build_registration_status(session, card_count),
+    )
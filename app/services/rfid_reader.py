@@ -1,9 +1,9 @@
 import asyncio
 import logging
 import os
-from typing import Optional, Callable
+from typing import Any, Awaitable, Callable, Optional
 
-from app.config import RFID_DEVICE_PATH, DEV_MODE
+from app.config import RFID_DEVICE_PATHS, RFID_RECONNECT_INTERVAL, DEV_MODE
 
 log = logging.getLogger(__name__)
 
@@ -23,54 +23,57 @@ SCANCODE_MAP = {
     2: '1', 3: '2', 4: '3', 5: '4', 6: '5',
     7: '6', 8: '7', 9: '8', 10: '9', 11: '0'
 }
+# evdev constants, kept local so fake event sources work without evdev installed
+EV_KEY = 1
+KEY_DOWN = 1
+KEY_ENTER = 28
+
 
 class RFIDReader:
-    def __init__(self):
-        self.device: Optional[InputDevice] = None
-        self.device_path = RFID_DEVICE_PATH
-        self.current_code = ""
-        self.callback: Optional[Callable] = None
-        self.loop: Optional[asyncio.AbstractEventLoop] = None
-        self.dev_mode = DEV_MODE or not os.path.exists("/dev/input")
+    def __init__(
+        self,
+        device_paths: Optional[list[str]] = None,
+        *,
+        device_opener: Optional[Callable[[str], Any]] = None,
+        reconnect_interval: float = RFID_RECONNECT_INTERVAL,
+        dev_mode: Optional[bool] = None,
+        auto_detect: bool = True,
+    ):
+        self.device_paths = list(device_paths or RFID_DEVICE_PATHS)
+        self.device_path = self.device_paths[0] if self.device_paths else None
+        self.devices: dict[str, Any] = {}
+        self.device_opener = device_opener or self.open_device
+        self.reconnect_interval = reconnect_interval
+        # Fall back to the first device that looks like a reader when the single configured path is missing
+        self.auto_detect = auto_detect
+        self.callback: Optional[Callable[[str], Awaitable[None]]] = None
+        self.dev_mode = (DEV_MODE or not os.path.exists("/dev/input")) if dev_mode is None else dev_mode
 
         if self.dev_mode:
             log.info("🔧 RFID Reader in DEVELOPMENT MODE - use /dev/simulate-scan API")
 
-    def initialize_device(self) -> bool:
-        """Initialize RFID device"""
-        if self.dev_mode:
-            log.info("⚠️ Skipping RFID device initialization (dev mode)")
-            return False
+    @property
+    def device(self):
+        """First connected device (None while every reader is unplugged)."""
+        return next(iter(self.devices.values()), None)
 
+    def open_device(self, path: str):
+        """Open an RFID input device, auto-detecting it when a single configured path is missing."""
         if not EVDEV_AVAILABLE:
-            log.error("evdev module not available - cannot initialize RFID device")
-            return False
+            raise RuntimeError("evdev module not available - cannot open RFID device")
 
-        try:
-            # Try specified path first
-            if os.path.exists(self.device_path):
-                self.device = InputDevice(self.device_path)
-                log.info(f"📡 RFID device connected: {self.device.name} at {self.device_path}")
-                return True
-
-            # Auto-detect RFID device
-            log.warning(f"Specified device path not found: {self.device_path}")
-            log.info("Attempting to auto-detect RFID device...")
-
-            devices = [InputDevice(path) for path in list_devices()]
-            for dev in devices:
+        if os.path.exists(path):
+            return InputDevice(path)
+
+        if self.auto_detect and len(self.device_paths) == 1:
+            for candidate in list_devices():
+                dev = InputDevice(candidate)
                 if 'rfid' in dev.name.lower() or 'sycreader' in dev.name.lower():
-                    self.device = dev
-                    self.device_path = dev.path
                     log.info(f"📡 Auto-detected RFID device: {dev.name} at {dev.path}")
-                    return True
+                    return dev
+                dev.close()
 
-            log.error("No RFID device found")
-            return False
-
-        except Exception as e:
-            log.error(f"Failed to initialize RFID device: {e}")
-            return False
+        raise FileNotFoundError(f"RFID device not found: {path}")
 
     async def simulate_scan(self, card_uid: str):
         """開發模式：模擬 RFID 刷卡"""
@@ -85,7 +88,7 @@ class RFIDReader:
             log.warning("⚠️ No callback registered for RFID reader")
             return False
 
-    async def read_loop(self, callback: Callable[[str], None]):
+    async def read_loop(self, callback: Callable[[str], Awaitable[None]]):
         """
         Async RFID reading loop
         callback: async function to call when card is scanned
@@ -97,35 +100,63 @@ class RFIDReader:
             # Keep the loop alive but don't actually read from device
             while True:
                 await asyncio.sleep(1)
-            return
 
-        if not self.initialize_device():
-            log.error("Cannot start RFID loop without device")
+        if not self.device_paths:
+            log.error("Cannot start RFID loop without a device path")
             return
 
-        self.loop = asyncio.get_event_loop()
-        log.info("RFID reader loop started")
-
+        log.info(f"RFID reader loop started ({len(self.device_paths)} device path(s))")
+        await asyncio.gather(*(self._watch_device(path) for path in self.device_paths))
+
+    async def _watch_device(self, path: str):
+        """Read one device forever, reopening it whenever it is unplugged."""
+        reported_missing = False
+        while True:
+            try:
+                device = self.device_opener(path)
+            except Exception as e:
+                if not reported_missing:
+                    log.error(f"Failed to open RFID device {path}: {e}, retrying every {self.reconnect_interval}s")
+                    reported_missing = True
+                await asyncio.sleep(self.reconnect_interval)
+                continue
+
+            reported_missing = False
+            self.devices[path] = device
+            self.device_path = getattr(device, "path", path)
+            log.info(f"📡 RFID device connected: {device.name} at {self.device_path}")
+            try:
+                await self._consume_events(device)
+                log.warning(f"RFID device event stream ended: {path}")
+            except OSError as e:
+                log.warning(f"📡 RFID device disconnected: {path} ({e})")
+            finally:
+                self.devices.pop(path, None)
+                try:
+                    device.close()
+                except Exception:
+                    pass
+
+            await asyncio.sleep(self.reconnect_interval)
+
+    async def _consume_events(self, device):
+        digits: list[str] = []
+        async for event in device.async_read_loop():
+            if event.type != EV_KEY or event.value != KEY_DOWN:
+                continue
+            if event.code == KEY_ENTER:
+                if digits:
+                    card_uid = "".join(digits)
+                    digits.clear()
+                    await self._dispatch(card_uid)
+            elif event.code in SCANCODE_MAP:
+                digits.append(SCANCODE_MAP[event.code])
+
+    async def _dispatch(self, card_uid: str):
         try:
-            # Run blocking read_loop in executor
-            await self.loop.run_in_executor(None, self._blocking_read_loop)
+            await self.callback(card_uid)
         except Exception as e:
-            log.error(f"RFID read loop error: {e}")
-
-    def _blocking_read_loop(self):
-        """Blocking read loop (runs in executor)"""
-        for event in self.device.read_loop():
-            if event.type == ecodes.EV_KEY and event.value == 1:  # Key down
-                if event.code == 28:  # Enter key
-                    if self.current_code:
-                        # Schedule callback in main event loop
-                        asyncio.run_coroutine_threadsafe(
-                            self.callback(self.current_code),
-                            self.loop
-                        )
-                        self.current_code = ""
-                elif event.code in SCANCODE_MAP:
-                    self.current_code += SCANCODE_MAP[event.code]
+            log.error(f"RFID scan handler failed for {card_uid}: {e}", exc_info=True)
 
 # Global reader instance
 rfid_reader = RFIDReader()
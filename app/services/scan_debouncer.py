@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+from app.config import SCAN_DEBOUNCE_SECONDS
+from app.services.card_uid import card_uid_key
+
+
+class ScanDebouncer:
+    """Collapses repeated scans of the same card at the same door inside a short window.
+
+    UIDs are keyed by `card_uid_key`, so zero-padding variants of one card count as repeats.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = SCAN_DEBOUNCE_SECONDS,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window_seconds = max(window_seconds, 0.0)
+        self.clock = clock
+        self._guard = threading.Lock()
+        self._last_seen: dict[tuple[Optional[str], int | str], float] = {}
+        self._accepted = 0
+        self._suppressed = 0
+
+    def should_process(self, card_uid: str, door_id: Optional[str] = None) -> bool:
+        """False when the same UID was accepted at the same door less than the window ago."""
+        if self.window_seconds <= 0:
+            return True
+
+        key = (door_id, card_uid_key(card_uid))
+        now = self.clock()
+        with self._guard:
+            last_seen = self._last_seen.get(key)
+            if last_seen is not None and now - last_seen < self.window_seconds:
+                self._suppressed += 1
+                return False
+
+            self._prune_locked(now)
+            self._last_seen[key] = now
+            self._accepted += 1
+            return True
+
+    def reset(self) -> None:
+        with self._guard:
+            self._last_seen.clear()
+
+    def stats(self) -> dict[str, float | int]:
+        with self._guard:
+            return {
+                "window_seconds": self.window_seconds,
+                "tracked_uids": len(self._last_seen),
+                "accepted": self._accepted,
+                "suppressed": self._suppressed,
+            }
+
+    def _prune_locked(self, now: float) -> None:
+        expired = [key for key, seen_at in self._last_seen.items() if now - seen_at >= self.window_seconds]
+        for key in expired:
+            del self._last_seen[key]
+
+
+# Global debouncer instance
+scan_debouncer = ScanDebouncer()
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+import logging
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import bindparam, delete, func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.database import AccessDailyStat, AccessLog, SessionLocal, UserDailyPresence
+from app.services.archive import ArchiveStore, archive_store, parse_stored_timestamp
+from app.timezone import to_app_timezone
+
+log = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 5000
+GRANULARITIES = ("day", "week", "month")
+MAX_TIMESERIES_BUCKETS = 400
+
+_DAILY = AccessDailyStat.__table__
+_PRESENCE = UserDailyPresence.__table__
+
+# Plain SQL so the statements hit the compiled cache; dialect upsert constructs are recompiled per call.
+DAILY_UPSERT = text(
+    "INSERT INTO access_daily_stats (day, access_count, unique_users) VALUES (:day, :access_count, 0) "
+    "ON CONFLICT (day) DO UPDATE SET access_count = access_count + excluded.access_count"
+)
+PRESENCE_UPSERT = text(
+    "INSERT INTO user_daily_presence (day, user_id, access_count, first_seen_at, last_seen_at) "
+    "VALUES (:day, :user_id, :access_count, :first_seen_at, :last_seen_at) "
+    "ON CONFLICT (day, user_id) DO UPDATE SET "
+    "access_count = access_count + excluded.access_count, "
+    "first_seen_at = min(first_seen_at, excluded.first_seen_at), "
+    "last_seen_at = max(last_seen_at, excluded.last_seen_at)"
+).bindparams(
+    bindparam("first_seen_at", type_=_PRESENCE.c.first_seen_at.type),
+    bindparam("last_seen_at", type_=_PRESENCE.c.last_seen_at.type),
+)
+
+
+def local_day(timestamp: datetime) -> str:
+    """Map a stored (naive UTC) timestamp to its Asia/Taipei calendar day."""
+    return to_app_timezone(timestamp).date().isoformat()
+
+
+def apply_access_rollups(db: Session, rows: Iterable[dict[str, Any]]) -> int:
+    """Fold newly written access log rows into the rollups inside the caller's transaction.
+
+    Each row needs `timestamp` (naive UTC) and `user_id`. Returns the number of rows applied.
+    """
+    daily: dict[str, int] = {}
+    presence: dict[tuple[str, str], list] = {}
+    applied = 0
+    for row in rows:
+        timestamp = row.get("timestamp")
+        if timestamp is None:
+            continue
+        day = local_day(timestamp)
+        daily[day] = daily.get(day, 0) + 1
+        applied += 1
+
+        user_id = row.get("user_id")
+        if not user_id:
+            continue
+        entry = presence.get((day, user_id))
+        if entry is None:
+            presence[(day, user_id)] = [1, timestamp, timestamp]
+        else:
+            entry[0] += 1
+            entry[1] = min(entry[1], timestamp)
+            entry[2] = max(entry[2], timestamp)
+
+    if not daily:
+        return 0
+
+    db.execute(
+        DAILY_UPSERT,
+        [{"day": day, "access_count": count} for day, count in daily.items()],
+    )
+    if presence:
+        db.execute(
+            PRESENCE_UPSERT,
+            [
+                {
+                    "day": day,
+                    "user_id": user_id,
+                    "access_count": count,
+                    "first_seen_at": first_seen,
+                    "last_seen_at": last_seen,
+                }
+                for (day, user_id), (count, first_seen, last_seen) in presence.items()
+            ],
+        )
+
+    # Distinct users per touched day, read back from the presence rows (a primary-key range scan).
+    distinct_users = (
+        select(func.count())
+        .where(_PRESENCE.c.day == _DAILY.c.day)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(_DAILY)
+        .where(_DAILY.c.day.in_(list(daily)))
+        .values(unique_users=distinct_users)
+    )
+    return applied
+
+
+def rebuild_access_rollups(
+    db: Session,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    store: Optional[ArchiveStore] = None,
+) -> int:
+    """Recompute every rollup from access_logs and the archived months in the caller's transaction.
+
+    Returns rows scanned. Archived segments are folded in so a rebuild never drops their statistics.
+    """
+    db.execute(delete(_PRESENCE))
+    db.execute(delete(_DAILY))
+
+    scanned = 0
+    batch: list[dict[str, Any]] = []
+    result = db.execute(
+        select(AccessLog.user_id, AccessLog.timestamp).execution_options(yield_per=batch_size)
+    )
+    for user_id, timestamp in result:
+        batch.append({"user_id": user_id, "timestamp": timestamp})
+        if len(batch) >= batch_size:
+            scanned += apply_access_rollups(db, batch)
+            batch = []
+    for row in (store or archive_store).iter_rows("access_logs"):
+        batch.append({"user_id": row["user_id"], "timestamp": parse_stored_timestamp(row["timestamp"])})
+        if len(batch) >= batch_size:
+            scanned += apply_access_rollups(db, batch)
+            batch = []
+    if batch:
+        scanned += apply_access_rollups(db, batch)
+    return scanned
+
+
+def ensure_access_rollups(
+    session_factory: Callable[[], Session] = SessionLocal,
+    store: Optional[ArchiveStore] = None,
+) -> Optional[int]:
+    """Backfill the rollups once for databases that have history but no rollups yet."""
+    store = store or archive_store
+    with session_factory() as db:
+        has_rollups = db.query(AccessDailyStat.day).limit(1).first() is not None
+        has_logs = db.query(AccessLog.id).limit(1).first() is not None or bool(store.segments("access_logs"))
+        if has_rollups or not has_logs:
+            return None
+
+        scanned = rebuild_access_rollups(db, store=store)
+        db.commit()
+    log.info(f"📊 Backfilled statistics rollups from {scanned} access logs")
+    return scanned
+
+
+def sum_access_count(db: Session, start_day: Optional[date] = None) -> int:
+    query = db.query(func.coalesce(func.sum(AccessDailyStat.access_count), 0))
+    if start_day is not None:
+        query = query.filter(AccessDailyStat.day >= start_day.isoformat())
+    return query.scalar()
+
+
+def count_active_users(db: Session, start_day: date) -> int:
+    return (
+        db.query(func.count(func.distinct(UserDailyPresence.user_id)))
+        .filter(UserDailyPresence.day >= start_day.isoformat())
+        .scalar()
+    )
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _bucket_expression(column, granularity: str):
+    if granularity == "week":
+        # Monday on or before the day
+        return func.date(column, "-6 days", "weekday 1")
+    if granularity == "month":
+        return func.strftime("%Y-%m-01", column)
+    return column
+
+
+def get_access_timeseries(db: Session, granularity: str, start: date, end: date) -> list[dict[str, Any]]:
+    """Access counts and distinct users per bucket covering local days start..end, read only from the rollups."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    if end < start:
+        raise ValueError("end must not be before start")
+
+    buckets = []
+    cursor = bucket_start(start, granularity)
+    while cursor <= end:
+        buckets.append(cursor)
+        if len(buckets) > MAX_TIMESERIES_BUCKETS:
+            raise ValueError(f"Range spans more than {MAX_TIMESERIES_BUCKETS} buckets")
+        cursor = next_bucket(cursor, granularity)
+
+    # Widen to whole buckets so the first and last week/month are not partial counts.
+    start_key = buckets[0].isoformat()
+    end_key = (cursor - timedelta(days=1)).isoformat()
+
+    daily_bucket = _bucket_expression(AccessDailyStat.day, granularity).label("bucket")
+    access_counts = dict(
+        db.query(daily_bucket, func.sum(AccessDailyStat.access_count))
+        .filter(AccessDailyStat.day >= start_key, AccessDailyStat.day <= end_key)
+        .group_by(daily_bucket)
+        .all()
+    )
+
+    presence_bucket = _bucket_expression(UserDailyPresence.day, granularity).label("bucket")
+    active_users = dict(
+        db.query(presence_bucket, func.count(func.distinct(UserDailyPresence.user_id)))
+        .filter(UserDailyPresence.day >= start_key, UserDailyPresence.day <= end_key)
+        .group_by(presence_bucket)
+        .all()
+    )
+
+    return [
+        {
+            "start": bucket.isoformat(),
+            "access_count": access_counts.get(bucket.isoformat(), 0),
+            "unique_users": active_users.get(bucket.isoformat(), 0),
+        }
+        for bucket in buckets
+    ]
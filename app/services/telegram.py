@@ -1,40 +1,264 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
 import requests
 import logging
 import time
-from app.config import BOT_TOKEN, TG_CHAT_ID
+from typing import Optional
+
+from app.config import (
+    BOT_TOKEN,
+    TELEGRAM_API_BASE,
+    TELEGRAM_COALESCE_WINDOW_MS,
+    TELEGRAM_MAX_RETRIES,
+    TELEGRAM_QUEUE_SIZE,
+    TG_CHAT_ID,
+)
 
 log = logging.getLogger(__name__)
 
-def send_telegram(text: str, max_retries: int = 3):
-    """Send message to Telegram chat with retry mechanism"""
-    if not BOT_TOKEN or not TG_CHAT_ID:
-        log.warning("Telegram not configured, skipping notification")
-        return False
-    
-    for attempt in range(max_retries):
+TELEGRAM_MESSAGE_LIMIT = 4096
+TELEGRAM_REQUEST_TIMEOUT = 10
+RETRY_BACKOFF_SECONDS = 1.0
+# 429s get their own budget so sustained rate limiting cannot pin the worker on one message.
+RATE_LIMIT_MAX_RETRIES = 5
+
+# Coalesce key for door entry notifications; a burst of scans becomes one message.
+COALESCE_ENTRY = "entry"
+
+
+@dataclass(frozen=True)
+class PendingNotification:
+    text: str
+    coalesce_key: Optional[str]
+    queued_at: float
+
+
+class TelegramDispatcher:
+    """Single-worker Telegram sender: bounded drop-oldest queue, one keep-alive session, 429 backoff."""
+
+    def __init__(
+        self,
+        *,
+        bot_token: Optional[str] = BOT_TOKEN,
+        chat_id: Optional[str] = TG_CHAT_ID,
+        api_base: str = TELEGRAM_API_BASE,
+        max_queue_size: int = TELEGRAM_QUEUE_SIZE,
+        coalesce_window_ms: int = TELEGRAM_COALESCE_WINDOW_MS,
+        max_retries: int = TELEGRAM_MAX_RETRIES,
+        rate_limit_retries: int = RATE_LIMIT_MAX_RETRIES,
+        request_timeout: float = TELEGRAM_REQUEST_TIMEOUT,
+    ):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.api_base = api_base.rstrip("/")
+        self.max_queue_size = max(max_queue_size, 1)
+        self.coalesce_window = max(coalesce_window_ms, 0) / 1000
+        self.max_retries = max(max_retries, 1)
+        self.rate_limit_retries = max(rate_limit_retries, 0)
+        self.request_timeout = request_timeout
+        self._pending: deque[PendingNotification] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._session: Optional[requests.Session] = None
+        self._stopping = False
+        self._sent = 0
+        self._failed = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._rate_limited = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.bot_token and self.chat_id)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "configured": self.configured,
+            "running": self.running,
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "sent": self._sent,
+            "failed": self._failed,
+            "dropped": self._dropped,
+            "coalesced": self._coalesced,
+            "rate_limited": self._rate_limited,
+        }
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        if not self.configured:
+            log.warning("Telegram not configured, notifications disabled")
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._session = requests.Session()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        if self._pending:
+            self._wakeup.set()
+        log.info("📨 Telegram dispatcher started")
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Deliver what is still queued (bounded by timeout), then close the session."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._signal()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"Telegram dispatcher stopped with {len(self._pending)} notifications undelivered")
+        self._task = None
+        self._wakeup = None
+        self._loop = None
+
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        log.info(f"📨 Telegram dispatcher stopped, {self._sent} sent / {self._failed} failed / {self._dropped} dropped")
+
+    def notify(self, text: str, *, coalesce_key: Optional[str] = None) -> bool:
+        """Queue a notification without blocking; the oldest one is dropped when the queue is full."""
+        if not self.configured:
+            log.warning("Telegram not configured, skipping notification")
+            return False
+
+        if len(self._pending) >= self.max_queue_size:
+            dropped = self._pending.popleft()
+            self._dropped += 1
+            log.warning(f"Telegram queue full, dropping oldest notification: {dropped.text[:50]}...")
+
+        self._pending.append(PendingNotification(text=text, coalesce_key=coalesce_key, queued_at=time.monotonic()))
+        self._signal()
+        return True
+
+    def _signal(self) -> None:
+        if self._wakeup is None or self._loop is None:
+            return
         try:
-            response = requests.post(
-                f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage",
-                json={"chat_id": TG_CHAT_ID, "text": text},
-                timeout=10,
-                verify=True  # Keep SSL verification but with longer timeout
-            )
-            response.raise_for_status()
-            log.info(f"✅ Telegram notification sent: {text[:50]}...")
-            return True
-        except requests.exceptions.SSLError as e:
-            log.warning(f"Telegram SSL error (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                time.sleep(1)  # Wait 1 second before retry
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                if self._stopping:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
                 continue
-        except requests.exceptions.RequestException as e:
-            log.error(f"Failed to send Telegram message (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                time.sleep(1)
+
+            head = self._pending[0]
+            if head.coalesce_key is not None and not self._stopping:
+                # Hold the first message of a burst briefly so the rest can join it.
+                remaining = head.queued_at + self.coalesce_window - time.monotonic()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                    continue
+
+            await self._deliver(self._take_next())
+
+    def _take_next(self) -> str:
+        first = self._pending.popleft()
+        if first.coalesce_key is None:
+            return first.text
+
+        lines = [first.text]
+        size = len(first.text)
+        kept = []
+        while self._pending:
+            pending = self._pending.popleft()
+            fits = size + 1 + len(pending.text) <= TELEGRAM_MESSAGE_LIMIT
+            if pending.coalesce_key == first.coalesce_key and fits:
+                lines.append(pending.text)
+                size += 1 + len(pending.text)
+            else:
+                kept.append(pending)
+        self._pending.extendleft(reversed(kept))
+
+        self._coalesced += len(lines) - 1
+        return "\n".join(lines)
+
+    async def _deliver(self, text: str) -> bool:
+        attempt = 0
+        rate_limited = 0
+        while attempt < self.max_retries:
+            try:
+                status_code, retry_after = await asyncio.to_thread(self._post, text)
+            except requests.exceptions.RequestException as exc:
+                status_code, retry_after = None, None
+                log.error(f"Failed to send Telegram message (attempt {attempt + 1}/{self.max_retries}): {exc}")
+            except Exception as exc:
+                log.error(f"Unexpected error sending Telegram: {exc}")
+                break
+
+            if status_code is not None and 200 <= status_code < 300:
+                self._sent += 1
+                log.info(f"✅ Telegram notification sent: {text[:50]}...")
+                return True
+
+            if status_code == 429:
+                # Rate limiting is not a failure of the message: wait as told and try again.
+                self._rate_limited += 1
+                rate_limited += 1
+                if rate_limited > self.rate_limit_retries:
+                    log.error(f"Telegram still rate limited after {self.rate_limit_retries} retries, giving up")
+                    break
+                delay = retry_after if retry_after is not None else RETRY_BACKOFF_SECONDS
+                log.warning(f"Telegram rate limited, retrying in {delay:.1f}s")
+                if self._stopping:
+                    # Shutting down: count it as an attempt so stop() is not held up indefinitely.
+                    attempt += 1
+                    if attempt >= self.max_retries:
+                        break
+                await asyncio.sleep(delay)
                 continue
-        except Exception as e:
-            log.error(f"Unexpected error sending Telegram: {e}")
-            return False
-    
-    log.error(f"Failed to send Telegram after {max_retries} attempts")
-    return False
+
+            if status_code is not None and 400 <= status_code < 500:
+                log.error(f"Telegram rejected notification with HTTP {status_code}")
+                break
+
+            attempt += 1
+            if attempt < self.max_retries:
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+        self._failed += 1
+        log.error(f"Failed to send Telegram notification: {text[:50]}...")
+        return False
+
+    def _post(self, text: str) -> tuple[int, Optional[float]]:
+        response = self._session.post(
+            f"{self.api_base}/bot{self.bot_token}/sendMessage",
+            json={"chat_id": self.chat_id, "text": text},
+            timeout=self.request_timeout,
+        )
+        retry_after = None
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.json()["parameters"]["retry_after"])
+            except (ValueError, KeyError, TypeError):
+                header = response.headers.get("Retry-After")
+                retry_after = float(header) if header and header.isdigit() else None
+        return response.status_code, retry_after
+
+
+# Global dispatcher instance
+telegram_dispatcher = TelegramDispatcher()
@@ -78,7 +78,7 @@ export const CardsPage: React.FC = () => {
   const [bindingMessage, setBindingMessage] = useState('')
 
   // Refs 管理定時器
-  const pollIntervalRef = useRef<number | null>(null)
+  const statusStreamRef = useRef<(() => void) | null>(null)
   const countdownIntervalRef = useRef<number | null>(null)
 
   const userIdFilter = searchParams.get('user')
@@ -350,9 +350,9 @@ export const CardsPage: React.FC = () => {
   // ========== 綁定 Dialog 輔助函式 ==========
   // 清除定時器
   const clearBindingIntervals = () => {
-    if (pollIntervalRef.current) {
-      clearInterval(pollIntervalRef.current)
-      pollIntervalRef.current = null
+    if (statusStreamRef.current) {
+      statusStreamRef.current()
+      statusStreamRef.current = null
     }
     if (countdownIntervalRef.current) {
       clearInterval(countdownIntervalRef.current)
@@ -360,8 +360,8 @@ export const CardsPage: React.FC = () => {
     }
   }
 
-  // 啟動輪詢
-  const startBindingPolling = (studentId: string) => {
+  // 啟動狀態串流
+  const startBindingStatusStream = (studentId: string) => {
     // 倒數計時
     countdownIntervalRef.current = window.setInterval(() => {
       setBindingCountdown((prev) => {
@@ -375,28 +375,31 @@ export const CardsPage: React.FC = () => {
       })
     }, 2000)
 
-    // 輪詢狀態
-    pollIntervalRef.current = window.setInterval(async () => {
-      try {
-        const status = await cardBindingService.checkStatus(studentId)
+    // 訂閱綁定狀態推送
+    statusStreamRef.current = cardBindingService.watchStatus(
+      studentId,
+      async (status) => {
         if (status.step !== undefined) setBindingStep(status.step)
         if (status.status_message) setBindingMessage(status.status_message)
 
-        // 完成判斷
-        if (status.bound && (!status.binding_in_progress ||
-            (status.initial_count !== undefined && status.card_count && status.card_count > status.initial_count))) {
+        if (status.last_status === 'completed') {
           clearBindingIntervals()
           setBindingStep(2)
           setBindingStatus('success')
           setBindingMessage(`卡片綁定成功（共 ${status.card_count} 張卡片）`)
           await loadData()
+        } else if (status.last_status === 'timed_out') {
+          clearBindingIntervals()
+          setBindingStatus('timeout')
+          setBindingMessage('刷卡逾時，請重新嘗試')
         }
-      } catch (err) {
+      },
+      () => {
         clearBindingIntervals()
         setBindingStatus('error')
         setBindingMessage('連線錯誤，請重新嘗試')
       }
-    }, 2000)
+    )
   }
 
   // 取消綁定
@@ -450,8 +453,8 @@ export const CardsPage: React.FC = () => {
       setBindingCountdown(90)
       setBindingMessage('請在 90 秒內刷卡兩次。綁定期間既有有效卡仍可正常通行。')
 
-      // 啟動輪詢
-      startBindingPolling(user.student_id)
+      // 啟動狀態串流
+      startBindingStatusStream(user.student_id)
     } catch (err: any) {
       const detail = err.response?.data?.detail
       const errorMessage = typeof detail === 'string'
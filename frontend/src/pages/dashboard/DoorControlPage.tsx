@@ -401,6 +401,7 @@ export const DoorControlPage: React.FC = () => {
   const [recentLogs, setRecentLogs] = useState<AccessLog[]>([])
   const [loading, setLoading] = useState(true)
   const [refreshing, setRefreshing] = useState(false)
+  const [, setCountdownTick] = useState(0)
   const [isUnlocking, setIsUnlocking] = useState(false)
   const [isSimulating, setIsSimulating] = useState(false)
   const [isSavingMode, setIsSavingMode] = useState(false)
@@ -446,24 +447,31 @@ export const DoorControlPage: React.FC = () => {
     }
   }
 
-  const refreshDoorStatusOnly = async () => {
-    try {
-      const doorStatus = await adminService.getDoorStatus()
-      setStatus(doorStatus)
-    } catch (err) {
-      console.error('Failed to refresh door status:', err)
-    }
-  }
-
   useEffect(() => {
     void loadDoorConsole()
   }, [])
 
+  // 門鎖狀態改由後端推送，不再輪詢 /admin/door/status
   useEffect(() => {
-    const intervalMs = status?.door_state === 'unlocking' ? 1000 : 8000
+    return adminService.watchDoorStatus(
+      (patch) => {
+        setStatus((prev) => (prev ? { ...prev, ...patch } : (patch as DoorStatus)))
+      },
+      () => {
+        setPageError('門禁狀態即時連線中斷，請重新整理頁面')
+      },
+    )
+  }, [])
+
+  // 開門倒數只需本地重繪
+  useEffect(() => {
+    if (status?.door_state !== 'unlocking') {
+      return
+    }
+
     const timer = window.setInterval(() => {
-      void refreshDoorStatusOnly()
-    }, intervalMs)
+      setCountdownTick((tick) => tick + 1)
+    }, 1000)
 
     return () => {
       window.clearInterval(timer)
@@ -492,10 +500,6 @@ export const DoorControlPage: React.FC = () => {
         message: response.data?.message || '已送出遠端開門請求',
       })
       await loadDoorConsole(true)
-
-      window.setTimeout(() => {
-        void refreshDoorStatusOnly()
-      }, 300)
     } catch (err: any) {
       console.error('Failed to unlock door:', err)
       setDoorFeedback({
@@ -31,8 +31,8 @@ export const UsersPage: React.FC = () => {
   const [registerCountdown, setRegisterCountdown] = useState(90)
   const [registerMessage, setRegisterMessage] = useState('')
 
-  // Refs 管理定時器
-  const pollIntervalRef = useRef<number | null>(null)
+  // Refs 管理定時器與狀態串流
+  const statusStreamRef = useRef<(() => void) | null>(null)
   const countdownIntervalRef = useRef<number | null>(null)
 
   useEffect(() => {
@@ -58,9 +58,9 @@ export const UsersPage: React.FC = () => {
   }
 
   const clearRegisterIntervals = () => {
-    if (pollIntervalRef.current) {
-      clearInterval(pollIntervalRef.current)
-      pollIntervalRef.current = null
+    if (statusStreamRef.current) {
+      statusStreamRef.current()
+      statusStreamRef.current = null
     }
     if (countdownIntervalRef.current) {
       clearInterval(countdownIntervalRef.current)
@@ -117,10 +117,10 @@ export const UsersPage: React.FC = () => {
         registerFormData.nickname || undefined
       )
 
-      // 開始輪詢
+      // 開始接收綁定狀態
       setRegisterStatus('binding')
       setRegisterMessage('請在 90 秒內刷卡兩次。綁定期間既有有效卡仍可正常通行。')
-      startRegisterPolling(registerFormData.studentId)
+      startRegisterStatusStream(registerFormData.studentId)
     } catch (err: any) {
       console.error('Failed to submit registration:', err)
       setRegisterStatus('error')
@@ -128,9 +128,7 @@ export const UsersPage: React.FC = () => {
     }
   }
 
-  const startRegisterPolling = (studentId: string) => {
-    let initialCount: number | null = null
-
+  const startRegisterStatusStream = (studentId: string) => {
     // 倒數計時
     countdownIntervalRef.current = window.setInterval(() => {
       setRegisterCountdown(prev => {
@@ -144,32 +142,29 @@ export const UsersPage: React.FC = () => {
       })
     }, 1000)
 
-    // 輪詢綁定狀態
-    pollIntervalRef.current = window.setInterval(async () => {
-      try {
-        const data = await cardBindingService.checkStatus(studentId)
-
-        // 更新步驟
+    // 訂閱綁定狀態推送
+    statusStreamRef.current = cardBindingService.watchStatus(
+      studentId,
+      async (data) => {
         setRegisterStep(data.step || 0)
 
-        if (initialCount === null && data.initial_count !== undefined) {
-          initialCount = data.initial_count
-        }
-
-        // 檢查綁定完成
-        if (data.bound && data.card_count !== undefined && data.card_count > (initialCount ?? 0)) {
+        if (data.last_status === 'completed') {
           clearRegisterIntervals()
           setRegisterStatus('success')
           setRegisterMessage('綁定成功！')
           await loadUsers() // 刷新用戶列表
+        } else if (data.last_status === 'timed_out') {
+          clearRegisterIntervals()
+          setRegisterStatus('timeout')
+          setRegisterMessage('綁定超時，請重試')
         }
-      } catch (err: any) {
-        console.error('Polling error:', err)
+      },
+      () => {
         clearRegisterIntervals()
         setRegisterStatus('error')
         setRegisterMessage('檢查狀態失敗')
       }
-    }, 2000)
+    )
   }
 
   const filteredUsers = users.filter(user => {
@@ -86,6 +86,28 @@ export const adminService = {
     return response.data
   },
 
+  /**
+   * 訂閱門鎖狀態推送（SSE）：第一筆為完整狀態，之後只含變動欄位
+   * 回傳取消訂閱函式
+   */
+  watchDoorStatus: (
+    onStatus: (status: Partial<DoorStatus>) => void,
+    onError: () => void
+  ) => {
+    const source = new EventSource('/admin/door/status/stream', { withCredentials: true })
+
+    source.addEventListener('door_status', (event) => {
+      onStatus(JSON.parse((event as MessageEvent).data) as Partial<DoorStatus>)
+    })
+
+    // 網路中斷時瀏覽器會自動重連；只有連線被拒（401 等）才視為錯誤
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) onError()
+    }
+
+    return () => source.close()
+  },
+
   getDoorEvents: async (limit = 20) => {
     const response = await api.get<DoorEvent[]>('/admin/door/events', {
       params: { limit },
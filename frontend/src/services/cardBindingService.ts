@@ -8,6 +8,7 @@ export interface BindingStatus {
   step?: number
   status_message?: string
   last_status?: string
+  expires_at?: string
 }
 
 export const cardBindingService = {
@@ -38,10 +39,37 @@ export const cardBindingService = {
 
   /**
    * 檢查卡片綁定狀態
-   * 用於輪詢綁定進度
+   * 單次查詢綁定進度
    */
   checkStatus: async (studentId: string) => {
     const response = await api.get<BindingStatus>(`/check_status/${studentId}`)
     return response.data
   },
+
+  /**
+   * 訂閱綁定狀態推送（SSE），取代輪詢
+   * 綁定完成或逾時後自動關閉；回傳取消訂閱函式
+   */
+  watchStatus: (
+    studentId: string,
+    onStatus: (status: BindingStatus) => void,
+    onError: () => void
+  ) => {
+    const source = new EventSource(`/check_status/${encodeURIComponent(studentId)}/stream`, {
+      withCredentials: true,
+    })
+
+    source.addEventListener('registration', (event) => {
+      const status = JSON.parse((event as MessageEvent).data) as BindingStatus
+      if (!status.binding_in_progress) source.close()
+      onStatus(status)
+    })
+
+    // 網路中斷時瀏覽器會自動重連；只有連線被拒（401/404 等）才視為錯誤
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) onError()
+    }
+
+    return () => source.close()
+  },
 }
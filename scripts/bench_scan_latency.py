@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""Scan-to-relay latency benchmark.
+
+Runs `app.main.handle_rfid_scan` against a temporary SQLite database seeded
+with synthetic users and cards while GPIO stays in mock mode, and reports
+p50/p95/p99 latency for every stage of the scan path.
+
+Example:
+    python scripts/bench_scan_latency.py --users 2000 --scans 500 --admin-workers 4
+
+    # scan commit latency while /admin/logs and /admin/stats are hammered
+    python scripts/bench_scan_latency.py --log-rows 50000 --admin-workers 4 \
+        --scan-interval-ms 20 --sqlite-profile default
+
+    # event-loop lag seen by scans while admins keep logging in (bcrypt)
+    python scripts/bench_scan_latency.py --scans 50 --scan-interval-ms 20 --login-burst 2 --login-mode inline
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+STAGES = (
+    "loop_lag",
+    "card_lookup",
+    "door_state_sync",
+    "scan_to_relay",
+    "access_log_commit",
+    "notification_enqueue",
+    "scan_total",
+)
+
+
+BENCH_ADMIN_PASSWORD = "bench-password"
+LOGIN_TASK_PREFIX = "bench-login"
+
+SQLITE_PROFILE_VARIABLES = (
+    "SQLITE_JOURNAL_MODE",
+    "SQLITE_SYNCHRONOUS",
+    "SQLITE_CACHE_SIZE",
+    "SQLITE_MMAP_SIZE",
+    "SQLITE_TEMP_STORE",
+    "SQLITE_BUSY_TIMEOUT_MS",
+)
+
+
+def configure_environment(database_path: Path, sqlite_profile: str = "tuned") -> None:
+    """Point the app at a throwaway database before any app module is imported."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    if sqlite_profile == "default":
+        # Empty values skip every pragma: rollback journal, synchronous=FULL, stock cache.
+        for variable in SQLITE_PROFILE_VARIABLES:
+            os.environ[variable] = ""
+    os.environ["DEV_MODE"] = "true"
+    os.environ["LOCK_DURATION"] = "0"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    # Random UID picks may repeat within seconds; measure every scan instead of debouncing.
+    os.environ["SCAN_DEBOUNCE_SECONDS"] = "0"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-secret-key-not-for-production-use")
+    # Keep notifications local: an unset bot token makes the sender return immediately.
+    os.environ["BOT_TOKEN"] = ""
+    os.environ["TG_CHAT_ID"] = ""
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class StageRecorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.scan_started_at: float | None = None
+        self._guard = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._guard:
+            self.samples[stage].append(seconds * 1000)
+
+    def wrap(self, stage: str, func):
+        def timed(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started_at)
+
+        return timed
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        report = {}
+        for stage in STAGES:
+            samples = self.samples.get(stage, [])
+            report[stage] = {
+                "count": len(samples),
+                "p50_ms": percentile(samples, 0.50),
+                "p95_ms": percentile(samples, 0.95),
+                "p99_ms": percentile(samples, 0.99),
+                "max_ms": max(samples) if samples else 0.0,
+            }
+        return report
+
+
+def seed_database(user_count: int, cards_per_user: int, log_rows: int = 0) -> list[str]:
+    from datetime import timedelta
+
+    from sqlalchemy import insert
+
+    from app.database import AccessLog, Admin, Card, SessionLocal, User, generate_uuid, init_db
+    from app.services.stats_rollup import rebuild_access_rollups
+    from app.timezone import utcnow
+
+    init_db()
+    uids = []
+    users = []
+    cards = []
+    for index in range(user_count):
+        user_id = generate_uuid()
+        users.append({
+            "id": user_id,
+            "student_id": f"b{index:08d}",
+            "name": f"Bench User {index}",
+            "is_active": True,
+        })
+        for card_offset in range(cards_per_user):
+            rfid_uid = str(1_000_000_000 + index * cards_per_user + card_offset).zfill(10)
+            uids.append(rfid_uid)
+            cards.append({
+                "id": generate_uuid(),
+                "rfid_uid": rfid_uid,
+                "user_id": user_id,
+                "is_active": True,
+            })
+
+    with SessionLocal() as db:
+        if users:
+            db.execute(insert(User), users)
+        if cards:
+            db.execute(insert(Card), cards)
+        if log_rows and users:
+            # History for /admin/logs and /admin/stats to chew on, spread over the last 30 days.
+            now = utcnow()
+            db.execute(insert(AccessLog), [
+                {
+                    "user_id": users[index % len(users)]["id"],
+                    "rfid_uid": uids[index % len(uids)] if uids else None,
+                    "action": "entry",
+                    "timestamp": now - timedelta(seconds=index * 30 * 86400 // log_rows),
+                }
+                for index in range(log_rows)
+            ])
+            rebuild_access_rollups(db)
+        db.add(Admin(id="bench-admin", username="bench", password_hash="!", name="Bench"))
+        db.commit()
+    return uids
+
+
+def admin_traffic_worker(stop: threading.Event, token: str, counter: list[int]) -> None:
+    """Hammer the read-heavy admin endpoints the dashboard polls."""
+    from app.database import SessionLocal
+    from app.routers import admin
+
+    calls = (
+        lambda db: admin.get_access_logs(limit=50, admin_token=token, db=db),
+        lambda db: admin.get_stats(admin_token=token, db=db),
+        lambda db: admin.list_users(admin_token=token, db=db),
+        lambda db: admin.list_all_cards(admin_token=token, db=db),
+    )
+    loop = asyncio.new_event_loop()
+    try:
+        while not stop.is_set():
+            for call in calls:
+                with SessionLocal() as db:
+                    loop.run_until_complete(call(db))
+                counter[0] += 1
+    finally:
+        loop.close()
+
+
+async def drain_background_tasks(service_tasks: set[asyncio.Task]) -> None:
+    current = asyncio.current_task()
+    pending = [
+        task for task in asyncio.all_tasks()
+        if task is not current
+        and task not in service_tasks
+        and not task.get_name().startswith(LOGIN_TASK_PREFIX)
+    ]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def login_once(counter: dict[str, int]) -> None:
+    from fastapi import HTTPException
+
+    from app.database import SessionLocal
+    from app.routers import web
+
+    with SessionLocal() as db:
+        try:
+            await web.login(None, None, username="bench", password=BENCH_ADMIN_PASSWORD, db=db)
+            counter["ok"] += 1
+        except HTTPException as exc:
+            counter[str(exc.status_code)] = counter.get(str(exc.status_code), 0) + 1
+
+
+async def login_burst_loop(burst: int, stop: asyncio.Event, counter: dict[str, int]) -> None:
+    """Keep `burst` logins in flight on the scan loop until the scans finish."""
+    round_index = 0
+    while not stop.is_set():
+        round_index += 1
+        await asyncio.gather(*[
+            asyncio.create_task(login_once(counter), name=f"{LOGIN_TASK_PREFIX}-{round_index}-{index}")
+            for index in range(burst)
+        ])
+
+
+async def run_scans(
+    uids: list[str],
+    scan_count: int,
+    recorder: StageRecorder,
+    seed: int,
+    scan_interval: float = 0.0,
+    login_burst: int = 0,
+    login_counter: dict[str, int] | None = None,
+) -> None:
+    import app.main as main
+
+    await main.event_writer.start()
+    loop = asyncio.get_running_loop()
+    stop_logins = asyncio.Event()
+    login_task = None
+    if login_burst:
+        login_task = asyncio.create_task(
+            login_burst_loop(login_burst, stop_logins, login_counter if login_counter is not None else {"ok": 0}),
+            name=LOGIN_TASK_PREFIX,
+        )
+    service_tasks = asyncio.all_tasks()
+    rng = random.Random(seed)
+    try:
+        for _ in range(scan_count):
+            # A scan arriving now is only picked up once the loop wakes; oversleep = loop lag.
+            expected_at = loop.time() + scan_interval
+            await asyncio.sleep(scan_interval)
+            recorder.add("loop_lag", max(loop.time() - expected_at, 0.0))
+
+            card_uid = rng.choice(uids)
+            recorder.scan_started_at = time.perf_counter()
+            await main.handle_rfid_scan(card_uid)
+            recorder.add("scan_total", time.perf_counter() - recorder.scan_started_at)
+            await drain_background_tasks(service_tasks)
+    finally:
+        stop_logins.set()
+        if login_task is not None:
+            await login_task
+        await main.event_writer.stop()
+
+
+def use_inline_password_checks() -> None:
+    """Pre-pool behaviour: bcrypt runs directly on the event loop."""
+    from app.routers import web
+    from app.services.auth import verify_password
+
+    async def verify_inline(plain_password: str, password_hash: str) -> bool:
+        return verify_password(plain_password, password_hash)
+
+    web.password_pool.verify = verify_inline
+
+
+def instrument(recorder: StageRecorder) -> None:
+    import app.main as main
+    from app.services import gpio_control
+
+    main.card_index.get = recorder.wrap("card_lookup", main.card_index.get)
+    main.sync_door_hardware_state = recorder.wrap("door_state_sync", main.sync_door_hardware_state)
+    main.event_writer._write_batch = recorder.wrap("access_log_commit", main.event_writer._write_batch)
+    main.telegram_dispatcher.notify = recorder.wrap("notification_enqueue", main.telegram_dispatcher.notify)
+
+    set_relay_state = gpio_control._set_relay_state
+
+    def timed_set_relay_state(unlocked: bool, *args):
+        set_relay_state(unlocked, *args)
+        if unlocked and recorder.scan_started_at is not None:
+            recorder.add("scan_to_relay", time.perf_counter() - recorder.scan_started_at)
+
+    gpio_control._set_relay_state = timed_set_relay_state
+
+
+def print_report(report: dict, meta: dict) -> None:
+    print(
+        f"users={meta['users']} cards={meta['cards']} scans={meta['scans']} "
+        f"admin_workers={meta['admin_workers']} admin_requests={meta['admin_requests']} "
+        f"sqlite_profile={meta['sqlite_profile']} log_rows={meta['log_rows']}"
+    )
+    if meta["login_burst"]:
+        print(f"login_burst={meta['login_burst']} login_mode={meta['login_mode']} logins={meta['logins']}")
+    print(f"{'stage':<22}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, stats in report.items():
+        print(
+            f"{stage:<22}{stats['count']:>7}{stats['p50_ms']:>10.3f}"
+            f"{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the RFID scan hot path.")
+    parser.add_argument("--users", type=int, default=500, help="Number of seeded users")
+    parser.add_argument("--cards-per-user", type=int, default=2, help="Cards seeded per user")
+    parser.add_argument("--scans", type=int, default=200, help="Number of scans to replay")
+    parser.add_argument("--warmup", type=int, default=20, help="Scans discarded before measuring")
+    parser.add_argument("--admin-workers", type=int, default=0, help="Concurrent admin traffic threads")
+    parser.add_argument("--log-rows", type=int, default=0, help="Access log rows seeded before the run")
+    parser.add_argument(
+        "--scan-interval-ms",
+        type=float,
+        default=0,
+        help="Pause between scans so access log batches commit while admin traffic runs",
+    )
+    parser.add_argument(
+        "--sqlite-profile",
+        choices=("tuned", "default"),
+        default="tuned",
+        help="tuned = configured WAL profile, default = stock SQLite pragmas",
+    )
+    parser.add_argument(
+        "--login-burst",
+        type=int,
+        default=0,
+        help="Concurrent admin logins kept in flight on the scan loop during the run",
+    )
+    parser.add_argument(
+        "--login-mode",
+        choices=("pool", "inline"),
+        default="pool",
+        help="pool = bcrypt on the password worker pool, inline = bcrypt on the event loop",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for UID selection")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="moli-bench-") as temp_dir:
+        configure_environment(Path(temp_dir) / "bench.db", args.sqlite_profile)
+
+        import logging
+
+        import app.main  # noqa: F401 - configures logging and registers routers
+        from app.database import SessionLocal
+        from app.services.auth import create_access_token
+        from app.services.card_index import card_index
+
+        logging.getLogger().setLevel(logging.ERROR)
+
+        uids = seed_database(args.users, args.cards_per_user, args.log_rows)
+        with SessionLocal() as db:
+            card_index.load(db)
+            if args.login_burst:
+                from app.database import Admin
+                from app.services.auth import hash_password
+
+                db.get(Admin, "bench-admin").password_hash = hash_password(BENCH_ADMIN_PASSWORD)
+                db.commit()
+        if args.login_mode == "inline":
+            use_inline_password_checks()
+
+        token = create_access_token({"sub": "bench", "id": "bench-admin", "name": "Bench"})
+        stop = threading.Event()
+        admin_counter = [0]
+        login_counter = {"ok": 0}
+        workers = [
+            threading.Thread(target=admin_traffic_worker, args=(stop, token, admin_counter), daemon=True)
+            for _ in range(args.admin_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            asyncio.run(run_scans(uids, args.warmup, StageRecorder(), args.seed + 1))
+            recorder = StageRecorder()
+            instrument(recorder)
+            asyncio.run(run_scans(
+                uids,
+                args.scans,
+                recorder,
+                args.seed,
+                args.scan_interval_ms / 1000,
+                args.login_burst,
+                login_counter,
+            ))
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+        report = recorder.summary()
+        meta = {
+            "users": args.users,
+            "cards": len(uids),
+            "scans": args.scans,
+            "admin_workers": args.admin_workers,
+            "admin_requests": admin_counter[0],
+            "sqlite_profile": args.sqlite_profile,
+            "log_rows": args.log_rows,
+            "login_burst": args.login_burst,
+            "login_mode": args.login_mode,
+            "logins": login_counter,
+        }
+        if args.json:
+            print(json.dumps({"meta": meta, "stages": report}, indent=2))
+        else:
+            print_report(report, meta)
+
+
+if __name__ == "__main__":
+    main()
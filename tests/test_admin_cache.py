@@ -0,0 +1,109 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Admin, Base
+from app.routers import admin, dependencies
+from app.services.admin_cache import AdminIdentityCache
+from app.services.auth import create_access_token
+
+IDENTITY = {"id": "admin-1", "username": "root", "name": "Root", "sub": "root"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class AdminIdentityCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = AdminIdentityCache(ttl_seconds=30, max_entries=2, clock=self.clock, wall_clock=lambda: 1000.0)
+
+    def test_entries_expire_after_ttl_or_token_exp(self):
+        self.cache.put("token-a", IDENTITY)
+        self.cache.put("token-b", IDENTITY, token_expires_at=1010.0)
+        self.cache.put("token-c", IDENTITY, token_expires_at=999.0)
+
+        self.clock.now += 15
+        self.assertEqual(self.cache.get("token-a"), IDENTITY)
+        self.assertIsNone(self.cache.get("token-b"))
+        self.assertIsNone(self.cache.get("token-c"))
+
+        self.clock.now += 15
+        self.assertIsNone(self.cache.get("token-a"))
+
+    def test_lru_bound_and_invalidation(self):
+        self.cache.put("token-a", IDENTITY)
+        self.cache.put("token-b", {**IDENTITY, "id": "admin-2"})
+        self.cache.get("token-a")
+        self.cache.put("token-c", IDENTITY)
+
+        self.assertIsNone(self.cache.get("token-b"))
+        self.assertEqual(self.cache.invalidate_admin("admin-1"), 2)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_disabled_with_zero_ttl(self):
+        cache = AdminIdentityCache(ttl_seconds=0)
+        cache.put("token-a", IDENTITY)
+        self.assertIsNone(cache.get("token-a"))
+
+
+class ResolveAdminCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.TestingSession = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        with self.TestingSession() as db:
+            db.add(Admin(id="admin-1", username="root", password_hash="!", name="Root"))
+            db.add(Admin(id="admin-2", username="ops", password_hash="!", name="Ops"))
+            db.commit()
+
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+
+        self.cache = AdminIdentityCache(ttl_seconds=60)
+        for target in (dependencies, admin):
+            patcher = patch.object(target, "admin_identity_cache", self.cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(dependencies, "SessionLocal", self.TestingSession)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.root_token = create_access_token({"sub": "root", "id": "admin-1"})
+        self.ops_token = create_access_token({"sub": "ops", "id": "admin-2"})
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_repeat_requests_skip_database(self):
+        self.assertEqual(dependencies.get_current_admin(self.ops_token)["name"], "Ops")
+        queries = len(self.statements)
+
+        with patch.object(dependencies, "verify_access_token", side_effect=AssertionError("decoded twice")):
+            for _ in range(5):
+                self.assertEqual(dependencies.get_current_admin(self.ops_token)["name"], "Ops")
+        self.assertEqual(len(self.statements), queries)
+        self.assertEqual(self.cache.stats()["hits"], 5)
+
+    async def test_update_and_delete_invalidate_immediately(self):
+        dependencies.get_current_admin(self.ops_token)
+
+        with self.TestingSession() as db:
+            await admin.update_admin("admin-2", name="Operator", password=None, admin_token=self.root_token, db=db)
+        self.assertEqual(dependencies.get_current_admin(self.ops_token)["name"], "Operator")
+
+        with self.TestingSession() as db:
+            await admin.delete_admin("admin-2", admin_token=self.root_token, db=db)
+        self.assertIsNone(dependencies.get_optional_admin(self.ops_token))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import AccessLog, Base, Card, User
+from app.routers import admin
+from app.services.access_log_query import ACCESS_LOG_KEYS, AccessLogFilters, build_access_log_query
+
+ADMIN = {"id": "admin-1", "username": "root", "name": "Root", "sub": "root"}
+
+
+class AdminListingTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.session = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)()
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self.record_statement)
+
+        base_time = datetime(2026, 1, 1, 8, 0, 0)
+        for index in range(7):
+            self.session.add(User(
+                id=f"user-{index}",
+                student_id=f"s{index:07d}",
+                name=f"Member {index}",
+                is_active=index % 3 != 0,
+                created_at=base_time + timedelta(minutes=index // 2),
+            ))
+            for card_offset in range(index % 3):
+                self.session.add(Card(
+                    id=f"card-{index}-{card_offset}",
+                    rfid_uid=f"{index:05d}{card_offset:05d}",
+                    user_id=f"user-{index}",
+                ))
+        self.session.commit()
+
+        patcher = patch.object(admin, "get_current_admin", return_value=ADMIN)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    async def collect_pages(self, endpoint, **params):
+        items = []
+        cursor = None
+        while True:
+            page = await endpoint(cursor=cursor, db=self.session, **params)
+            items.extend(page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return items, page["total"]
+
+    async def test_legacy_user_list_uses_one_query(self):
+        self.statements.clear()
+        users = await admin.list_users(db=self.session)
+
+        self.assertEqual(len(users), 7)
+        self.assertEqual(len(self.statements), 1)
+        counts = {user["id"]: user["card_count"] for user in users}
+        self.assertEqual(counts["user-2"], 2)
+        self.assertEqual(counts["user-3"], 0)
+
+    async def test_user_pages_walk_every_row_once(self):
+        items, total = await self.collect_pages(admin.list_users, page_size=2, sort="created_at", order="desc")
+
+        self.assertEqual(total, 7)
+        self.assertEqual(len({item["id"] for item in items}), 7)
+        created = [item["created_at"] for item in items]
+        self.assertEqual(created, sorted(created, reverse=True))
+
+    async def test_user_filters(self):
+        items, total = await self.collect_pages(admin.list_users, page_size=10, is_active=False)
+        self.assertEqual(sorted(item["id"] for item in items), ["user-0", "user-3", "user-6"])
+        self.assertEqual(total, 3)
+
+        page = await admin.list_users(q="Member 5", page_size=10, db=self.session)
+        self.assertEqual([item["id"] for item in page["items"]], ["user-5"])
+
+    async def test_legacy_card_list_joins_owner(self):
+        self.statements.clear()
+        cards = await admin.list_all_cards(db=self.session)
+
+        self.assertEqual(len(cards), 6)
+        self.assertEqual(len(self.statements), 1)
+        card = next(card for card in cards if card["id"] == "card-5-1")
+        self.assertEqual(card["user_name"], "Member 5")
+        self.assertEqual(card["student_id"], "s0000005")
+
+    async def test_card_pages_and_filters(self):
+        items, total = await self.collect_pages(admin.list_all_cards, page_size=4, sort="rfid_uid")
+        self.assertEqual(total, 6)
+        uids = [item["rfid_uid"] for item in items]
+        self.assertEqual(uids, sorted(uids))
+
+        self.session.get(Card, "card-4-0").nickname = "學生證"
+        self.session.get(Card, "card-5-0").is_active = False
+        self.session.commit()
+
+        page = await admin.list_all_cards(nickname="學生", page_size=10, db=self.session)
+        self.assertEqual([item["id"] for item in page["items"]], ["card-4-0"])
+        page = await admin.list_all_cards(user_id="user-5", is_active=True, page_size=10, db=self.session)
+        self.assertEqual([item["id"] for item in page["items"]], ["card-5-1"])
+
+    def seed_logs(self):
+        # 00:00 UTC on Jan 1-5 is 08:00 in Taipei; two entries share each timestamp.
+        for day in range(1, 6):
+            for user_index in (1, 2):
+                self.session.add(AccessLog(
+                    user_id=f"user-{user_index}",
+                    card_id=f"card-{user_index}-0",
+                    rfid_uid=f"{user_index:05d}00000",
+                    action="entry",
+                    timestamp=datetime(2026, 1, day, 0, 0, 0),
+                ))
+        self.session.add(AccessLog(user_id="user-9", rfid_uid="9999999999", action="entry",
+                                   timestamp=datetime(2026, 1, 6)))
+        self.session.commit()
+
+    async def test_log_pages_are_newest_first_without_gaps(self):
+        self.seed_logs()
+        items, total = await self.collect_pages(admin.get_access_logs, page_size=3, include_total=True)
+
+        self.assertEqual(total, 11)
+        self.assertEqual(len({item["id"] for item in items}), 11)
+        self.assertEqual(items[0]["user_name"], "未知")
+        keys = [(item["timestamp"], item["id"]) for item in items]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+    async def test_log_filters(self):
+        self.seed_logs()
+        logs = await admin.get_access_logs(user_id="user-2", start="2026-01-02", end="2026-01-04T08:00", db=self.session)
+        self.assertEqual(
+            [log["timestamp"] for log in logs],
+            ["2026-01-03T08:00:00+08:00", "2026-01-02T08:00:00+08:00"],
+        )
+        self.assertTrue(all(log["student_id"] == "s0000002" for log in logs))
+
+        logs = await admin.get_access_logs(rfid_uid="0000100000", limit=2, db=self.session)
+        self.assertEqual(len(logs), 2)
+
+        with self.assertRaises(HTTPException):
+            await admin.get_access_logs(start="yesterday", db=self.session)
+
+    def test_log_listing_uses_timestamp_index(self):
+        query = build_access_log_query(self.session, AccessLogFilters())
+        statement = query.order_by(*[key.desc() for key in ACCESS_LOG_KEYS]).limit(50).statement
+        sql = str(statement.compile(self.engine, compile_kwargs={"literal_binds": True}))
+        with self.engine.connect() as connection:
+            plan = " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+        self.assertIn("ix_access_logs_timestamp_id", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    async def test_rejects_tampered_cursor(self):
+        with self.assertRaises(HTTPException) as raised:
+            await admin.list_users(page_size=2, cursor="not-a-cursor", db=self.session)
+        self.assertEqual(raised.exception.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from app.database import AccessDailyStat, AccessLog, Base, DoorEvent, User, apply_sqlite_pragmas
+from app.routers import admin
+from app.services.access_log_query import AccessLogFilters
+from app.services.archive import ArchiveStore, run_archive
+from app.services.door_status import RemoteUnlockCounter
+from app.services.exporter import DoorEventFilters, iter_access_log_rows, iter_door_event_rows
+from app.services.stats_rollup import rebuild_access_rollups, sum_access_count
+from app.timezone import APP_TIMEZONE
+
+ADMIN = {"id": "admin-1", "username": "root", "name": "Root", "sub": "root"}
+NOW = datetime(2026, 3, 15, 12, 0, tzinfo=APP_TIMEZONE)
+# 60 days before NOW falls in 2026-01, so 2025-10 .. 2025-12 are archived.
+RETENTION_DAYS = 60
+MONTHS = [(2025, 10), (2025, 11), (2025, 12), (2026, 1), (2026, 2)]
+
+
+class ArchiveTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        database_path = os.path.join(self.temp_dir.name, "archive.db")
+        self.engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False})
+        event.listen(self.engine, "connect",
+                     lambda connection, record: apply_sqlite_pragmas(connection, [("auto_vacuum", "INCREMENTAL")]))
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        self.store = ArchiveStore(os.path.join(self.temp_dir.name, "archive"))
+
+        with self.session_factory() as db:
+            db.add(User(id="user-1", student_id="s0000001", name="王小明"))
+            for year, month in MONTHS:
+                # 2025-11 is padded so archiving it leaves free pages behind.
+                count, padding = (40, "x" * 400) if (year, month) == (2025, 11) else (3, "")
+                for index in range(count):
+                    db.add(AccessLog(
+                        user_id="user-1" if index % 2 == 0 else "gone-user",
+                        rfid_uid=f"{year}{month:02d}{index:04d}{padding}",
+                        action="entry" if index % 2 == 0 else "denied",
+                        timestamp=datetime(year, month, 10) + timedelta(minutes=index),
+                    ))
+            # The very first instant of January local time is still live (UTC is 2025-12-31 16:00).
+            db.add(AccessLog(user_id="user-1", rfid_uid="boundary", action="entry",
+                             timestamp=datetime(2025, 12, 31, 16, 0)))
+            for day in (3, 20):
+                db.add(DoorEvent(admin_name="Old", action="remote_unlock", source="door_control_ui",
+                                 result="accepted", created_at=datetime(2025, 11, day)))
+            db.add(DoorEvent(admin_name="系統自動化", action="auto_mode", source="scheduler",
+                             result="success", created_at=datetime(2025, 12, 5)))
+            db.add(DoorEvent(admin_name="Root", action="remote_unlock", source="door_control_ui",
+                             result="accepted", created_at=datetime(2026, 2, 1)))
+            db.commit()
+            self.all_log_ids = [row.id for row in db.query(AccessLog.id).order_by(AccessLog.timestamp.desc(), AccessLog.id.desc())]
+
+        self.db = self.session_factory()
+        patch.object(admin, "get_current_admin", return_value=ADMIN).start()
+        patch.object(admin, "archive_store", self.store).start()
+        self.addCleanup(patch.stopall)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def archive(self):
+        return run_archive(self.session_factory, self.store, retention_days=RETENTION_DAYS, now_local=NOW)
+
+    def test_run_moves_whole_months_and_reclaims_space(self):
+        result = self.archive()
+
+        self.assertEqual(result.rows, {"access_logs": 46, "door_events": 3})
+        self.assertEqual(self.db.query(func.count(AccessLog.id)).scalar(), 7)
+        self.assertEqual(self.db.query(func.count(DoorEvent.id)).scalar(), 1)
+        self.assertEqual([segment.month for segment in self.store.segments("access_logs")], ["2025-12", "2025-11", "2025-10"])
+        november = self.store.segment("door_events", "2025-11")
+        self.assertEqual((november.rows, november.actions), (2, {"remote_unlock": 2}))
+
+        self.assertGreater(result.reclaimed_pages, 0)
+        with self.engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql("PRAGMA freelist_count").scalar(), 0)
+
+        self.assertEqual(self.archive().rows_archived, 0)
+
+    def test_rollup_rebuild_keeps_archived_months(self):
+        self.archive()
+
+        self.assertEqual(rebuild_access_rollups(self.db, batch_size=10, store=self.store), len(self.all_log_ids))
+        self.db.commit()
+        self.assertEqual(sum_access_count(self.db), len(self.all_log_ids))
+        november = self.db.get(AccessDailyStat, "2025-11-10")
+        self.assertEqual((november.access_count, november.unique_users), (40, 2))
+
+    def test_interrupted_run_does_not_duplicate_rows(self):
+        # Segment written but the delete never committed, as after a crash between the two.
+        with self.session_factory() as db:
+            rows = [
+                {"id": row.id, "user_id": row.user_id, "card_id": None, "rfid_uid": row.rfid_uid,
+                 "action": row.action, "timestamp": row.timestamp.isoformat(sep=" ")}
+                for row in db.query(AccessLog)
+                .filter(AccessLog.timestamp < datetime(2025, 11, 1))
+                .order_by(AccessLog.timestamp.desc(), AccessLog.id.desc())
+            ]
+        self.store.append("access_logs", "2025-10", rows)
+
+        self.archive()
+
+        october = self.store.segment("access_logs", "2025-10")
+        self.assertEqual(october.rows, 3)
+        self.assertEqual(len(list(self.store.iter_segment(october))), 3)
+
+    def test_late_rows_are_merged_into_archived_months(self):
+        self.archive()
+        # A replayed offline scan lands in an archived month with an id newer than every live row.
+        with self.session_factory() as db:
+            db.add(AccessLog(user_id="user-1", rfid_uid="replayed", action="entry",
+                             timestamp=datetime(2025, 10, 10, 0, 1, 30)))
+            db.commit()
+            live_ids = sorted(row.id for row in db.query(AccessLog.id))
+
+        self.assertEqual(self.archive().rows, {"access_logs": 1, "door_events": 0})
+        with self.session_factory() as db:
+            self.assertEqual(sorted(row.id for row in db.query(AccessLog.id)), live_ids[:-1])
+
+        october = self.store.segment("access_logs", "2025-10")
+        rows = [row["rfid_uid"] for row in self.store.iter_segment(october)]
+        self.assertEqual(rows, ["2025100002", "replayed", "2025100001", "2025100000"])
+        self.assertTrue(october.newest_first)
+
+    def test_segments_from_before_sorted_writes_still_read_newest_first(self):
+        self.archive()
+        october = self.store.segment("access_logs", "2025-10")
+        rows = list(self.store.iter_segment(october))
+        # Rewrite as an older archive would have: ascending rows, no newest_first flag in the index.
+        with gzip.open(os.path.join(self.store.root, october.file), "wt", encoding="utf-8") as handle:
+            handle.writelines(json.dumps(row) + "\n" for row in reversed(rows))
+        legacy = replace(october, newest_first=False)
+        self.store._write_index({**self.store._load_index(), ("access_logs", "2025-10"): legacy})
+
+        self.assertEqual(list(self.store.iter_segment(legacy)), rows)
+
+    async def test_log_listing_reads_through_archived_months(self):
+        self.archive()
+
+        items, total = [], None
+        cursor = None
+        while True:
+            page = await admin.get_access_logs(page_size=7, cursor=cursor, include_total=True, db=self.db)
+            items.extend(page["items"])
+            cursor, total = page["next_cursor"], page["total"]
+            if cursor is None:
+                break
+
+        self.assertEqual([item["id"] for item in items], self.all_log_ids)
+        self.assertEqual(total, len(self.all_log_ids))
+        archived = next(item for item in items if item["rfid_uid"].startswith("2025100000"))
+        self.assertEqual((archived["user_name"], archived["timestamp"]), ("王小明", "2025-10-10T08:00:00+08:00"))
+
+        logs = await admin.get_access_logs(limit=10, action="denied", end="2025-11-01", db=self.db)
+        self.assertEqual([log["rfid_uid"] for log in logs], ["2025100001"])
+        self.assertEqual(logs[0]["user_name"], "未知")
+
+        page = await admin.get_access_logs(page_size=5, start="2025-11-01", end="2025-12-01", include_total=True, db=self.db)
+        self.assertEqual(page["total"], 40)
+
+        events = await admin.get_door_events(limit=3, db=self.db)
+        self.assertEqual([item["action"] for item in events], ["remote_unlock", "auto_mode", "remote_unlock"])
+
+    def test_exports_and_counters_include_archived_rows(self):
+        self.archive()
+
+        rows = list(iter_access_log_rows(AccessLogFilters(), self.session_factory, batch_size=4, store=self.store))
+        self.assertEqual([row["id"] for row in rows], self.all_log_ids)
+
+        events = list(iter_door_event_rows(DoorEventFilters(action="remote_unlock"), self.session_factory, store=self.store))
+        self.assertEqual([event["created_at"] for event in events],
+                         ["2026-02-01T08:00:00+08:00", "2025-11-20T08:00:00+08:00", "2025-11-03T08:00:00+08:00"])
+
+        counter = RemoteUnlockCounter()
+        counter.load(self.db, self.store)
+        self.assertEqual(counter.snapshot()["remote_unlock_count"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, Card, User
+from app.routers import admin
+from app.services.bulk_import import BulkImportError, parse_import_payload, run_bulk_import
+
+ADMIN = {"id": "admin-1", "username": "root", "name": "Root", "sub": "root"}
+
+CSV_PAYLOAD = "\ufeff" + """student_id,name,email,rfid_uid,ios_scan_text,nickname
+s0000001,Alice,alice@example.com,0000000001,,學生證
+s0000001,,,0000000002,,備用卡
+s0000002,Bob Renamed,,,,
+s0000003,Carol,,0000000099,,
+s0000004,,,0000000004,,
+s0000005,Dave,,0000000001,,
+,Nobody,,,,
+s0000006,Erin,,,Serial number: 04:A2:B3:C4,
+"""
+
+
+class BulkImportTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.session = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)()
+        self.session.add(User(id="user-bob", student_id="s0000002", name="Bob"))
+        self.session.add(User(id="user-zed", student_id="s0000009", name="Zed"))
+        self.session.add(Card(id="card-zed", rfid_uid="0000000099", user_id="user-zed"))
+        self.session.commit()
+
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+
+        patch.object(admin, "get_current_admin", return_value=ADMIN).start()
+        self.index_load = patch.object(admin.card_index, "load").start()
+        self.addCleanup(patch.stopall)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    async def upload(self, payload: str, filename: str = "students.csv", dry_run: bool = False):
+        upload = UploadFile(io.BytesIO(payload.encode("utf-8")), filename=filename)
+        return await admin.bulk_import(file=upload, dry_run=dry_run, db=self.session)
+
+    async def test_csv_import_reports_each_row(self):
+        response = await self.upload(CSV_PAYLOAD)
+        rows = {row["row"]: row for row in response["rows"]}
+
+        self.assertEqual(response["summary"], {
+            "rows": 8,
+            "errors": 4,
+            "users_created": 2,
+            "users_updated": 1,
+            "cards_created": 3,
+            "dry_run": False,
+        })
+        self.assertEqual((rows[1]["user"], rows[1]["card"]), ("created", "created"))
+        self.assertEqual((rows[2]["user"], rows[2]["card"]), ("unchanged", "created"))
+        self.assertEqual(rows[3]["user"], "updated")
+        self.assertEqual(rows[4]["error"], "此卡片 UID 已被其他使用者使用")
+        self.assertEqual(rows[5]["error"], "新使用者需要姓名")
+        self.assertEqual(rows[6]["error"], "卡片 UID 與第 1 列重複")
+        self.assertEqual(rows[7]["error"], "缺少學號")
+        self.assertEqual(rows[8]["rfid_uid"], "3300106756")
+
+        alice = self.session.query(User).filter(User.student_id == "s0000001").one()
+        self.assertEqual(sorted(card.nickname for card in alice.cards), ["備用卡", "學生證"])
+        self.assertEqual(self.session.get(User, "user-bob").name, "Bob Renamed")
+        self.assertIsNone(self.session.query(User).filter(User.student_id == "s0000003").first())
+        self.index_load.assert_called_once()
+
+    async def test_writes_are_batched(self):
+        students = [
+            {"student_id": f"b{index:07d}", "name": f"Student {index}", "rfid_uid": f"{1000 + index:010d}"}
+            for index in range(300)
+        ]
+        response = await self.upload(json.dumps(students), filename="students.json")
+
+        self.assertEqual(response["summary"]["cards_created"], 300)
+        inserts = [statement for statement in self.statements if statement.startswith("INSERT")]
+        self.assertEqual(len(inserts), 2)
+        self.assertLess(len(self.statements), 10)
+
+    async def test_dry_run_writes_nothing(self):
+        response = await self.upload(CSV_PAYLOAD, dry_run=True)
+
+        self.assertEqual(response["summary"]["users_created"], 2)
+        self.assertEqual(self.session.query(User).count(), 2)
+        self.index_load.assert_not_called()
+
+    async def test_rejects_malformed_payloads(self):
+        with self.assertRaises(HTTPException) as raised:
+            await self.upload('{"rows": 1}', filename="students.json")
+        self.assertEqual(raised.exception.status_code, 400)
+
+        with self.assertRaises(BulkImportError):
+            parse_import_payload(b"name\nAlice\n", "csv")
+
+    def test_rerunning_the_same_file_is_idempotent(self):
+        rows = parse_import_payload(CSV_PAYLOAD.encode("utf-8"), "csv")
+        run_bulk_import(self.session, rows)
+        self.session.commit()
+
+        again = run_bulk_import(self.session, rows)
+        self.assertEqual((again.users_created, again.users_updated, again.cards_created), (0, 0, 0))
+        self.assertEqual([row.card for row in again.rows[:2]], ["exists", "exists"])
+
+
+if __name__ == "__main__":
+    unittest.main()
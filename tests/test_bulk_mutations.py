@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, Card, DoorEvent, RegistrationSession, User
+from app.routers import admin
+from app.services.card_index import CardAuthorizationIndex
+
+ADMIN = {"id": "admin-1", "username": "root", "name": "Root", "sub": "root"}
+
+
+class BulkMutationTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.session = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)()
+        for index in range(300):
+            self.session.add(User(id=f"user-{index}", student_id=f"s{index:07d}", name=f"Student {index}"))
+            self.session.add(Card(id=f"card-{index}", rfid_uid=f"{index:010d}", user_id=f"user-{index}"))
+        self.session.add(RegistrationSession(user_id="user-0"))
+        self.session.commit()
+        self.index = CardAuthorizationIndex()
+        self.index.load(self.session)
+
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+
+        patch.object(admin, "get_current_admin", return_value=ADMIN).start()
+        self.notify = patch.object(admin.telegram_dispatcher, "notify").start()
+        patch.object(admin, "card_index", self.index).start()
+        self.index_load = patch.object(self.index, "load").start()
+        self.remove_cards = patch.object(self.index, "remove_cards").start()
+        self.addCleanup(patch.stopall)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def door_events(self):
+        return self.session.query(DoorEvent).all()
+
+    async def test_bulk_delete_users_is_set_based(self):
+        user_ids = [f"user-{index}" for index in range(250)] + ["user-missing", "user-0"]
+        response = await admin.bulk_delete_users(user_ids=user_ids, db=self.session)
+
+        self.assertEqual(response["message"], "已刪除 250 位用戶及 250 張卡片（1 筆不存在）")
+        self.assertEqual(response["missing_ids"], ["user-missing"])
+        self.assertEqual(self.session.query(User).count(), 50)
+        self.assertEqual(self.session.query(Card).count(), 50)
+        self.assertEqual(self.session.query(RegistrationSession).count(), 0)
+        # Lookup, count, three deletes, summary event; not per id.
+        self.assertLess(len(self.statements), 12)
+
+        events = self.door_events()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].action, "bulk_delete_users")
+        self.notify.assert_called_once()
+
+    async def test_bulk_deactivate_and_reassign_cards(self):
+        card_ids = [f"card-{index}" for index in range(300)]
+        response = await admin.bulk_deactivate_cards(card_ids=card_ids, db=self.session)
+
+        self.assertEqual(response["affected"], 300)
+        self.assertEqual(self.session.query(Card).filter(Card.is_active.is_(True)).count(), 0)
+        self.assertLess(len(self.statements), 10)
+
+        await admin.bulk_reassign_cards(card_ids=card_ids[:10], user_id="user-299", db=self.session)
+        self.assertEqual(self.session.query(Card).filter(Card.user_id == "user-299").count(), 11)
+        self.assertEqual([event.action for event in self.door_events()],
+                         ["bulk_deactivate_cards", "bulk_reassign_cards"])
+        # The index is patched for the affected cards only, never reloaded wholesale.
+        self.index_load.assert_not_called()
+        self.assertFalse(self.index.get("0000000299").card_active)
+        self.assertEqual((self.index.get("0000000001").user_id, self.index.get("0000000001").name),
+                         ("user-299", "Student 299"))
+        self.assertEqual(self.index.get("0000000010").user_id, "user-10")
+
+        await admin.bulk_deactivate_users(user_ids=["user-299"], db=self.session)
+        self.assertFalse(self.index.get("0000000001").user_active)
+        self.assertTrue(self.index.get("0000000010").user_active)
+
+        with self.assertRaises(HTTPException) as raised:
+            await admin.bulk_reassign_cards(card_ids=card_ids, user_id="user-missing", db=self.session)
+        self.assertEqual(raised.exception.status_code, 404)
+
+    async def test_bulk_delete_cards_refreshes_index_once(self):
+        response = await admin.bulk_delete_cards(card_ids=["card-1", "card-2", "card-1"], db=self.session)
+
+        self.assertEqual(response["requested"], 2)
+        self.assertEqual(response["message"], "已刪除 2 張卡片")
+        self.remove_cards.assert_called_once_with(["0000000001", "0000000002"])
+
+    def test_bulk_routes_are_registered_before_id_routes(self):
+        paths = [(route.path, sorted(route.methods)) for route in admin.router.routes]
+        self.assertLess(paths.index(("/admin/users/bulk", ["DELETE"])),
+                        paths.index(("/admin/users/{user_id}", ["DELETE"])))
+        self.assertLess(paths.index(("/admin/cards/bulk", ["DELETE"])),
+                        paths.index(("/admin/cards/{card_id}", ["DELETE"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
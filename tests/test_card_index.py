@@ -0,0 +1,101 @@
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, Card, User
+from app.services.card_index import CardAuthorizationIndex
+
+
+class CardAuthorizationIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        TestingSession = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        Base.metadata.create_all(bind=self.engine)
+        self.session = TestingSession()
+
+        self.user = User(id="user-1", student_id="s1100001", name="Alice")
+        self.card = Card(id="card-1", rfid_uid="0340914674", user_id="user-1", nickname="學生證")
+        self.session.add_all([self.user, self.card])
+        self.session.commit()
+
+        self.index = CardAuthorizationIndex()
+        self.index.load(self.session)
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+
+    def test_load_builds_authorized_entries(self):
+        entry = self.index.get("0340914674")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.user_id, "user-1")
+        self.assertEqual(entry.card_id, "card-1")
+        self.assertEqual(entry.nickname, "學生證")
+        self.assertTrue(entry.is_authorized)
+        self.assertTrue(self.index.loaded)
+
+    def test_card_revocation_takes_effect_on_upsert(self):
+        self.card.is_active = False
+        self.session.commit()
+        self.index.upsert_card(self.card, self.user)
+
+        self.assertFalse(self.index.get("0340914674").is_authorized)
+
+    def test_patch_user_updates_every_card(self):
+        second_card = Card(id="card-2", rfid_uid="1234567890", user_id="user-1")
+        self.session.add(second_card)
+        self.session.commit()
+        self.index.upsert_card(second_card, self.user)
+
+        self.user.is_active = False
+        self.user.name = "Alice Chen"
+        self.session.commit()
+        self.assertEqual(self.index.patch_user(self.user), 2)
+
+        for rfid_uid in ("0340914674", "1234567890"):
+            with self.subTest(rfid_uid=rfid_uid):
+                entry = self.index.get(rfid_uid)
+                self.assertFalse(entry.is_authorized)
+                self.assertEqual(entry.name, "Alice Chen")
+
+    def test_remove_user_and_cards(self):
+        self.index.remove_card("0340914674")
+        self.assertIsNone(self.index.get("0340914674"))
+
+        self.index.upsert_card(self.card, self.user)
+        self.index.remove_user("user-1")
+        self.assertIsNone(self.index.get("0340914674"))
+        self.assertEqual(len(self.index), 0)
+
+    def test_padding_variants_resolve_to_the_same_card(self):
+        for rfid_uid in ("340914674", " 0340914674", "000340914674"):
+            with self.subTest(rfid_uid=rfid_uid):
+                self.assertEqual(self.index.get(rfid_uid).card_id, "card-1")
+
+        self.index.remove_card("340914674")
+        self.assertIsNone(self.index.get("0340914674"))
+
+    def test_padding_duplicates_never_shadow_a_revoked_card(self):
+        # Legacy rows: the same UID stored twice with different padding, one revoked, one someone else's.
+        self.card.is_active = False
+        self.session.add_all([
+            User(id="user-2", student_id="s1100002", name="Bob"),
+            Card(id="card-2", rfid_uid="340914674", user_id="user-2"),
+        ])
+        self.session.commit()
+        with self.assertLogs("app.services.card_index", "WARNING"):
+            self.index.load(self.session)
+
+        self.assertEqual(self.index.get("0340914674").card_id, "card-1")
+        self.assertEqual(self.index.get("340914674").card_id, "card-2")
+        self.assertEqual(self.index.get("000340914674").card_id, "card-1")
+        self.assertEqual(len(self.index.entries()[1]), 1)
+
+        self.index.remove_card("0340914674")
+        self.assertEqual(self.index.get("000340914674").card_id, "card-2")
+        self.assertEqual(self.index.get("340914674").user_id, "user-2")
+
+
+if __name__ == "__main__":
+    unittest.main()
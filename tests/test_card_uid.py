@@ -2,7 +2,10 @@ import unittest
 
 from app.services.card_uid import (
     CardUIDNormalizationError,
+    canonicalize_card_uid,
+    card_uid_key,
     convert_ios_serial_to_rfid_uid,
+    format_card_uid,
     normalize_card_uid_input,
 )
 
@@ -34,6 +37,17 @@ class CardUIDNormalizationTests(unittest.TestCase):
         with self.assertRaises(CardUIDNormalizationError):
             normalize_card_uid_input(rfid_uid="1234567890", ios_scan_text="F2:F1:51:14")
 
+    def test_canonical_integer_ignores_padding(self):
+        self.assertEqual(canonicalize_card_uid("0340914674"), 340914674)
+        self.assertEqual(canonicalize_card_uid(" 340914674\n"), 340914674)
+        self.assertEqual(canonicalize_card_uid(convert_ios_serial_to_rfid_uid("F2:F1:51:14")), 340914674)
+        self.assertEqual(format_card_uid(340914674), "0340914674")
+
+        self.assertIsNone(canonicalize_card_uid("04A1B2C3"))
+        self.assertIsNone(canonicalize_card_uid(str(2 ** 63)))
+        self.assertIsNone(canonicalize_card_uid(""))
+        self.assertEqual(card_uid_key("04A1B2C3 "), "04A1B2C3")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, Card, User
+from app.services.bulk_import import run_bulk_import
+from app.services.card_index import card_uid_clause
+from app.services.db_maintenance import backfill_card_uid_ints
+
+
+class CardUIDBackfillTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+
+        # Cards written before uid_int existed: the column is still NULL everywhere.
+        with self.session_factory() as db:
+            db.add(User(id="user-1", student_id="s1100001", name="Alice"))
+            db.add(User(id="user-2", student_id="s1100002", name="Bob"))
+            for index in range(7):
+                db.add(Card(id=f"card-{index}", rfid_uid=f"{index + 1:010d}", user_id="user-1"))
+            db.add(Card(id="card-hex", rfid_uid="04A1B2C3", user_id="user-1"))
+            db.add(Card(id="card-short", rfid_uid="7", user_id="user-2"))  # same card as 0000000007
+            db.commit()
+        self.db = self.session_factory()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def test_backfill_fills_in_chunks_and_skips_duplicates(self):
+        self.assertEqual(backfill_card_uid_ints(self.session_factory, chunk_size=3, pause=0), 7)
+        self.assertEqual(backfill_card_uid_ints(self.session_factory, chunk_size=3, pause=0), 0)
+
+        uid_ints = dict(self.db.query(Card.id, Card.uid_int))
+        self.assertEqual(uid_ints["card-0"], 1)
+        self.assertIsNone(uid_ints["card-hex"])
+        self.assertEqual(sum(1 for card_id in ("card-6", "card-short") if uid_ints[card_id] == 7), 1)
+
+        with self.assertRaises(IntegrityError):
+            self.db.execute(update(Card).where(Card.id == "card-hex").values(uid_int=1))
+            self.db.commit()
+
+    def test_lookups_match_padding_variants_before_and_after_backfill(self):
+        self.assertEqual(self.db.query(Card).filter(card_uid_clause("0000000001")).one().id, "card-0")
+        backfill_card_uid_ints(self.session_factory, pause=0)
+        self.assertEqual(self.db.query(Card).filter(card_uid_clause("1")).one().id, "card-0")
+        self.assertEqual(self.db.query(Card).filter(card_uid_clause("04A1B2C3")).one().id, "card-hex")
+
+        result = run_bulk_import(self.db, [{"student_id": "s1100002", "rfid_uid": "00000000002"}])
+        self.assertEqual(result.rows[0].error, "此卡片 UID 已被其他使用者使用")
+
+    def test_uid_lookup_uses_the_indexes(self):
+        statement = self.db.query(Card.id).filter(card_uid_clause("0340914674")).statement
+        sql = str(statement.compile(self.engine, compile_kwargs={"literal_binds": True}))
+        with self.engine.connect() as connection:
+            plan = " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+        self.assertIn("ux_cards_uid_int", plan)
+        self.assertNotIn("SCAN cards", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
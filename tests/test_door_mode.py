@@ -20,6 +20,9 @@ from app.services.door_mode import (
     can_defer_mode_switch,
     evaluate_schedule,
     get_card_access_decision,
+    get_door_settings_state,
+    get_next_schedule_boundary,
+    invalidate_door_settings_cache,
     normalize_weekday_mode_overrides,
     resolve_effective_access_mode,
     serialize_door_settings,
@@ -344,6 +347,61 @@ class DoorModeTests(unittest.TestCase):
             session.close()
             engine.dispose()
 
+    def test_next_schedule_boundary_walks_through_the_day(self):
+        settings = self.make_settings()
+
+        self.assertEqual(
+            get_next_schedule_boundary(settings, datetime(2026, 4, 29, 8, 0, tzinfo=APP_TIMEZONE)),
+            datetime(2026, 4, 29, 9, 0, tzinfo=APP_TIMEZONE),
+        )
+        self.assertEqual(
+            get_next_schedule_boundary(settings, datetime(2026, 4, 29, 9, 0, tzinfo=APP_TIMEZONE)),
+            datetime(2026, 4, 29, 22, 0, tzinfo=APP_TIMEZONE),
+        )
+        self.assertEqual(
+            get_next_schedule_boundary(settings, datetime(2026, 4, 29, 22, 30, tzinfo=APP_TIMEZONE)),
+            datetime(2026, 4, 30, 0, 0, tzinfo=APP_TIMEZONE),
+        )
+
+    def test_cached_state_skips_database_until_phase_boundary(self):
+        engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        TestingSession = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+        Base.metadata.create_all(bind=engine)
+        session = TestingSession()
+        invalidate_door_settings_cache()
+
+        try:
+            session.add(self.make_settings())
+            session.commit()
+
+            snapshot, evaluation = get_door_settings_state(
+                session,
+                datetime(2026, 4, 29, 8, 0, tzinfo=APP_TIMEZONE),
+            )
+            self.assertEqual(evaluation.phase, SCHEDULE_PHASE_OUTSIDE_SCHEDULE)
+
+            with patch(
+                "app.services.door_mode.get_or_create_door_settings",
+                side_effect=AssertionError("read path must not hit the database"),
+            ):
+                cached_snapshot, cached_evaluation = get_door_settings_state(
+                    session,
+                    datetime(2026, 4, 29, 8, 59, tzinfo=APP_TIMEZONE),
+                )
+                self.assertIs(cached_snapshot, snapshot)
+                self.assertEqual(cached_evaluation.phase, SCHEDULE_PHASE_OUTSIDE_SCHEDULE)
+                self.assertEqual(cached_evaluation.now_local.minute, 59)
+
+                _, boundary_evaluation = get_door_settings_state(
+                    session,
+                    datetime(2026, 4, 29, 9, 0, tzinfo=APP_TIMEZONE),
+                )
+                self.assertEqual(boundary_evaluation.phase, SCHEDULE_PHASE_WAITING_FOR_FIRST_SCAN)
+        finally:
+            invalidate_door_settings_cache()
+            session.close()
+            engine.dispose()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.main as main
+from app.config import LOCK_PIN, RFID_DEVICE_PATHS
+from app.database import AccessLog, Base, Card, DoorControlSettings, DoorEvent, User
+from app.routers import admin
+from app.services.card_index import card_index
+from app.services.door_mode import invalidate_door_settings_cache, remove_door_settings_listener
+from app.services.door_registry import (
+    Door,
+    DoorConfig,
+    DoorConfigError,
+    DoorRegistry,
+    parse_doors_config,
+    primary_door_config,
+    validate_door_configs,
+)
+from app.services.door_status import attach_door_status_publishers, publish_door_settings, remote_unlock_counter
+from app.services.event_stream import door_status_events
+from app.services.gpio_control import LockActuator
+from app.services.rfid_reader import RFIDReader
+from app.services.scan_debouncer import ScanDebouncer
+
+ADMIN = {"id": "admin-1", "username": "root", "name": "Root", "sub": "root"}
+LAB = DoorConfig("lab", "實驗室", ("/dev/input/by-id/reader-lab",), lock_pin=LOCK_PIN + 4, lock_duration=5)
+
+
+class DoorConfigTests(unittest.TestCase):
+    def test_parses_inline_json_and_files(self):
+        raw = json.dumps([{"id": "lab", "name": "實驗室", "readers": "/dev/input/by-id/reader-lab", "lock_pin": 20}])
+        (lab,) = parse_doors_config(raw)
+        self.assertEqual((lab.door_id, lab.device_paths, lab.lock_pin), ("lab", ("/dev/input/by-id/reader-lab",), 20))
+        self.assertEqual(parse_doors_config(""), [])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "doors.json")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(raw)
+            self.assertEqual(parse_doors_config(path), [lab])
+
+    def test_rejects_doors_that_collide(self):
+        for raw in (
+            '{"id": "lab"}',
+            '[{"id": "Lab Door", "readers": ["/dev/a"], "lock_pin": 20}]',
+            '[{"id": "lab", "readers": [], "lock_pin": 20}]',
+            '[{"id": "lab", "readers": ["/dev/a"]}]',
+            '[{"id": "lab", "readers": ["/dev/a"], "lock_pin": 20, "lock_active_level": 2}]',
+        ):
+            with self.subTest(raw=raw), self.assertRaises(DoorConfigError):
+                parse_doors_config(raw)
+
+        primary = primary_door_config()
+        for config in (
+            DoorConfig("main", "重複", ("/dev/a",), lock_pin=LOCK_PIN + 1),
+            DoorConfig("lab", "同腳位", ("/dev/a",), lock_pin=LOCK_PIN),
+            DoorConfig("lab", "同讀卡機", (RFID_DEVICE_PATHS[0],), lock_pin=LOCK_PIN + 1),
+        ):
+            with self.subTest(config=config), self.assertRaises(DoorConfigError):
+                validate_door_configs([primary, config])
+
+
+class MultiDoorTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # One shared connection so the event writer's worker thread sees the same in-memory tables.
+        self.engine = create_engine(
+            "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        self.db = self.session_factory()
+        self.db.add_all([
+            User(id="user-1", student_id="s1100001", name="Alice"),
+            Card(id="card-1", rfid_uid="0340914674", user_id="user-1"),
+        ])
+        self.db.commit()
+        card_index.load(self.db)
+        self.addCleanup(card_index.clear)
+        invalidate_door_settings_cache()
+        self.addCleanup(invalidate_door_settings_cache)
+
+        self.relay_writes = {"main": [], "lab": []}
+        self.main_door = self.make_door(primary_door_config())
+        self.lab_door = self.make_door(LAB)
+        self.registry = DoorRegistry([self.main_door, self.lab_door])
+
+        for module in (main, admin):
+            patch.object(module, "door_registry", self.registry).start()
+        patch.object(main, "SessionLocal", self.session_factory).start()
+        patch.object(main, "scan_debouncer", ScanDebouncer(3)).start()
+        patch.object(main.event_writer, "session_factory", self.session_factory).start()
+        patch.object(main.telegram_dispatcher, "notify").start()
+        patch.object(admin, "get_current_admin", return_value=ADMIN).start()
+        self.addCleanup(patch.stopall)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def make_door(self, config: DoorConfig) -> Door:
+        actuator = LockActuator(
+            door_id=config.door_id,
+            lock_duration=config.lock_duration,
+            pin=config.lock_pin,
+            relay_writer=self.relay_writes[config.door_id].append,
+        )
+        self.addCleanup(actuator.force_lock)
+        return Door(config, actuator, RFIDReader(list(config.device_paths), dev_mode=True))
+
+    @staticmethod
+    async def drain(subscription) -> list[dict]:
+        updates = []
+        while (event := await subscription.get(0.05)) is not None:
+            updates.append(event["data"])
+        return updates
+
+    async def settle(self):
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        await asyncio.gather(*pending)
+
+    async def test_each_door_decides_with_its_own_settings(self):
+        await admin.update_door_settings(
+            access_mode="always_locked",
+            weekday_mode_overrides=None,
+            daily_lock_time=None,
+            first_unlock_time=None,
+            apply_timing="immediate",
+            door_id="lab",
+            db=self.db,
+        )
+
+        # The same card at both doors at once: neither scan is debounced by the other.
+        await asyncio.gather(
+            main.handle_rfid_scan("0340914674", door=self.main_door),
+            main.handle_rfid_scan("0340914674", door=self.lab_door),
+        )
+        await self.settle()
+
+        self.assertEqual(self.relay_writes, {"main": [True], "lab": []})
+        self.assertEqual([log.door_id for log in self.db.query(AccessLog)], ["main"])
+        self.assertEqual(
+            [(row.id, row.door_id, row.access_mode) for row in self.db.query(DoorControlSettings).order_by(DoorControlSettings.id)],
+            [(1, "main", "normal"), (2, "lab", "always_locked")],
+        )
+        self.assertEqual(self.db.query(DoorEvent.door_id).filter(DoorEvent.action == "door_settings_updated").scalar(), "lab")
+
+        status = await admin.get_door_status(door_id="lab", db=self.db)
+        self.assertEqual((status["door_id"], status["access_mode"], status["lock_pin"]), ("lab", "always_locked", LAB.lock_pin))
+        self.assertEqual((await admin.get_door_status(db=self.db))["access_mode"], "normal")
+        self.assertEqual([door["door_id"] for door in await admin.list_doors(db=self.db)], ["main", "lab"])
+        with self.assertRaises(HTTPException) as raised:
+            await admin.get_door_status(door_id="garage", db=self.db)
+        self.assertEqual(raised.exception.status_code, 404)
+
+    async def test_repeat_scans_only_extend_a_timed_unlock(self):
+        lab_settings = DoorControlSettings(id=2, door_id="lab", access_mode="always_locked")
+        self.db.add(lab_settings)
+        self.db.commit()
+        deny = patch.object(main, "deny_access").start()
+        extend = patch.object(main, "extend_unlock", return_value=True).start()
+
+        for door in (self.main_door, self.lab_door):
+            await main.handle_rfid_scan("0340914674", door=door)
+        await self.settle()
+        # A remote unlock is running at the lab; the card is still not allowed in there.
+        self.lab_door.actuator.open_lock()
+        deny.reset_mock()
+
+        for door in (self.main_door, self.lab_door):
+            await main.handle_rfid_scan("340914674", door=door)
+
+        extend.assert_called_once_with(actuator=self.main_door.actuator)
+        deny.assert_called_once_with(self.lab_door.actuator)
+
+    async def test_status_is_published_on_the_scanning_doors_topic(self):
+        attach_door_status_publishers(self.registry)
+        self.addCleanup(remove_door_settings_listener, publish_door_settings)
+        # A remote unlock from before multi-door support has no door_id and counts for the primary door.
+        self.db.add(DoorEvent(admin_name="Old", action="remote_unlock", source="door_control_ui", result="accepted"))
+        self.db.commit()
+        remote_unlock_counter.reset()
+        self.addCleanup(remote_unlock_counter.reset)
+
+        with door_status_events.subscribe("door:lab") as lab_stream, door_status_events.subscribe("door") as main_stream:
+            result = await admin.remote_unlock(door_id="lab", db=self.db)
+            self.assertEqual(result["lock_duration_seconds"], 5)
+            lab_updates = await self.drain(lab_stream)
+            main_updates = await self.drain(main_stream)
+
+        self.assertIn("unlocking", [update.get("door_state") for update in lab_updates])
+        counters = next(update for update in lab_updates if "remote_unlock_count" in update)
+        self.assertEqual((counters["remote_unlock_count"], counters["last_remote_unlock_by"]), (1, "Root"))
+        self.assertEqual(main_updates, [])
+
+        main_status = await admin.get_door_status(db=self.db)
+        self.assertEqual((main_status["remote_unlock_count"], main_status["last_remote_unlock_by"]), (1, "Old"))
+        self.assertEqual(self.relay_writes, {"main": [], "lab": [True]})
+        self.assertEqual(
+            self.db.query(DoorEvent.door_id).filter(DoorEvent.admin_name == "Root").scalar(), "lab"
+        )
+
+    async def test_scheduler_enforces_every_door(self):
+        self.db.add(DoorControlSettings(id=2, door_id="lab", access_mode="always_locked"))
+        self.db.commit()
+        self.lab_door.actuator.hold_unlock()
+
+        await main.enforce_door_mode()
+
+        self.assertEqual((self.main_door.actuator.door_state, self.lab_door.actuator.door_state), ("locked", "locked"))
+        self.assertEqual(self.relay_writes, {"main": [], "lab": [True, False]})
+        event = self.db.query(DoorEvent).one()
+        self.assertEqual((event.action, event.door_id), ("always_locked_enforced", "lab"))
+        self.assertIn("實驗室", event.description)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta
+import unittest
+
+from app.services.door_scheduler import DoorModeScheduler
+from app.timezone import APP_TIMEZONE
+
+
+class FakeClock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+class DoorModeSchedulerTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock(datetime(2026, 3, 10, 9, 30, tzinfo=APP_TIMEZONE))
+        self.transition = datetime(2026, 3, 10, 18, 0, tzinfo=APP_TIMEZONE)
+
+    def test_sleeps_until_next_transition(self):
+        scheduler = DoorModeScheduler(
+            clock=self.clock,
+            next_transition=lambda now: self.transition,
+            max_sleep_seconds=86400,
+        )
+
+        self.assertEqual(scheduler.seconds_until_next_run(), 8.5 * 3600)
+        self.assertEqual(scheduler.next_run_at, self.transition)
+
+        self.clock.now = self.transition + timedelta(seconds=1)
+        self.assertEqual(scheduler.seconds_until_next_run(), 0.0)
+
+    def test_sleep_is_capped_by_safety_net(self):
+        scheduler = DoorModeScheduler(
+            clock=self.clock,
+            next_transition=lambda now: self.transition,
+            max_sleep_seconds=600,
+        )
+        self.assertEqual(scheduler.seconds_until_next_run(), 600)
+
+        scheduler.next_transition = lambda now: None
+        self.assertEqual(scheduler.seconds_until_next_run(), 600)
+        self.assertEqual(scheduler.next_run_at, self.clock.now + timedelta(seconds=600))
+
+    async def test_wake_runs_tick_before_transition(self):
+        scheduler = DoorModeScheduler(
+            clock=self.clock,
+            next_transition=lambda now: self.transition,
+            max_sleep_seconds=86400,
+        )
+        ticked = asyncio.Event()
+
+        async def tick():
+            ticked.set()
+
+        task = asyncio.create_task(scheduler.run(tick))
+        try:
+            await asyncio.wait_for(ticked.wait(), timeout=1)
+            ticked.clear()
+            await asyncio.sleep(0)
+            self.assertEqual(scheduler.tick_count, 1)
+
+            scheduler.wake()
+            await asyncio.wait_for(ticked.wait(), timeout=1)
+            self.assertEqual(scheduler.tick_count, 2)
+        finally:
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+    async def test_failing_tick_keeps_scheduler_alive(self):
+        scheduler = DoorModeScheduler(
+            clock=self.clock,
+            next_transition=lambda now: now,
+            max_sleep_seconds=86400,
+        )
+        calls = []
+
+        async def tick():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise RuntimeError("database is locked")
+
+        task = asyncio.create_task(scheduler.run(tick))
+        try:
+            for _ in range(20):
+                await asyncio.sleep(0)
+                if len(calls) >= 2:
+                    break
+            self.assertGreaterEqual(len(calls), 2)
+        finally:
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+
+if __name__ == "__main__":
+    unittest.main()
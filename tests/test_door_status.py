@@ -0,0 +1,95 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, DoorEvent
+from app.routers import admin
+from app.services.door_mode import invalidate_door_settings_cache, remove_door_settings_listener
+from app.services.door_status import (
+    attach_door_status_publishers,
+    publish_door_settings,
+    publish_lock_state,
+    remote_unlock_counter,
+)
+from app.services.gpio_control import lock_actuator
+
+ADMIN = {"id": "admin-1", "username": "root", "name": "Root", "sub": "root"}
+
+
+def parse_sse(chunk: str) -> dict:
+    data_line = next(line for line in chunk.splitlines() if line.startswith("data: "))
+    return json.loads(data_line[len("data: "):])
+
+
+class DoorStatusStreamTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        self.db = self.session_factory()
+        for index in range(3):
+            self.db.add(DoorEvent(admin_name="Old", action="remote_unlock", source="door_control_ui", result="accepted"))
+        self.db.commit()
+
+        invalidate_door_settings_cache()
+        remote_unlock_counter.reset()
+        attach_door_status_publishers()
+        self.addCleanup(lock_actuator.remove_listener, publish_lock_state)
+        self.addCleanup(remove_door_settings_listener, publish_door_settings)
+        self.addCleanup(lock_actuator.force_lock)
+        self.addCleanup(remote_unlock_counter.reset)
+        self.addCleanup(invalidate_door_settings_cache)
+
+        patch.object(admin, "get_current_admin", return_value=ADMIN).start()
+        patch.object(admin.telegram_dispatcher, "notify").start()
+        self.addCleanup(patch.stopall)
+
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    async def test_status_reads_are_served_from_memory(self):
+        first = await admin.get_door_status(db=self.db)
+        self.assertEqual(first["remote_unlock_count"], 3)
+        self.assertEqual(first["last_remote_unlock_by"], "Old")
+
+        self.statements.clear()
+        await admin.get_door_status(db=self.db)
+        self.assertEqual(self.statements, [])
+
+    async def test_streams_relay_transitions_and_unlock_counters(self):
+        await admin.get_door_status(db=self.db)  # warm settings cache, as on a running server
+        response = await admin.stream_door_status(db=self.session_factory())
+        stream = response.body_iterator
+        snapshot = parse_sse(await stream.__anext__())
+        self.assertEqual((snapshot["door_state"], snapshot["remote_unlock_count"]), ("locked", 3))
+
+        self.statements.clear()
+        pending = asyncio.ensure_future(stream.__anext__())
+        done, _ = await asyncio.wait({pending}, timeout=0.05)
+        self.assertFalse(done)
+        self.assertEqual(self.statements, [])
+
+        with patch.object(lock_actuator, "lock_duration", 0.05):
+            await admin.remote_unlock(db=self.db)
+
+            patches = [parse_sse(await pending)]
+            while patches[-1].get("door_state") != "locked":
+                patches.append(parse_sse(await asyncio.wait_for(stream.__anext__(), 2)))
+
+        self.assertEqual(patches[0]["door_state"], "unlocking")
+        counters = next(item for item in patches if "remote_unlock_count" in item)
+        self.assertEqual((counters["remote_unlock_count"], counters["last_remote_unlock_by"]), (4, "Root"))
+        await stream.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
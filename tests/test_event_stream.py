@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+import unittest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+from app.database import Base, Card, User
+from app.routers import web
+from app.services.event_stream import EventBroker, format_sse, registration_events
+from app.services.registration import start_registration_session
+from app.timezone import utcnow
+
+ADMIN = {"id": "admin-1", "username": "root", "name": "Root", "sub": "root"}
+
+
+def parse_sse(chunk: str) -> dict:
+    data_line = next(line for line in chunk.splitlines() if line.startswith("data: "))
+    return json.loads(data_line[len("data: "):])
+
+
+class EventBrokerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_fans_out_per_topic_and_drops_oldest(self):
+        broker = EventBroker("test", max_queue_size=2)
+        with broker.subscribe("a") as first, broker.subscribe("a") as second, broker.subscribe("b") as other:
+            for index in range(3):
+                self.assertEqual(broker.publish("a", "tick", {"n": index}), 2)
+
+            self.assertEqual([(await first.get(0.1))["data"]["n"] for _ in range(2)], [1, 2])
+            self.assertEqual((await second.get(0.1))["data"]["n"], 1)
+            self.assertIsNone(await other.get(0.01))
+            self.assertEqual(broker.stats()["dropped"], 2)
+
+        self.assertEqual(broker.stats()["topics"], 0)
+        self.assertEqual(broker.publish("a", "tick", {}), 0)
+
+    async def test_publish_from_worker_thread(self):
+        broker = EventBroker("test")
+        with broker.subscribe("a") as subscription:
+            thread = threading.Thread(target=broker.publish, args=("a", "tick", {"n": 1}))
+            thread.start()
+            thread.join()
+            self.assertEqual((await subscription.get(1))["data"], {"n": 1})
+
+    def test_format_sse(self):
+        self.assertEqual(format_sse("tick", {"msg": "綁定"}, 7), 'id: 7\nevent: tick\ndata: {"msg":"綁定"}\n\n')
+
+
+class RegistrationStreamTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+        self.db = self.session_factory()
+        self.db.add(User(id="user-1", student_id="s0000001", name="Alice"))
+        self.db.commit()
+
+        patch.object(web, "get_current_admin", return_value=ADMIN).start()
+        self.addCleanup(patch.stopall)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    async def open_stream(self):
+        response = await web.stream_status("s0000001", db=self.session_factory())
+        return response.body_iterator
+
+    async def test_pushes_scan_transitions_without_querying(self):
+        session, _ = start_registration_session(self.db, "user-1")
+        stream = await self.open_stream()
+        snapshot = parse_sse(await stream.__anext__())
+        self.assertEqual(snapshot["last_status"], "waiting_for_first_scan")
+        self.assertEqual(snapshot["card_count"], 0)
+
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        pending = asyncio.ensure_future(stream.__anext__())
+        done, _ = await asyncio.wait({pending}, timeout=0.05)
+        self.assertFalse(done)
+        self.assertEqual(statements, [])
+
+        patch.object(main, "sync_door_hardware_state", return_value=(None, MagicMock(), {})).start()
+        patch.object(main, "get_card_access_decision", return_value="deny").start()
+        patch.object(main.telegram_dispatcher, "notify").start()
+
+        await main.handle_register_mode("0000000042", self.db, session)
+        pushed = parse_sse(await pending)
+        self.assertEqual((pushed["last_status"], pushed["card_count"]), ("waiting_for_second_scan", 0))
+        # The push and a poll of /check_status describe the session with the same fields.
+        polled = await web.check_status("s0000001", db=self.db)
+        self.assertEqual(pushed.keys(), polled.keys())
+
+        await main.handle_register_mode("0000000042", self.db, session)
+        completed = parse_sse(await stream.__anext__())
+        self.assertEqual((completed["last_status"], completed["bound"], completed["card_count"]), ("completed", True, 1))
+        with self.assertRaises(StopAsyncIteration):
+            await stream.__anext__()
+
+        self.assertEqual(self.db.query(Card).count(), 1)
+        self.assertEqual(registration_events.subscriber_count("user-1"), 0)
+
+    async def test_uncommitted_session_is_not_published(self):
+        with registration_events.subscribe("user-1") as subscription:
+            session, _ = start_registration_session(self.db, "user-1", commit=False)
+            self.db.rollback()
+            self.assertIsNone(await subscription.get(0.05))
+
+            session, _ = start_registration_session(self.db, "user-1")
+            self.assertEqual((await subscription.get(1))["data"]["last_status"], "waiting_for_first_scan")
+
+    async def test_reports_timeout_when_session_expires(self):
+        session, _ = start_registration_session(self.db, "user-1")
+        session.expires_at = utcnow() + timedelta(milliseconds=50)
+        self.db.commit()
+
+        stream = await self.open_stream()
+        self.assertTrue(parse_sse(await stream.__anext__())["binding_in_progress"])
+        expired = parse_sse(await asyncio.wait_for(stream.__anext__(), 2))
+        self.assertEqual((expired["last_status"], expired["binding_in_progress"]), ("timed_out", False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import AccessLog, Base, DoorEvent
+from app.services import event_writer as event_writer_module
+from app.services.event_writer import MAX_WRITE_ATTEMPTS, EventWriter
+
+
+class EventWriterTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        database_path = os.path.join(self.temp_dir.name, "events.db")
+        self.engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.TestingSession = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def count_rows(self, model):
+        with self.TestingSession() as db:
+            return db.query(model).count()
+
+    @staticmethod
+    def raise_locked(*args, **kwargs):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    async def test_coalesces_rows_into_one_batch(self):
+        writer = EventWriter(self.TestingSession, flush_interval_ms=50, batch_size=10, max_queue_size=100)
+        await writer.start()
+        for index in range(5):
+            await writer.submit(AccessLog, user_id=f"user-{index}", rfid_uid=str(index), action="entry")
+        await writer.submit(
+            DoorEvent,
+            admin_name="系統自動化",
+            action="schedule_auto_lock",
+            source="door_scheduler",
+            result="accepted",
+        )
+        await asyncio.sleep(0.2)
+
+        self.assertEqual(self.count_rows(AccessLog), 5)
+        self.assertEqual(self.count_rows(DoorEvent), 1)
+        self.assertEqual(writer.stats()["batches"], 1)
+        self.assertEqual(writer.queue_depth, 0)
+        await writer.stop()
+
+    async def test_stop_flushes_pending_rows(self):
+        writer = EventWriter(self.TestingSession, flush_interval_ms=60_000, batch_size=1000, max_queue_size=100)
+        await writer.start()
+        for index in range(3):
+            await writer.submit(AccessLog, user_id="user-1", rfid_uid=str(index), action="entry")
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.count_rows(AccessLog), 0)
+        await writer.stop()
+        self.assertEqual(self.count_rows(AccessLog), 3)
+
+    async def test_submit_waits_when_queue_is_full(self):
+        writer = EventWriter(self.TestingSession, flush_interval_ms=60_000, batch_size=1000, max_queue_size=1)
+        writer._queue = asyncio.Queue(maxsize=1)
+        writer._task = asyncio.create_task(asyncio.sleep(3600))
+        await writer.submit(AccessLog, user_id="user-1", rfid_uid="1", action="entry")
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                writer.submit(AccessLog, user_id="user-1", rfid_uid="2", action="entry"),
+                timeout=0.05,
+            )
+        self.assertEqual(writer.queue_depth, 1)
+
+        writer._task.cancel()
+        await asyncio.sleep(0)
+        await writer.stop()
+        self.assertEqual(self.count_rows(AccessLog), 1)
+
+    async def test_writes_through_when_not_started(self):
+        writer = EventWriter(self.TestingSession)
+        await writer.submit(AccessLog, user_id="user-1", rfid_uid="1", action="entry")
+        self.assertEqual(self.count_rows(AccessLog), 1)
+
+    async def test_failed_batches_are_held_and_retried_first(self):
+        failures = [MAX_WRITE_ATTEMPTS]
+
+        def locked_session():
+            db = self.TestingSession()
+            if failures[0]:
+                failures[0] -= 1
+                db.execute = self.raise_locked
+            return db
+
+        patch.object(event_writer_module, "WRITE_RETRY_BACKOFF_SECONDS", 0.001).start()
+        patch.object(event_writer_module, "HELD_RETRY_SECONDS", 0.3).start()
+        self.addCleanup(patch.stopall)
+        writer = EventWriter(locked_session, flush_interval_ms=10, batch_size=10, max_queue_size=100)
+        await writer.start()
+        await writer.submit(AccessLog, user_id="user-1", rfid_uid="1", action="entry")
+        await asyncio.sleep(0.1)
+
+        # Every attempt failed: the row is held, not dropped.
+        self.assertEqual(writer.stats()["held"], 1)
+        self.assertEqual(self.count_rows(AccessLog), 0)
+
+        await asyncio.sleep(0.4)
+        self.assertEqual(self.count_rows(AccessLog), 1)
+        self.assertEqual((writer.stats()["held"], writer.stats()["failed"]), (0, 0))
+        await writer.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import csv
+from datetime import datetime, timedelta
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import AccessLog, Base, DoorEvent, User
+from app.services.access_log_query import AccessLogFilters
+from app.services.exporter import (
+    ACCESS_LOG_EXPORT_COLUMNS,
+    DOOR_EVENT_EXPORT_COLUMNS,
+    DoorEventFilters,
+    build_export_filename,
+    iter_access_log_rows,
+    iter_door_event_rows,
+    stream_export,
+)
+
+
+class ExporterTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        database_path = os.path.join(self.temp_dir.name, "export.db")
+        self.engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+
+        with self.session_factory() as db:
+            db.add(User(id="user-1", student_id="s0000001", name="王小明"))
+            base_time = datetime(2026, 1, 1, 0, 0, 0)
+            for index in range(25):
+                db.add(AccessLog(
+                    user_id="user-1" if index % 2 == 0 else "unknown",
+                    rfid_uid=f"{index:010d}",
+                    action="entry" if index % 2 == 0 else "denied",
+                    timestamp=base_time + timedelta(hours=index),
+                ))
+            db.add(DoorEvent(admin_id="admin-1", admin_name="Root", action="remote_unlock",
+                             source="web", result="success", created_at=base_time))
+            db.add(DoorEvent(admin_name="系統自動化", action="auto_mode", source="scheduler", result="success",
+                             created_at=base_time + timedelta(hours=1)))
+            db.commit()
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def access_rows(self, filters=None, batch_size=4):
+        return iter_access_log_rows(filters or AccessLogFilters(), session_factory=self.session_factory, batch_size=batch_size)
+
+    def test_csv_has_bom_header_and_local_times(self):
+        body = b"".join(stream_export(self.access_rows(), ACCESS_LOG_EXPORT_COLUMNS, "csv")).decode("utf-8")
+
+        self.assertTrue(body.startswith("\ufeff"))
+        rows = list(csv.DictReader(io.StringIO(body.lstrip("\ufeff"))))
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(list(rows[0].keys()), list(ACCESS_LOG_EXPORT_COLUMNS))
+        self.assertEqual(rows[0]["timestamp"], "2026-01-02T08:00:00+08:00")
+        self.assertEqual(rows[0]["user_name"], "王小明")
+        self.assertEqual(rows[-1]["timestamp"], "2026-01-01T08:00:00+08:00")
+
+    def test_ndjson_gzip_and_filters(self):
+        filters = AccessLogFilters(action="denied", end=datetime(2026, 1, 1, 10, 0, 0))
+        payload = b"".join(stream_export(self.access_rows(filters), ACCESS_LOG_EXPORT_COLUMNS, "ndjson", compress=True))
+
+        lines = gzip.decompress(payload).decode("utf-8").splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([record["rfid_uid"] for record in records], ["0000000009", "0000000007", "0000000005", "0000000003", "0000000001"])
+        self.assertTrue(all(record["user_name"] == "未知" for record in records))
+
+    def test_rows_are_streamed_lazily(self):
+        rows = self.access_rows(batch_size=2)
+        first = next(rows)
+        self.assertEqual(first["rfid_uid"], "0000000024")
+        rows.close()
+
+    def test_door_event_export(self):
+        rows = iter_door_event_rows(DoorEventFilters(source="web"), session_factory=self.session_factory)
+        body = b"".join(stream_export(rows, DOOR_EVENT_EXPORT_COLUMNS, "ndjson")).decode("utf-8")
+
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["action"], "remote_unlock")
+        self.assertEqual(records[0]["created_at"], "2026-01-01T08:00:00+08:00")
+
+    def test_filename(self):
+        now = datetime(2026, 3, 1, 9, 30, 0)
+        self.assertEqual(build_export_filename("access_logs", "csv", False, now), "access_logs_20260301-093000.csv")
+        self.assertEqual(build_export_filename("door_events", "ndjson", True, now), "door_events_20260301-093000.ndjson.gz")
+
+
+if __name__ == "__main__":
+    unittest.main()
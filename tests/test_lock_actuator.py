@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import unittest
+
+from app.services.gpio_control import LockActuator
+
+
+class LockActuatorTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.relay_writes = []
+        self.actuator = LockActuator(lock_duration=0.05, relay_writer=self.relay_writes.append)
+
+    async def test_timed_unlock_relocks_on_loop_timer(self):
+        threads_before = threading.active_count()
+        self.actuator.open_lock()
+
+        status = self.actuator.runtime_status()
+        self.assertEqual(status["door_state"], "unlocking")
+        self.assertIsNotNone(status["unlock_until"])
+        self.assertEqual(self.relay_writes, [True])
+        self.assertEqual(threading.active_count(), threads_before)
+
+        await asyncio.sleep(0.1)
+        status = self.actuator.runtime_status()
+        self.assertEqual(status["door_state"], "locked")
+        self.assertIsNone(status["unlock_until"])
+        self.assertIsNotNone(status["last_unlock_finished_at"])
+        self.assertEqual(self.relay_writes, [True, False])
+
+    async def test_repeat_unlock_extends_deadline(self):
+        self.actuator.open_lock()
+        first_deadline = self.actuator.runtime_status()["unlock_until"]
+
+        await asyncio.sleep(0.03)
+        self.actuator.open_lock()
+        self.assertGreater(self.actuator.runtime_status()["unlock_until"], first_deadline)
+
+        await asyncio.sleep(0.04)
+        self.assertEqual(self.actuator.door_state, "unlocking")
+        await asyncio.sleep(0.06)
+        self.assertEqual(self.actuator.door_state, "locked")
+        self.assertEqual(self.relay_writes, [True, False])
+
+    async def test_hold_and_force_lock_cancel_pending_relock(self):
+        self.actuator.open_lock()
+        self.actuator.hold_unlock()
+        await asyncio.sleep(0.1)
+
+        status = self.actuator.runtime_status()
+        self.assertEqual(status["door_state"], "held_open")
+        self.assertIsNotNone(status["hold_open_started_at"])
+        self.assertFalse(self.actuator.extend_unlock())
+
+        self.actuator.force_lock()
+        self.assertEqual(self.actuator.door_state, "locked")
+        self.assertEqual(self.relay_writes, [True, True, False])
+
+    async def test_close_relocks_timed_unlock(self):
+        self.actuator.lock_duration = 60
+        self.actuator.open_lock()
+        self.actuator.close()
+        self.assertEqual(self.actuator.door_state, "locked")
+
+
+class LockActuatorThreadTests(unittest.TestCase):
+    def test_relocks_without_event_loop(self):
+        relay_writes = []
+        relocked = threading.Event()
+
+        def write(unlocked):
+            relay_writes.append(unlocked)
+            if not unlocked:
+                relocked.set()
+
+        actuator = LockActuator(lock_duration=0.02, relay_writer=write)
+        actuator.open_lock()
+        self.assertTrue(relocked.wait(timeout=1))
+        self.assertEqual(actuator.door_state, "locked")
+        self.assertEqual(relay_writes, [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import app.main as main
+from app.database import AccessLog, Base, Card, DoorControlSettings, DoorEvent, User
+from app.services.card_index import CardAuthorization, card_index
+from app.services.door_mode import (
+    ACCESS_DECISION_DENY,
+    ACCESS_DECISION_TIMED_UNLOCK,
+    invalidate_door_settings_cache,
+    refresh_door_settings_cache,
+)
+from app.services.offline_snapshot import (
+    ENTRY,
+    HEADER,
+    AuthorizationSnapshot,
+    OfflineAuthorizer,
+    USER,
+    SnapshotFormatError,
+    write_snapshot,
+)
+
+
+def authorization(index: int, **overrides) -> CardAuthorization:
+    values = dict(
+        card_id=f"card-{index:04d}",
+        rfid_uid=f"{(index * 7919) % 100000:010d}",
+        user_id=f"user-{index % 50:04d}",
+        card_active=True,
+        user_active=True,
+        name=f"使用者{index % 50}",
+        student_id=f"s{index % 50:07d}",
+    )
+    values.update(overrides)
+    return CardAuthorization(**values)
+
+
+class SnapshotFileTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, "auth_snapshot.bin")
+
+    def test_binary_search_round_trips_every_entry(self):
+        entries = [authorization(index) for index in range(300)]
+        entries.append(authorization(999, rfid_uid="A1B2C3D4", user_id="user-long", card_active=False, name="很長的名字" * 10))
+        self.assertEqual(write_snapshot(self.path, entries), 301)
+        self.assertEqual(os.path.getsize(self.path), HEADER.size + 301 * ENTRY.size + 51 * USER.size)
+
+        snapshot = AuthorizationSnapshot(self.path)
+        self.addCleanup(snapshot.close)
+        for entry in entries[:-1]:
+            self.assertEqual(snapshot.get(entry.rfid_uid), entry)
+        disabled = snapshot.get("A1B2C3D4")
+        self.assertFalse(disabled.is_authorized)
+        self.assertTrue(("很長的名字" * 10).startswith(disabled.name))
+        self.assertIsNone(snapshot.get("0000000001"))
+        self.assertIsNone(snapshot.get(""))
+
+    def test_damaged_file_is_rejected_and_previous_mapping_kept(self):
+        write_snapshot(self.path, [authorization(1)])
+        authorizer = OfflineAuthorizer(self.path, os.path.join(self.temp_dir.name, "journal.ndjson"))
+        self.addCleanup(authorizer.close)
+        self.assertTrue(authorizer.open())
+
+        # A bad copy lands under the snapshot's name (files are only ever replaced, never edited).
+        with open(self.path, "rb") as handle:
+            damaged = bytearray(handle.read())
+        damaged[HEADER.size + 3] ^= 0xFF
+        with open(f"{self.path}.bad", "wb") as handle:
+            handle.write(damaged)
+        os.replace(f"{self.path}.bad", self.path)
+        with self.assertRaises(SnapshotFormatError):
+            AuthorizationSnapshot(self.path)
+
+        self.assertFalse(authorizer.open())
+        self.assertEqual(authorizer.lookup(authorization(1).rfid_uid), authorization(1))
+
+
+class DegradedModeTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+
+        with self.session_factory() as db:
+            db.add_all([
+                User(id="user-1", student_id="s1100001", name="Alice"),
+                User(id="user-2", student_id="s1100002", name="Bob", is_active=False),
+                Card(id="card-1", rfid_uid="0340914674", user_id="user-1"),
+                Card(id="card-2", rfid_uid="0012345678", user_id="user-2"),
+            ])
+            db.commit()
+            card_index.load(db)
+        self.addCleanup(card_index.clear)
+        self.addCleanup(invalidate_door_settings_cache)
+
+        self.journal_path = os.path.join(self.temp_dir.name, "journal.ndjson")
+        self.authorizer = OfflineAuthorizer(os.path.join(self.temp_dir.name, "auth_snapshot.bin"), self.journal_path)
+        self.addCleanup(self.authorizer.close)
+        self.assertTrue(self.authorizer.refresh())
+
+        self.open_lock = patch.object(main, "open_lock").start()
+        self.deny_access = patch.object(main, "deny_access").start()
+        patch.object(main, "offline_authorizer", self.authorizer).start()
+        patch.object(main.telegram_dispatcher, "notify").start()
+        patch.object(main.scan_debouncer, "should_process", return_value=True).start()
+        self.addCleanup(patch.stopall)
+
+    def journal(self) -> list[dict]:
+        with open(self.journal_path, encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle]
+
+    async def test_scans_are_decided_offline_when_sqlite_fails(self):
+        broken = patch.object(main, "SessionLocal", side_effect=OperationalError("SELECT 1", {}, Exception("disk I/O error")))
+        with broken:
+            await main.handle_rfid_scan("0340914674")
+            await main.handle_rfid_scan("0012345678")
+
+        self.open_lock.assert_called_once()
+        self.deny_access.assert_called_once()
+        self.assertTrue(self.authorizer.degraded)
+        self.assertEqual(
+            [(record["rfid_uid"], record["decision"], record["reason"]) for record in self.journal()],
+            [("0340914674", ACCESS_DECISION_TIMED_UNLOCK, "access_mode"), ("0012345678", ACCESS_DECISION_DENY, "user_disabled")],
+        )
+
+        # Startup without a database: the card index is empty and the mapped snapshot decides.
+        card_index.clear()
+        await main.handle_rfid_scan("0340914674")
+        await main.handle_rfid_scan("9999999999")
+        self.assertEqual(self.open_lock.call_count, 2)
+        self.assertEqual(self.journal()[-1]["reason"], "unknown_card")
+
+    def test_offline_decisions_follow_the_cached_door_mode(self):
+        with self.session_factory() as db:
+            settings = DoorControlSettings(id=1, access_mode="always_locked")
+            db.add(settings)
+            db.commit()
+            refresh_door_settings_cache(db, settings)
+        self.authorizer.refresh()
+        invalidate_door_settings_cache()
+
+        # Only the settings stored in the snapshot are left to go by.
+        decision = self.authorizer.decide("0340914674")
+        self.assertEqual((decision.access_decision, decision.reason), (ACCESS_DECISION_DENY, "access_mode"))
+
+    def test_reconcile_replays_grants_once(self):
+        self.authorizer.decide("0340914674")
+        self.authorizer.decide("0012345678")
+        self.authorizer.decide("0340914674")
+
+        self.assertEqual(self.authorizer.reconcile(self.session_factory), 2)
+        self.assertFalse(self.authorizer.degraded)
+        self.assertFalse(os.path.exists(self.journal_path))
+
+        with self.session_factory() as db:
+            logs = db.query(AccessLog).all()
+            self.assertEqual([(log.user_id, log.card_id, log.action) for log in logs], [("user-1", "card-1", "entry")] * 2)
+            summary = db.query(DoorEvent).one()
+            self.assertEqual(summary.action, "offline_reconcile")
+
+        # A replay file left behind by a crash after the commit adds nothing new.
+        with open(self.authorizer.journal.replay_path, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps({
+                "at": logs[0].timestamp.isoformat(sep=" "),
+                "rfid_uid": "0340914674",
+                "decision": ACCESS_DECISION_TIMED_UNLOCK,
+                "reason": "access_mode",
+                "user_id": "user-1",
+                "card_id": "card-1",
+            }) + "\n{\"torn")
+        self.assertEqual(self.authorizer.reconcile(self.session_factory), 0)
+        with self.session_factory() as db:
+            self.assertEqual(db.query(AccessLog).count(), 2)
+            self.assertEqual(db.query(DoorEvent).count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
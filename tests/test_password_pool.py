@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from app.services.password_pool import PasswordPoolBusyError, PasswordWorkerPool
+
+
+class PasswordWorkerPoolTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.pool = PasswordWorkerPool(max_workers=1, queue_timeout=0.05)
+
+    def tearDown(self):
+        self.pool.close()
+
+    async def test_jobs_run_off_the_event_loop(self):
+        ticks = 0
+        stop = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not stop.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.create_task(ticker())
+        thread_name = await self.pool.run(lambda: (time.sleep(0.2), threading.current_thread().name)[1])
+        stop.set()
+        await ticker_task
+
+        self.assertTrue(thread_name.startswith("password-worker"))
+        self.assertGreaterEqual(ticks, 10)
+
+    async def test_rejects_after_queue_timeout(self):
+        release = threading.Event()
+        blocker = asyncio.create_task(self.pool.run(release.wait, 1))
+        await asyncio.sleep(0.01)
+
+        with self.assertRaises(PasswordPoolBusyError):
+            await self.pool.run(lambda: None)
+
+        release.set()
+        self.assertTrue(await blocker)
+        stats = self.pool.stats()
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["waiting"], 0)
+
+    async def test_hash_and_verify_round_trip(self):
+        pool = PasswordWorkerPool(max_workers=1, queue_timeout=5)
+        self.addCleanup(pool.close)
+
+        password_hash = await pool.hash("correct horse")
+        self.assertTrue(await pool.verify("correct horse", password_hash))
+        self.assertFalse(await pool.verify("wrong", password_hash))
+
+
+if __name__ == "__main__":
+    unittest.main()
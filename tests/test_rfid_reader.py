@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+import unittest
+
+from app.services.rfid_reader import EV_KEY, KEY_ENTER, RFIDReader
+
+KEYCODES = {'1': 2, '2': 3, '3': 4, '4': 5, '5': 6, '6': 7, '7': 8, '8': 9, '9': 10, '0': 11}
+
+
+def key_events(card_uid: str):
+    events = []
+    for digit in card_uid:
+        events.append(SimpleNamespace(type=EV_KEY, code=KEYCODES[digit], value=1))
+        events.append(SimpleNamespace(type=EV_KEY, code=KEYCODES[digit], value=0))
+    events.append(SimpleNamespace(type=EV_KEY, code=KEY_ENTER, value=1))
+    return events
+
+
+class FakeDevice:
+    """Stands in for evdev.InputDevice; raises OSError once its events run out, like an unplug."""
+
+    def __init__(self, path: str, events: list, unplug: bool = True):
+        self.path = path
+        self.name = "Fake RFID Reader"
+        self.events = events
+        self.unplug = unplug
+        self.closed = False
+
+    async def async_read_loop(self):
+        for event in self.events:
+            await asyncio.sleep(0)
+            yield event
+        if self.unplug:
+            raise OSError(19, "No such device")
+        await asyncio.Event().wait()
+
+    def close(self):
+        self.closed = True
+
+
+class RFIDReaderTests(unittest.IsolatedAsyncioTestCase):
+    async def run_reader(self, reader, expected_scans: int):
+        scans = []
+        done = asyncio.Event()
+
+        async def on_scan(card_uid):
+            scans.append(card_uid)
+            if len(scans) >= expected_scans:
+                self.connected = sorted(reader.devices)
+                done.set()
+
+        task = asyncio.create_task(reader.read_loop(on_scan))
+        try:
+            await asyncio.wait_for(done.wait(), timeout=2)
+        finally:
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        return scans
+
+    async def test_reconnects_after_unplug(self):
+        sessions = [
+            FakeDevice("/dev/input/reader", key_events("0340914674")),
+            FakeDevice("/dev/input/reader", key_events("1234567890"), unplug=False),
+        ]
+        attempts = []
+
+        def opener(path):
+            attempts.append(path)
+            if len(attempts) == 2:
+                raise FileNotFoundError(path)
+            return sessions.pop(0)
+
+        reader = RFIDReader(["/dev/input/reader"], device_opener=opener, reconnect_interval=0, dev_mode=False)
+        scans = await self.run_reader(reader, expected_scans=2)
+
+        self.assertEqual(scans, ["0340914674", "1234567890"])
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(self.connected, ["/dev/input/reader"])
+        self.assertEqual(reader.devices, {})
+
+    async def test_watches_several_devices(self):
+        devices = {
+            "/dev/input/a": FakeDevice("/dev/input/a", key_events("1111111111"), unplug=False),
+            "/dev/input/b": FakeDevice("/dev/input/b", key_events("2222222222"), unplug=False),
+        }
+        reader = RFIDReader(list(devices), device_opener=devices.__getitem__, dev_mode=False)
+        scans = await self.run_reader(reader, expected_scans=2)
+
+        self.assertEqual(sorted(scans), ["1111111111", "2222222222"])
+        self.assertEqual(self.connected, ["/dev/input/a", "/dev/input/b"])
+
+    async def test_handler_errors_do_not_stop_reading(self):
+        device = FakeDevice("/dev/input/reader", key_events("1111111111") + key_events("2222222222"), unplug=False)
+        reader = RFIDReader(["/dev/input/reader"], device_opener=lambda path: device, dev_mode=False)
+        scans = []
+        done = asyncio.Event()
+
+        async def on_scan(card_uid):
+            scans.append(card_uid)
+            if len(scans) == 1:
+                raise RuntimeError("database is locked")
+            done.set()
+
+        task = asyncio.create_task(reader.read_loop(on_scan))
+        try:
+            await asyncio.wait_for(done.wait(), timeout=2)
+        finally:
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertEqual(scans, ["1111111111", "2222222222"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from app.services.scan_debouncer import ScanDebouncer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ScanDebouncerTests(unittest.TestCase):
+    def test_collapses_repeats_inside_window(self):
+        clock = FakeClock()
+        debouncer = ScanDebouncer(3, clock=clock)
+
+        self.assertTrue(debouncer.should_process("0340914674"))
+        clock.now += 1
+        self.assertFalse(debouncer.should_process("0340914674"))
+        self.assertTrue(debouncer.should_process("1234567890"))
+
+        clock.now += 3
+        self.assertTrue(debouncer.should_process("0340914674"))
+
+        stats = debouncer.stats()
+        self.assertEqual(stats["accepted"], 3)
+        self.assertEqual(stats["suppressed"], 1)
+        self.assertEqual(stats["tracked_uids"], 1)
+
+    def test_padding_variants_and_doors(self):
+        debouncer = ScanDebouncer(3, clock=FakeClock())
+        self.assertTrue(debouncer.should_process("0340914674", "main"))
+        self.assertFalse(debouncer.should_process("340914674", "main"))
+        self.assertTrue(debouncer.should_process("340914674", "lab"))
+
+    def test_zero_window_disables_debouncing(self):
+        debouncer = ScanDebouncer(0, clock=FakeClock())
+        self.assertTrue(debouncer.should_process("0340914674"))
+        self.assertTrue(debouncer.should_process("0340914674"))
+        self.assertEqual(debouncer.stats()["suppressed"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, event
+
+from app.database import SQLITE_PRAGMAS, apply_sqlite_pragmas
+
+
+class SQLiteProfileTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        database_path = os.path.join(self.temp_dir.name, "profile.db")
+        self.engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False})
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def read_pragma(self, name):
+        with self.engine.connect() as connection:
+            return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+    def test_profile_is_applied_on_connect(self):
+        pragmas = [
+            ("busy_timeout", "2500"),
+            ("journal_mode", "WAL"),
+            ("synchronous", "NORMAL"),
+            ("cache_size", "-8000"),
+            ("temp_store", "MEMORY"),
+            ("mmap_size", ""),
+        ]
+        event.listen(self.engine, "connect", lambda connection, record: apply_sqlite_pragmas(connection, pragmas))
+
+        self.assertEqual(self.read_pragma("journal_mode"), "wal")
+        self.assertEqual(self.read_pragma("busy_timeout"), 2500)
+        self.assertEqual(self.read_pragma("synchronous"), 1)
+        self.assertEqual(self.read_pragma("cache_size"), -8000)
+        self.assertEqual(self.read_pragma("temp_store"), 2)
+
+    def test_rejects_values_that_are_not_plain_tokens(self):
+        with self.engine.connect() as connection:
+            raw_connection = connection.connection.dbapi_connection
+            with self.assertRaises(RuntimeError):
+                apply_sqlite_pragmas(raw_connection, [("cache_size", "1; DROP TABLE users")])
+
+    def test_busy_timeout_precedes_journal_mode(self):
+        names = [name for name, _ in SQLITE_PRAGMAS]
+        self.assertLess(names.index("busy_timeout"), names.index("journal_mode"))
+
+
+if __name__ == "__main__":
+    unittest.main()
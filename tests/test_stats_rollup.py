@@ -0,0 +1,130 @@
+from datetime import date, datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import AccessDailyStat, AccessLog, Base, UserDailyPresence
+from app.routers import admin
+from app.services.event_writer import EventWriter
+from app.services.stats_rollup import (
+    ensure_access_rollups,
+    get_access_timeseries,
+    rebuild_access_rollups,
+)
+
+ADMIN = {"id": "admin-1", "username": "root", "name": "Root", "sub": "root"}
+
+# (user_id, naive UTC timestamp); 16:00 UTC is already the next day in Taipei.
+HISTORY = [
+    ("user-1", datetime(2026, 3, 2, 1, 0)),
+    ("user-1", datetime(2026, 3, 2, 5, 0)),
+    ("user-2", datetime(2026, 3, 2, 15, 59)),
+    ("user-2", datetime(2026, 3, 2, 16, 0)),
+    ("user-3", datetime(2026, 3, 9, 2, 0)),
+    ("user-1", datetime(2026, 2, 27, 2, 0)),
+]
+
+
+class StatsRollupTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        database_path = os.path.join(self.temp_dir.name, "stats.db")
+        self.engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.TestingSession = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def daily(self):
+        with self.TestingSession() as db:
+            return {
+                row.day: (row.access_count, row.unique_users)
+                for row in db.query(AccessDailyStat).order_by(AccessDailyStat.day)
+            }
+
+    async def write_history(self):
+        writer = EventWriter(self.TestingSession, flush_interval_ms=20, batch_size=4)
+        await writer.start()
+        for user_id, timestamp in HISTORY:
+            await writer.submit(AccessLog, user_id=user_id, rfid_uid="0000000001", action="entry", timestamp=timestamp)
+        await writer.stop()
+
+    async def test_writer_updates_rollups_in_batch(self):
+        await self.write_history()
+
+        self.assertEqual(self.daily(), {
+            "2026-02-27": (1, 1),
+            "2026-03-02": (3, 2),
+            "2026-03-03": (1, 1),
+            "2026-03-09": (1, 1),
+        })
+        with self.TestingSession() as db:
+            presence = db.get(UserDailyPresence, ("2026-03-02", "user-1"))
+            self.assertEqual(presence.access_count, 2)
+            self.assertEqual(presence.first_seen_at, datetime(2026, 3, 2, 1, 0))
+            self.assertEqual(presence.last_seen_at, datetime(2026, 3, 2, 5, 0))
+
+    async def test_backfill_matches_incremental_rollups(self):
+        await self.write_history()
+        incremental = self.daily()
+
+        with self.TestingSession() as db:
+            db.query(UserDailyPresence).delete()
+            db.query(AccessDailyStat).delete()
+            db.commit()
+
+        self.assertEqual(ensure_access_rollups(self.TestingSession), len(HISTORY))
+        self.assertEqual(self.daily(), incremental)
+        self.assertIsNone(ensure_access_rollups(self.TestingSession))
+
+        with self.TestingSession() as db:
+            self.assertEqual(rebuild_access_rollups(db, batch_size=2), len(HISTORY))
+            db.commit()
+        self.assertEqual(self.daily(), incremental)
+
+    async def test_timeseries_buckets(self):
+        await self.write_history()
+
+        with self.TestingSession() as db:
+            weeks = get_access_timeseries(db, "week", date(2026, 3, 3), date(2026, 3, 10))
+            months = get_access_timeseries(db, "month", date(2026, 2, 1), date(2026, 4, 30))
+            with self.assertRaises(ValueError):
+                get_access_timeseries(db, "day", date(2024, 1, 1), date(2026, 1, 1))
+
+        self.assertEqual(weeks, [
+            {"start": "2026-03-02", "access_count": 4, "unique_users": 2},
+            {"start": "2026-03-09", "access_count": 1, "unique_users": 1},
+        ])
+        self.assertEqual([(m["start"], m["access_count"], m["unique_users"]) for m in months], [
+            ("2026-02-01", 1, 1),
+            ("2026-03-01", 5, 3),
+            ("2026-04-01", 0, 0),
+        ])
+
+    async def test_admin_stats_read_only_rollups(self):
+        await self.write_history()
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        with patch.object(admin, "get_current_admin", return_value=ADMIN), \
+                patch.object(admin, "now_app_timezone", return_value=datetime(2026, 3, 10, 12, 0)):
+            with self.TestingSession() as db:
+                stats = await admin.get_stats(db=db)
+                series = await admin.get_stats_timeseries(granularity="day", start="2026-03-08", db=db)
+
+        self.assertEqual(stats["log_count"], 6)
+        self.assertEqual(stats["monthly_access_count"], 5)
+        self.assertEqual(stats["active_users_count"], 1)
+        self.assertEqual([bucket["access_count"] for bucket in series["buckets"]], [0, 1, 0])
+        self.assertFalse(any("access_logs" in statement for statement in statements))
+
+
+if __name__ == "__main__":
+    unittest.main()
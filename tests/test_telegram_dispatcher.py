@@ -0,0 +1,147 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import unittest
+
+from app.services.telegram import COALESCE_ENTRY, TelegramDispatcher
+
+
+class StubTelegramServer:
+    """Minimal local stand-in for the Bot API sendMessage endpoint."""
+
+    def __init__(self):
+        self.messages = []
+        self.responses = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, payload = stub.responses.pop(0) if stub.responses else (200, {"ok": True})
+                if status == 200:
+                    stub.messages.append(body["text"])
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TelegramDispatcherTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.stub = StubTelegramServer()
+
+    def tearDown(self):
+        self.stub.close()
+
+    def make_dispatcher(self, **overrides):
+        options = {
+            "bot_token": "123:test",
+            "chat_id": "42",
+            "api_base": self.stub.url,
+            "max_queue_size": 10,
+            "coalesce_window_ms": 0,
+            "max_retries": 2,
+        }
+        options.update(overrides)
+        return TelegramDispatcher(**options)
+
+    async def test_delivers_queued_notifications(self):
+        dispatcher = self.make_dispatcher()
+        await dispatcher.start()
+        self.assertTrue(dispatcher.notify("🚪 遠程開門操作"))
+        await dispatcher.stop()
+
+        self.assertEqual(self.stub.messages, ["🚪 遠程開門操作"])
+        self.assertEqual(dispatcher.stats()["sent"], 1)
+
+    async def test_retries_after_rate_limit(self):
+        self.stub.responses.append((429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 0}}))
+        dispatcher = self.make_dispatcher()
+        await dispatcher.start()
+        dispatcher.notify("歡迎！")
+        await asyncio.sleep(0.2)
+        await dispatcher.stop()
+
+        stats = dispatcher.stats()
+        self.assertEqual(self.stub.messages, ["歡迎！"])
+        self.assertEqual(stats["rate_limited"], 1)
+        self.assertEqual(stats["failed"], 0)
+
+    async def test_sustained_rate_limiting_gives_up_on_the_message(self):
+        rate_limited = (429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 0}})
+        self.stub.responses.extend([rate_limited] * 4)
+        dispatcher = self.make_dispatcher(rate_limit_retries=2)
+        await dispatcher.start()
+        dispatcher.notify("first")
+        dispatcher.notify("second")
+        await asyncio.sleep(0.3)
+        await dispatcher.stop()
+
+        stats = dispatcher.stats()
+        self.assertEqual(self.stub.messages, ["second"])
+        self.assertEqual((stats["failed"], stats["sent"], stats["rate_limited"]), (1, 1, 4))
+
+    async def test_coalesces_entry_burst_into_one_message(self):
+        dispatcher = self.make_dispatcher(coalesce_window_ms=100)
+        await dispatcher.start()
+        for index in range(3):
+            dispatcher.notify(f"歡迎！user-{index}", coalesce_key=COALESCE_ENTRY)
+        dispatcher.notify("🗑️ 刪除卡片")
+        await asyncio.sleep(0.3)
+        await dispatcher.stop()
+
+        self.assertEqual(sorted(self.stub.messages), sorted([
+            "歡迎！user-0\n歡迎！user-1\n歡迎！user-2",
+            "🗑️ 刪除卡片",
+        ]))
+        self.assertEqual(dispatcher.stats()["coalesced"], 2)
+
+    async def test_drops_oldest_when_queue_is_full(self):
+        dispatcher = self.make_dispatcher(max_queue_size=2)
+        for index in range(3):
+            dispatcher.notify(f"message-{index}")
+        self.assertEqual(dispatcher.stats()["dropped"], 1)
+
+        await dispatcher.start()
+        await dispatcher.stop()
+        self.assertEqual(self.stub.messages, ["message-1", "message-2"])
+
+    async def test_client_errors_are_not_retried(self):
+        self.stub.responses.append((400, {"ok": False, "error_code": 400}))
+        dispatcher = self.make_dispatcher()
+        await dispatcher.start()
+        dispatcher.notify("bad")
+        await dispatcher.stop()
+
+        self.assertEqual(self.stub.messages, [])
+        self.assertEqual(dispatcher.stats()["failed"], 1)
+        self.assertEqual(self.stub.responses, [])
+
+    def test_unconfigured_dispatcher_skips(self):
+        dispatcher = TelegramDispatcher(bot_token=None, chat_id=None)
+        self.assertFalse(dispatcher.notify("hello"))
+        self.assertEqual(dispatcher.queue_depth, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()